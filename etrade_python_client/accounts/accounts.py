@@ -1,12 +1,10 @@
-import json
 import logging
-import configparser
-from order.order import Order
-from client_logger import logger
+from app_config import load_config
+from client_logger import logger, log_response_body
+from response_parser import parse_json
 
 # loading configuration file
-config = configparser.ConfigParser()
-config.read('config.ini')
+config = load_config()
 
 
 class Accounts:
@@ -27,22 +25,29 @@ class Accounts:
         """
         url = self.base_url + "/v1/accounts/list.json"
         response = self.session.get(url, header_auth=True)
+        return self._handle_account_list_response(response)
+
+    @staticmethod
+    def _handle_account_list_response(response):
+        """
+        Parses an account list API response.
+        Returns the list of accounts or raises an exception on error.
+        """
         logger.debug("Request Header: %s", response.request.headers)
 
         if response is not None and response.status_code == 200:
-            parsed = json.loads(response.text)
-            logger.debug("Response Body: %s", json.dumps(parsed, indent=4, sort_keys=True))
-            data = response.json()
+            log_response_body(response)
+            data = parse_json(response)
             if data is not None and "AccountListResponse" in data and "Accounts" in data["AccountListResponse"] \
                     and "Account" in data["AccountListResponse"]["Accounts"]:
                 return data["AccountListResponse"]["Accounts"]["Account"]
             else:
-                logger.debug("Response Body: %s", response.text)
+                log_response_body(response)
                 raise Exception("AccountList API service error")
         else:
-            logger.debug("Response Body: %s", response.text)
+            log_response_body(response)
             if response is not None and response.headers.get('Content-Type') == 'application/json':
-                error_data = response.json()
+                error_data = parse_json(response)
                 if "Error" in error_data and "message" in error_data["Error"]:
                     raise Exception(error_data["Error"]["message"])
             raise Exception("AccountList API service error")
@@ -90,19 +95,26 @@ class Accounts:
         """
         url = self.base_url + "/v1/accounts/" + account_id_key + "/portfolio.json"
         response = self.session.get(url, header_auth=True)
+        return self._handle_portfolio_response(response)
+
+    @staticmethod
+    def _handle_portfolio_response(response):
+        """
+        Parses a portfolio API response.
+        Returns None when the account holds no positions.
+        """
         logger.debug("Request Header: %s", response.request.headers)
 
         if response is not None and response.status_code == 200:
-            parsed = json.loads(response.text)
-            logger.debug("Response Body: %s", json.dumps(parsed, indent=4, sort_keys=True))
-            data = response.json()
+            log_response_body(response)
+            data = parse_json(response)
             return data
         elif response is not None and response.status_code == 204:
             return None
         else:
-            logger.debug("Response Body: %s", response.text)
+            log_response_body(response)
             if response is not None and response.headers.get('Content-Type') == 'application/json':
-                error_data = response.json()
+                error_data = parse_json(response)
                 if "Error" in error_data and "message" in error_data["Error"]:
                     raise Exception(error_data["Error"]["message"])
             raise Exception("Portfolio API service error")
@@ -157,16 +169,22 @@ class Accounts:
 
         response = self.session.get(url, header_auth=True, params=params, headers=headers)
         logger.debug("Request url: %s", url)
+        return self._handle_balance_response(response)
+
+    @staticmethod
+    def _handle_balance_response(response):
+        """
+        Parses a balance API response.
+        """
         logger.debug("Request Header: %s", response.request.headers)
 
         if response is not None and response.status_code == 200:
-            parsed = json.loads(response.text)
-            logger.debug("Response Body: %s", json.dumps(parsed, indent=4, sort_keys=True))
-            return response.json()
+            log_response_body(response)
+            return parse_json(response)
         else:
-            logger.debug("Response Body: %s", response.text)
+            log_response_body(response)
             if response is not None and response.headers.get('Content-Type') == 'application/json':
-                error_data = response.json()
+                error_data = parse_json(response)
                 if "Error" in error_data and "message" in error_data["Error"]:
                     raise Exception(error_data["Error"]["message"])
             raise Exception("Balance API service error")
@@ -226,6 +244,8 @@ class Accounts:
                 elif selection == "2":
                     self.portfolio()
                 elif selection == "3":
+                    # Imported here: the order module is only needed by this menu
+                    from order.order import Order
                     order = Order(self.session, self.account, self.base_url)
                     order.view_orders()
                 elif selection == "4":
@@ -0,0 +1,36 @@
+from accounts.accounts import Accounts, config
+from client_logger import logger
+
+
+class AsyncAccounts(Accounts):
+    """
+    Non-blocking variant of Accounts for use with an AsyncOAuth1Session.
+    Request building and response parsing are shared with Accounts.
+    """
+
+    async def fetch_account_list(self):
+        """
+        Fetches the list of accounts from the API.
+        Returns the list of accounts or raises an exception on error.
+        """
+        url = self.base_url + "/v1/accounts/list.json"
+        return await self.session.get_parsed(url, self._handle_account_list_response, header_auth=True)
+
+    async def fetch_portfolio(self, account_id_key):
+        """
+        Fetches the portfolio for a specific account.
+        """
+        url = self.base_url + "/v1/accounts/" + account_id_key + "/portfolio.json"
+        return await self.session.get_parsed(url, self._handle_portfolio_response, header_auth=True)
+
+    async def fetch_balance(self, account_id_key, institution_type="BROKERAGE"):
+        """
+        Fetches the balance for a specific account.
+        """
+        url = self.base_url + "/v1/accounts/" + account_id_key + "/balance.json"
+        params = {"instType": institution_type, "realTimeNAV": "true"}
+        headers = {"consumerkey": config["DEFAULT"]["CONSUMER_KEY"]}
+
+        logger.debug("Request url: %s", url)
+        return await self.session.get_parsed(url, self._handle_balance_response,
+                                             header_auth=True, params=params, headers=headers)
@@ -0,0 +1,20 @@
+"""Loads config.ini once per process"""
+import configparser
+import os
+from functools import lru_cache
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_FILE = os.path.join(BASE_DIR, 'config.ini')
+
+
+@lru_cache(maxsize=None)
+def load_config(path=CONFIG_FILE):
+    """
+    Returns the parsed configuration, reading the file only on the first call.
+    The file is looked up next to this module, not in the current directory.
+    :param path: Configuration file to read
+    :return: ConfigParser shared by every caller
+    """
+    config = configparser.ConfigParser()
+    config.read(path)
+    return config
@@ -0,0 +1,181 @@
+"""Non-blocking OAuth 1.0a session used by the MCP server"""
+import time
+from contextlib import nullcontext
+from hashlib import sha1
+from random import random
+from urllib.parse import quote
+
+import httpx
+from oauth_signer import OAuth1Signer
+from singleflight import SingleFlight, request_key
+
+FORM_URLENCODED = "application/x-www-form-urlencoded"
+ENTITY_METHODS = ("POST", "PUT", "PATCH")
+DEFAULT_TIMEOUT = 300.0
+
+
+class AsyncOAuth1Session:
+    """
+    Async counterpart of rauth's OAuth1Session.
+
+    Requests are signed exactly like rauth signs them (HMAC-SHA1 over the
+    method, URL and normalized parameters, by default with OAuth1Signer)
+    and sent through a shared httpx.AsyncClient, so concurrent calls
+    overlap on I/O instead of blocking the event loop.
+    """
+    VERSION = "1.0"
+
+    def __init__(self, consumer_key, consumer_secret, access_token=None, access_token_secret=None,
+                 signature=None, client=None, timeout=DEFAULT_TIMEOUT, singleflight=None, rate_limiter=None,
+                 scheduler=None, resilience=None):
+        self.consumer_key = consumer_key
+        self.consumer_secret = consumer_secret
+        self.access_token = access_token
+        self.access_token_secret = access_token_secret
+        if signature is None:
+            self.signature = OAuth1Signer(consumer_key, consumer_secret, access_token, access_token_secret)
+        else:
+            self.signature = signature()
+        self.client = client or httpx.AsyncClient(timeout=timeout)
+        self.singleflight = singleflight or SingleFlight()
+        self.rate_limiter = rate_limiter
+        self.scheduler = scheduler
+        self.resilience = resilience
+        # Monotonic time of the last request sent, used to track E*TRADE's idle timeout
+        self.last_request_at = time.monotonic()
+
+    @classmethod
+    def from_session(cls, session, **kwargs):
+        """
+        Builds an async session sharing the credentials, rate limiter and
+        retry policy of an authenticated rauth session.
+
+        :param session: authenticated rauth OAuth1Session
+        """
+        kwargs.setdefault("rate_limiter", getattr(session, "rate_limiter", None))
+        kwargs.setdefault("resilience", getattr(session, "resilience", None))
+        return cls(session.consumer_key, session.consumer_secret,
+                   session.access_token, session.access_token_secret, **kwargs)
+
+    def update_tokens(self, access_token, access_token_secret):
+        """
+        Switches to new access token credentials. Requests already signed
+        finish with the old ones; every later request uses the new ones.
+        """
+        signer = OAuth1Signer(self.consumer_key, self.consumer_secret, access_token, access_token_secret) \
+            if isinstance(self.signature, OAuth1Signer) else self.signature
+        self.access_token, self.access_token_secret, self.signature = access_token, access_token_secret, signer
+
+    def _get_oauth_params(self):
+        """Prepares OAuth params for signing"""
+        if isinstance(self.signature, OAuth1Signer):
+            return self.signature.oauth_params()
+        oauth_params = {
+            "oauth_consumer_key": self.consumer_key,
+            "oauth_nonce": sha1(str(random()).encode("ascii")).hexdigest(),
+            "oauth_signature_method": self.signature.NAME,
+            "oauth_timestamp": int(time.time()),
+        }
+        if self.access_token is not None:
+            oauth_params["oauth_token"] = self.access_token
+        oauth_params["oauth_version"] = self.VERSION
+        return oauth_params
+
+    @staticmethod
+    def _auth_header(oauth_params, realm=""):
+        """Constructs the OAuth Authorization header"""
+        params = ['{k}="{v}"'.format(k=k, v=quote(str(v), safe=""))
+                  for k, v in oauth_params.items()]
+        return "OAuth " + ",".join(['realm="{realm}"'.format(realm=realm)] + params)
+
+    async def request(self, method, url, header_auth=False, realm="", **req_kwargs):
+        """
+        Signs and sends a request.
+
+        Mirrors the keyword arguments accepted by rauth's OAuth1Session
+        (params, data, headers, header_auth) so callers can switch between
+        the two sessions without changing their request code.
+        """
+        method = method.upper()
+        if self.resilience is None:
+            return await self._send(method, url, header_auth, realm, req_kwargs)
+
+        async def send(remaining):
+            timeout = req_kwargs.get("timeout", self._cap_timeout(self.client.timeout, remaining))
+            return await self._send(method, url, header_auth, realm, dict(req_kwargs, timeout=timeout))
+        return await self.resilience.call(method, url, send)
+
+    @staticmethod
+    def _cap_timeout(timeout, remaining):
+        """Limits each phase of the client's httpx.Timeout to the time left before the deadline"""
+        def cap(value):
+            return remaining if value is None else min(value, remaining)
+        return httpx.Timeout(connect=cap(timeout.connect), read=cap(timeout.read),
+                             write=cap(timeout.write), pool=cap(timeout.pool))
+
+    async def _send(self, method, url, header_auth, realm, req_kwargs):
+        """
+        Sends one attempt: waits for a rate limit token, then for a scheduler
+        slot, which is held only while the request is signed and in flight,
+        not during rate limit waits or retry backoff.
+        """
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire(url)
+        async with self.scheduler.slot(method, url) if self.scheduler is not None else nullcontext():
+            return await self._sign_and_send(method, url, header_auth, realm, req_kwargs)
+
+    async def _sign_and_send(self, method, url, header_auth, realm, req_kwargs):
+        """Signs the request and sends it through the HTTP client"""
+        req_kwargs = dict(req_kwargs)
+        self.last_request_at = time.monotonic()
+        headers = dict(req_kwargs.pop("headers", None) or {})
+        params = dict(req_kwargs.pop("params", None) or {})
+        data = req_kwargs.pop("data", None)
+
+        if method in ENTITY_METHODS:
+            headers.setdefault("Content-Type", FORM_URLENCODED)
+
+        oauth_params = self._get_oauth_params()
+        oauth_params["oauth_signature"] = self.signature.sign(
+            self.consumer_secret, self.access_token_secret, method, url, oauth_params,
+            {"params": params, "data": data if isinstance(data, dict) else {}, "headers": headers})
+
+        if header_auth:
+            headers["Authorization"] = self._auth_header(oauth_params, realm)
+        else:
+            params.update(oauth_params)
+
+        if isinstance(data, dict):
+            req_kwargs["data"] = data
+        elif data is not None:
+            req_kwargs["content"] = data
+
+        return await self.client.request(method, url, params=params, headers=headers, **req_kwargs)
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def get_parsed(self, url, handler, **kwargs):
+        """
+        Sends a GET and parses the response with `handler`.
+
+        Identical concurrent GETs (same URL and query parameters) share one
+        HTTP call, and every caller receives the same parsed result.
+        """
+        async def fetch():
+            return handler(await self.get(url, **kwargs))
+
+        return await self.singleflight.do(request_key("GET", url, kwargs.get("params")), fetch)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url, **kwargs):
+        return await self.request("PUT", url, **kwargs)
+
+    async def delete(self, url, **kwargs):
+        return await self.request("DELETE", url, **kwargs)
+
+    async def aclose(self):
+        """Closes the underlying HTTP client and its pooled connections"""
+        await self.client.aclose()
@@ -0,0 +1,365 @@
+"""
+Micro-benchmarks for hot paths of the client. Run from this directory:
+
+    python benchmarks.py [recorded response .json files]
+
+No E*TRADE credentials or network access are needed. The response bodies
+are synthetic, shaped like the API's option chain and portfolio responses;
+pass files holding recorded response bodies to benchmark response decoding
+on real payloads instead.
+"""
+import json
+import logging
+import math
+import os
+import queue
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+import numpy as np
+from rauth.oauth import HmacSha1Signature
+from rauth.session import OAuth1Session
+import requests
+
+import client_logger
+import response_parser
+from market import option_pricing
+from market.records import OptionChain
+from oauth_signer import OAuth1Signer
+
+CONSUMER_KEY = "a1b2c3d4e5f6a1b2c3d4e5f6a1b2c3d4"
+CONSUMER_SECRET = "f6e5d4c3b2a1f6e5d4c3b2a1f6e5d4c3b2a1f6e5d4c3b2a1f6e5d4c3b2a1f6e5"
+ACCESS_TOKEN = "Zm9vYmFyYmF6cXV4Zm9vYmFyYmF6cXV4Zm9vYmFy+/="
+ACCESS_TOKEN_SECRET = "cXV4YmF6YmFyZm9vcXV4YmF6YmFyZm9vcXV4+/="
+
+
+def _report(name, seconds, number, baseline=None):
+    per_call = seconds / number * 1e6
+    line = f"   {name:<28} {per_call:8.2f} us/op"
+    if baseline is not None:
+        line += f"   ({baseline / seconds:.1f}x faster)"
+    print(line)
+
+
+def bench_oauth_signing(number=20000):
+    """Signing cost per request: rauth's HmacSha1Signature vs OAuth1Signer"""
+    print("\n--- OAuth1 signing (quote request with query params) ---")
+    url = "https://api.etrade.com/v1/market/quote/AAPL,MSFT,GOOG,AMZN.json"
+    req_kwargs = {"params": {"detailFlag": "ALL", "overrideSymbolCount": "true"}, "data": {}, "headers": {}}
+
+    session = OAuth1Session(CONSUMER_KEY, CONSUMER_SECRET, ACCESS_TOKEN, ACCESS_TOKEN_SECRET)
+    rauth_signature = HmacSha1Signature()
+    signer = OAuth1Signer(CONSUMER_KEY, CONSUMER_SECRET, ACCESS_TOKEN, ACCESS_TOKEN_SECRET)
+
+    # Same inputs must produce the same signature
+    oauth_params = signer.oauth_params()
+    expected = rauth_signature.sign(CONSUMER_SECRET, ACCESS_TOKEN_SECRET, "GET", url, oauth_params, req_kwargs)
+    actual = signer.sign(CONSUMER_SECRET, ACCESS_TOKEN_SECRET, "GET", url, oauth_params, req_kwargs)
+    assert expected == actual, (expected, actual)
+    print("   Signatures match rauth:", expected)
+
+    def rauth_path():
+        params = session._get_oauth_params({"params": dict(req_kwargs["params"])})
+        rauth_signature.sign(CONSUMER_SECRET, ACCESS_TOKEN_SECRET, "GET", url, params, req_kwargs)
+
+    def fast_path():
+        params = signer.oauth_params()
+        signer.sign(CONSUMER_SECRET, ACCESS_TOKEN_SECRET, "GET", url, params, req_kwargs)
+
+    baseline = min(timeit.repeat(rauth_path, number=number, repeat=3))
+    fast = min(timeit.repeat(fast_path, number=number, repeat=3))
+    _report("rauth HmacSha1Signature", baseline, number)
+    _report("OAuth1Signer", fast, number, baseline)
+
+    nonce_rauth = min(timeit.repeat(lambda: session._get_oauth_params({}), number=number, repeat=3))
+    nonce_fast = min(timeit.repeat(signer.oauth_params, number=number, repeat=3))
+    _report("rauth oauth params + nonce", nonce_rauth, number)
+    _report("OAuth1Signer.oauth_params", nonce_fast, number, nonce_rauth)
+
+
+def option_chain_body(pairs=850):
+    """Returns an OptionChainResponse JSON body of roughly 1 MB"""
+    def option(kind, strike):
+        return {"optionCategory": "STANDARD", "optionRootSymbol": "AAPL", "timeStamp": 1700000000,
+                "adjustedFlag": False, "displaySymbol": "AAPL Jan 18 '30 $%d %s" % (strike, kind),
+                "optionType": kind.upper(), "strikePrice": strike, "symbol": "AAPL", "bid": 1.25, "ask": 1.3,
+                "bidSize": 10, "askSize": 12, "inTheMoney": "n", "volume": 1234, "openInterest": 5678,
+                "netChange": -0.05, "lastPrice": 1.27, "quoteDetail": "https://api.etrade.com/v1/market/quote/AAPL",
+                "osiKey": "AAPL--300118%s%08d" % (kind[0].upper(), strike * 1000),
+                "OptionGreeks": {"rho": 0.01, "vega": 0.2, "theta": -0.03, "delta": 0.45, "gamma": 0.02,
+                                 "iv": 0.31, "currentValue": False}}
+    return json.dumps({"OptionChainResponse": {"OptionPair": [
+        {"Call": option("Call", strike), "Put": option("Put", strike)} for strike in range(pairs)]}})
+
+
+def portfolio_body(positions=300):
+    """Returns a PortfolioResponse JSON body for an account with many positions"""
+    return json.dumps({"PortfolioResponse": {"AccountPortfolio": [{"accountId": "12345678", "Position": [
+        {"positionId": 100000 + i, "symbolDescription": "SYM%d" % i, "dateAcquired": 1690000000000,
+         "pricePaid": 101.25, "commissions": 0.0, "otherFees": 0.0, "quantity": 10 + i, "positionIndicator": "TYPE2",
+         "positionType": "LONG", "daysGain": 12.5, "daysGainPct": 0.41, "marketValue": 1234.5, "totalCost": 1012.5,
+         "totalGain": 222.0, "totalGainPct": 21.93, "pctOfPortfolio": 0.33, "costPerShare": 101.25,
+         "todayCommissions": 0.0, "todayFees": 0.0, "todayPricePaid": 0.0, "todayQuantity": 0,
+         "lotsDetails": "https://api.etrade.com/v1/accounts/abc/portfolio/%d" % i,
+         "quoteDetails": "https://api.etrade.com/v1/market/quote/SYM%d" % i,
+         "Product": {"symbol": "SYM%d" % i, "securityType": "EQ", "securitySubType": "COMMON"},
+         "Quick": {"change": 1.25, "changePct": 0.41, "lastTrade": 123.45, "lastTradeTime": 1700000000,
+                   "quoteStatus": "DELAYED", "volume": 1234567}}
+        for i in range(positions)]}]}})
+
+
+class _FakeResponse:
+    """Just enough of a requests/httpx response for the response handlers"""
+    status_code = 200
+
+    def __init__(self, text):
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def _file_logger(name, directory, queued):
+    """Logger writing to a file like client_logger, either directly or through a background queue"""
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    handler = RotatingFileHandler(os.path.join(directory, name + ".log"), maxBytes=5*1024*1024, backupCount=1)
+    handler.setFormatter(logging.Formatter("%(asctime)-15s %(message)s"))
+    if not queued:
+        logger.addHandler(handler)
+        return logger, None
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, handler)
+    listener.start()
+    return logger, listener
+
+
+def bench_response_logging(number=10):
+    """Per-call cost of logging and parsing a 1 MB option chain response"""
+    body = option_chain_body()
+    print("\n--- Response logging + parsing (%.1f MB option chain) ---" % (len(body) / 1e6))
+    response = _FakeResponse(body)
+
+    with tempfile.TemporaryDirectory() as directory:
+        old_logger, _ = _file_logger("bench_sync", directory, queued=False)
+        new_logger, listener = _file_logger("bench_queued", directory, queued=True)
+
+        def before():
+            # Previous handlers: parse for the log line, pretty-print it, parse again
+            parsed = json.loads(response.text)
+            old_logger.debug("Response Body: %s", json.dumps(parsed, indent=4, sort_keys=True))
+            response.json()
+
+        def after():
+            client_logger.log_response_body(response)
+            response.json()
+
+        saved = client_logger.logger
+        client_logger.logger = new_logger
+        try:
+            baseline = min(timeit.repeat(before, number=number, repeat=3))
+            new_logger.setLevel(logging.INFO)
+            disabled = min(timeit.repeat(after, number=number, repeat=3))
+            new_logger.setLevel(logging.DEBUG)
+            enabled = min(timeit.repeat(after, number=number, repeat=3))
+        finally:
+            client_logger.logger = saved
+            listener.stop()
+
+    parse_only = min(timeit.repeat(response.json, number=number, repeat=3))
+    _report("before (DEBUG, pretty body)", baseline, number)
+    _report("after, DEBUG off", disabled, number, baseline)
+    _report("after, DEBUG on (truncated)", enabled, number, baseline)
+    _report("parse only (reference)", parse_only, number)
+
+
+def _json_response(body):
+    """A requests.Response holding `body` the way E*TRADE returns it"""
+    response = requests.Response()
+    response.status_code = 200
+    response.headers["Content-Type"] = "application/json"
+    response._content = body.encode()
+    return response
+
+
+def _recorded_bodies(paths):
+    """Returns (label, body) pairs read from files holding recorded response bodies"""
+    bodies = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            bodies.append((os.path.basename(path), f.read()))
+    return bodies
+
+
+def bench_response_parsing(number=20, paths=()):
+    """
+    Per-call decode cost: the original double parse, response.json() and each installed decoder backend.
+    :param paths: Files holding recorded response bodies; synthetic option chain and portfolio bodies by default
+    """
+    bodies = _recorded_bodies(paths) or [("synthetic option chain", option_chain_body()),
+                                         ("synthetic portfolio", portfolio_body())]
+    for label, body in bodies:
+        response = _json_response(body)
+        print("\n--- Response decoding: %s (%.0f KB) ---" % (label, len(body) / 1e3))
+
+        def double_parse():
+            # Original handlers: json.loads(response.text) for the log line, then response.json()
+            json.loads(response.text)
+            response.json()
+
+        baseline = min(timeit.repeat(double_parse, number=number, repeat=3))
+        _report("json.loads(text) + .json()", baseline, number)
+        _report("response.json()", min(timeit.repeat(response.json, number=number, repeat=3)), number, baseline)
+        for name in response_parser.BACKENDS:
+            backend, decode = response_parser.get_decoder(name)
+            if backend != name:
+                print(f"   {'parse_json (' + name + ')':<28} not installed")
+                continue
+            seconds = min(timeit.repeat(lambda: decode(response.content), number=number, repeat=3))
+            _report("parse_json (" + name + ")", seconds, number, baseline)
+
+
+def _allocated(build):
+    """Returns (result, bytes still allocated) of calling build()"""
+    tracemalloc.start()
+    try:
+        result = build()
+        return result, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_option_records(pairs=5000, number=20):
+    """Memory and field access of 10k option contracts: decoded dicts vs OptionChain records"""
+    body = option_chain_body(pairs)
+    print("\n--- Option chain records (%d contracts) ---" % (pairs * 2))
+
+    raw, dict_bytes = _allocated(lambda: json.loads(body)["OptionChainResponse"])
+    chain, record_bytes = _allocated(lambda: OptionChain.from_api(json.loads(body)["OptionChainResponse"]))
+    print(f"   {'dicts (json.loads)':<28} {dict_bytes / 1e6:8.2f} MB")
+    print(f"   {'OptionChain records':<28} {record_bytes / 1e6:8.2f} MB   ({dict_bytes / record_bytes:.1f}x smaller)")
+
+    def dict_rows():
+        # What _print_option_row did per contract
+        for pair in raw["OptionPair"]:
+            for option in (pair.get("Call"), pair.get("Put")):
+                if option:
+                    option.get("strikePrice", 0), option.get("bid", 0), option.get("ask", 0)
+                    greeks = option.get("OptionGreeks", {})
+                    greeks.get("iv", 0), greeks.get("delta", 0), greeks.get("theta", 0)
+
+    def record_rows():
+        for call, put in chain.pairs:
+            for option in (call, put):
+                if option is not None:
+                    option.strike_price, option.bid, option.ask
+                    greeks = option.greeks
+                    greeks.iv, greeks.delta, greeks.theta
+
+    baseline = min(timeit.repeat(dict_rows, number=number, repeat=3))
+    _report("row fields, dicts", baseline / (pairs * 2), number)
+    _report("row fields, records", min(timeit.repeat(record_rows, number=number, repeat=3)) / (pairs * 2), number,
+            baseline / (pairs * 2))
+    decode = min(timeit.repeat(lambda: OptionChain.from_api(raw), number=3, repeat=3))
+    _report("OptionChain.from_api", decode / (pairs * 2), 3)
+
+
+def bench_chain_screening(pairs=5000, number=20):
+    """Screening 10k contracts: a Python loop over OptionPair dicts vs ChainColumns array filters"""
+    raw = json.loads(option_chain_body(pairs))["OptionChainResponse"]
+    raw["nearPrice"] = pairs / 2
+    print("\n--- Option chain screening (%d contracts) ---" % (pairs * 2))
+
+    def loop():
+        near = raw["nearPrice"]
+        matches = []
+        for pair in raw["OptionPair"]:
+            for option in (pair.get("Call"), pair.get("Put")):
+                if not option:
+                    continue
+                bid, ask = option.get("bid"), option.get("ask")
+                if (0.9 <= option.get("strikePrice", 0) / near <= 1.1 and option.get("openInterest", 0) >= 100
+                        and bid is not None and ask is not None and ask - bid <= 0.1 * (ask + bid) / 2):
+                    matches.append(option)
+        return matches
+
+    columns = OptionChain.from_api(raw).columns()
+    screen = lambda: columns.screen(moneyness=(0.9, 1.1), min_open_interest=100, max_spread_pct=0.1)
+    assert len(loop()) == len(screen())
+
+    baseline = min(timeit.repeat(loop, number=number, repeat=3))
+    _report("loop over OptionPair dicts", baseline, number)
+    _report("ChainColumns.screen", min(timeit.repeat(screen, number=number, repeat=3)), number, baseline)
+    build = min(timeit.repeat(lambda: OptionChain.from_api(raw).columns(), number=3, repeat=3))
+    _report("build records + columns", build, 3)
+
+
+def _scalar_black_scholes(spot, strike, years, vol, rate, is_call):
+    """Per-contract Black-Scholes with the math module, the baseline for the vectorized version"""
+    sqrt_t = math.sqrt(years)
+    d1 = (math.log(spot / strike) + (rate + 0.5 * vol * vol) * years) / (vol * sqrt_t)
+    d2 = d1 - vol * sqrt_t
+    cdf = lambda x: 0.5 * math.erfc(-x / math.sqrt(2))
+    pdf_d1 = math.exp(-0.5 * d1 * d1) / math.sqrt(2 * math.pi)
+    sign = 1.0 if is_call else -1.0
+    discount = math.exp(-rate * years)
+    price = sign * (spot * cdf(sign * d1) - strike * discount * cdf(sign * d2))
+    delta = sign * cdf(sign * d1)
+    gamma = pdf_d1 / (spot * vol * sqrt_t)
+    vega = spot * pdf_d1 * sqrt_t / 100
+    theta = (-spot * pdf_d1 * vol / (2 * sqrt_t) - sign * rate * strike * discount * cdf(sign * d2)) / 365
+    rho = sign * strike * years * discount * cdf(sign * d2) / 100
+    return price, delta, gamma, theta, vega, rho
+
+
+def bench_option_pricing(contracts=10000, number=5):
+    """Pricing, greeks and implied volatility for a 10k-contract batch"""
+    print("\n--- Option pricing (%d contracts) ---" % contracts)
+    rng = np.random.default_rng(7)
+    strike = rng.uniform(50, 150, contracts)
+    years = rng.uniform(0.02, 2.0, contracts)
+    vol = rng.uniform(0.1, 0.8, contracts)
+    is_call = rng.random(contracts) < 0.5
+    spot, rate = 100.0, 0.04
+    rows = list(zip(strike.tolist(), years.tolist(), vol.tolist(), is_call.tolist()))
+
+    def scalar():
+        return [_scalar_black_scholes(spot, k, t, v, rate, c) for k, t, v, c in rows]
+
+    def vectorized():
+        return option_pricing.black_scholes(spot, strike, years, vol, rate, 0.0, is_call)
+
+    expected = np.array([row[0] for row in scalar()])
+    assert np.allclose(vectorized()["price"], expected, atol=1e-5)
+    baseline = min(timeit.repeat(scalar, number=number, repeat=3))
+    _report("price + greeks, math loop", baseline, number)
+    _report("black_scholes (vectorized)", min(timeit.repeat(vectorized, number=number, repeat=3)), number, baseline)
+
+    priced = vectorized()
+    prices = priced["price"]
+    solve = lambda: option_pricing.implied_volatility(prices, spot, strike, years, rate, 0.0, is_call)
+    solved = solve()
+    # Volatility is only identifiable where the price moves by more than the solver's tolerance
+    sensitive = ~np.isnan(solved) & (priced["vega"] > 1e-3)
+    print("   implied vol solved for %d/%d, max error %.1e where vega > 0.001"
+          % ((~np.isnan(solved)).sum(), contracts, np.abs(solved - vol)[sensitive].max()))
+    _report("implied_volatility", min(timeit.repeat(solve, number=number, repeat=3)), number)
+
+
+def main():
+    print("--- E*TRADE client micro-benchmarks ---")
+    bench_oauth_signing()
+    bench_response_logging()
+    bench_response_parsing(paths=sys.argv[1:])
+    bench_option_records()
+    bench_chain_screening()
+    bench_option_pricing()
+
+
+if __name__ == "__main__":
+    main()
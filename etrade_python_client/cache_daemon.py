@@ -0,0 +1,383 @@
+"""
+Cache service shared by the MCP server processes on one machine.
+
+Start it once per machine and set SHARED_CACHE=true in config.ini:
+
+    python cache_daemon.py [socket path]
+    python cache_daemon.py stats [socket path]
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+from app_config import BASE_DIR, load_config
+from client_logger import logger
+from ttl_cache import TTLCache
+
+DEFAULT_SOCKET_PATH = os.path.join(BASE_DIR, "cache_daemon.sock")
+# Largest message (one JSON line) accepted on the socket, e.g. a big option chain
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+
+
+class CacheDaemon:
+    """
+    Local cache service reached over a Unix socket.
+
+    Entries are stored with the TTL their writer computed and handed out
+    with the time they have left, so a process caching a shared entry
+    expires it at the same moment as the process that fetched it. A miss
+    grants the requesting process a lease on the key; other processes
+    asking for the key meanwhile wait for the leaseholder's put (or until
+    the lease expires) instead of calling E*TRADE themselves.
+
+    Requests are JSON lines with an "id"; each is handled concurrently, so
+    a request waiting on a lease does not hold up the others on its connection.
+    """
+
+    def __init__(self, path=DEFAULT_SOCKET_PATH, max_entries=50000, lease_timeout=5.0, clock=time.monotonic):
+        """
+        :param path: Unix socket path to listen on
+        :param max_entries: Maximum number of cached entries
+        :param lease_timeout: Seconds other processes wait for a leaseholder's put
+        :param clock: Monotonic time source
+        """
+        self.path = path
+        self.cache = TTLCache(max_entries, clock=clock)
+        self.lease_timeout = lease_timeout
+        self.clock = clock
+        self._leases = {}
+        self._server = None
+
+        self.clients = 0
+        self.puts = 0
+        self.lease_waits = 0
+        self.lease_hits = 0
+
+    @classmethod
+    def from_config(cls, config, path=None):
+        """Builds the daemon from SHARED_CACHE_* settings in the DEFAULT section of config.ini"""
+        return cls(path or config.get("DEFAULT", "SHARED_CACHE_SOCKET", fallback="") or DEFAULT_SOCKET_PATH,
+                   max_entries=config.getint("DEFAULT", "SHARED_CACHE_SIZE", fallback=50000),
+                   lease_timeout=config.getfloat("DEFAULT", "SHARED_CACHE_LEASE_TIMEOUT", fallback=5.0))
+
+    def _lookup(self, key):
+        """Returns [value, seconds left] for a fresh entry, or None"""
+        cached = self.cache.get(key)
+        if cached is None:
+            return None
+        value, expires_at = cached[0]
+        return [value, expires_at - self.clock()]
+
+    async def get(self, key, wait):
+        """
+        Looks up an entry. On a miss the caller gets the key's lease, unless
+        another caller holds it, in which case this waits up to `wait` seconds
+        for that caller's put.
+        """
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry
+        now = self.clock()
+        lease = self._leases.get(key)
+        if lease is None or lease[0] <= now:
+            self._leases[key] = (now + self.lease_timeout, asyncio.get_running_loop().create_future())
+            return None
+        self.lease_waits += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(lease[1]), min(wait, lease[0] - now))
+        except asyncio.TimeoutError:
+            return None
+        entry = self._lookup(key)
+        if entry is not None:
+            self.lease_hits += 1
+        return entry
+
+    def put(self, key, value, ttl):
+        """Stores an entry for `ttl` seconds and wakes callers waiting on its lease"""
+        self.cache.put(key, (value, self.clock() + ttl), ttl)
+        self.puts += 1
+        self.release(key)
+
+    def release(self, key):
+        """Gives up a key's lease without storing a value, e.g. after a failed fetch"""
+        lease = self._leases.pop(key, None)
+        if lease is not None and not lease[1].done():
+            lease[1].set_result(None)
+
+    def stats(self):
+        """Returns cache counters, lease activity and the number of connected clients"""
+        return dict(self.cache.stats(), clients=self.clients, puts=self.puts, leases=len(self._leases),
+                    lease_waits=self.lease_waits, lease_hits=self.lease_hits)
+
+    async def _dispatch(self, request):
+        op = request.get("op")
+        if op == "get":
+            wait = float(request.get("wait", self.lease_timeout))
+            return {"entries": list(await asyncio.gather(*[self.get(key, wait) for key in request["keys"]]))}
+        if op == "put":
+            for key, value, ttl in request["entries"]:
+                self.put(key, value, ttl)
+            return {}
+        if op == "release":
+            for key in request["keys"]:
+                self.release(key)
+            return {}
+        if op == "stats":
+            return {"stats": self.stats()}
+        return {"error": "Unknown operation %r" % op}
+
+    async def _respond(self, request, writer):
+        try:
+            response = await self._dispatch(request)
+        except Exception as e:
+            logger.error("Cache daemon request failed: %s", e)
+            response = {"error": str(e)}
+        response["id"] = request.get("id")
+        writer.write(json.dumps(response).encode() + b"\n")
+
+    async def _handle(self, reader, writer):
+        self.clients += 1
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.ensure_future(self._respond(json.loads(line), writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (ConnectionError, ValueError) as e:
+            logger.debug("Cache daemon client disconnected: %s", e)
+        finally:
+            self.clients -= 1
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def start(self):
+        """Listens on the socket, which only the current user may connect to"""
+        self._server = await asyncio.start_unix_server(self._handle, self.path, limit=MAX_MESSAGE_SIZE)
+        os.chmod(self.path, 0o600)
+        logger.info("Cache daemon listening on %s", self.path)
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+
+class SharedCache:
+    """
+    Client of a CacheDaemon, used by QuoteCache, OptionChainCache and the
+    account list as a second tier behind their in-process cache.
+
+    Keys are tuples, prefixed with `namespace` (e.g. the consumer key and
+    API base URL) so processes using other credentials or environments do
+    not share entries. While the daemon is unreachable every operation
+    behaves like a miss and reconnection is retried every `retry_interval`
+    seconds, so a missing daemon never fails a tool call.
+    """
+
+    def __init__(self, path=DEFAULT_SOCKET_PATH, namespace="", timeout=0.5, lease_wait=5.0, retry_interval=5.0,
+                 clock=time.monotonic):
+        """
+        :param path: Unix socket path of the CacheDaemon
+        :param namespace: Prefix isolating this process's credentials and environment
+        :param timeout: Seconds to wait for the daemon, not counting lease waits
+        :param lease_wait: Seconds to wait for another process fetching the same key
+        :param retry_interval: Seconds between reconnection attempts
+        :param clock: Monotonic time source
+        """
+        self.path = path
+        self.namespace = namespace
+        self.timeout = timeout
+        self.lease_wait = lease_wait
+        self.retry_interval = retry_interval
+        self.clock = clock
+        self._writer = None
+        self._reader_task = None
+        self._connect_lock = None
+        self._pending = {}
+        self._next_id = 0
+        self._retry_at = 0.0
+
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @classmethod
+    def from_config(cls, config, namespace=""):
+        """
+        Builds the client from SHARED_CACHE_* settings in the DEFAULT section of config.ini.
+        :return: SharedCache, or None when SHARED_CACHE is off
+        """
+        if not config.getboolean("DEFAULT", "SHARED_CACHE", fallback=False):
+            return None
+        return cls(config.get("DEFAULT", "SHARED_CACHE_SOCKET", fallback="") or DEFAULT_SOCKET_PATH,
+                   namespace=namespace,
+                   timeout=config.getfloat("DEFAULT", "SHARED_CACHE_TIMEOUT", fallback=0.5),
+                   lease_wait=config.getfloat("DEFAULT", "SHARED_CACHE_LEASE_TIMEOUT", fallback=5.0))
+
+    def _key(self, key):
+        return json.dumps([self.namespace] + list(key))
+
+    async def _connect(self):
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._writer is not None:
+                return True
+            if self.clock() < self._retry_at:
+                return False
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_unix_connection(self.path, limit=MAX_MESSAGE_SIZE), self.timeout)
+            except (OSError, asyncio.TimeoutError) as e:
+                self.errors += 1
+                self._retry_at = self.clock() + self.retry_interval
+                logger.debug("Shared cache unavailable at %s: %s", self.path, e)
+                return False
+            self._writer = writer
+            self._reader_task = asyncio.ensure_future(self._read_responses(reader, writer))
+            return True
+
+    async def _read_responses(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._pending.get(response.get("id"))
+                if future is not None and not future.done():
+                    future.set_result(response)
+        except (ConnectionError, ValueError) as e:
+            logger.debug("Shared cache connection lost: %s", e)
+        finally:
+            self._disconnect(writer)
+
+    def _disconnect(self, writer):
+        if self._writer is not writer:
+            return
+        self._writer = None
+        self._retry_at = self.clock() + self.retry_interval
+        writer.close()
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("Shared cache connection closed"))
+
+    async def _call(self, op, timeout, **fields):
+        """Sends a request to the daemon; returns its response, or None if the daemon is unavailable"""
+        if self._writer is None and not await self._connect():
+            return None
+        self._next_id += 1
+        request_id = self._next_id
+        future = self._pending[request_id] = asyncio.get_running_loop().create_future()
+        try:
+            self._writer.write(json.dumps(dict(fields, op=op, id=request_id)).encode() + b"\n")
+            response = await asyncio.wait_for(future, timeout)
+        except (OSError, asyncio.TimeoutError, TypeError, ValueError) as e:
+            self.errors += 1
+            logger.debug("Shared cache %s failed: %s", op, e)
+            return None
+        finally:
+            self._pending.pop(request_id, None)
+        if "error" in response:
+            self.errors += 1
+            logger.warning("Shared cache %s failed: %s", op, response["error"])
+            return None
+        return response
+
+    async def get_many(self, keys):
+        """
+        Looks up several keys. Misses are leased to this process until it
+        puts or releases them.
+        :return: List with [value, seconds left] or None per key
+        """
+        response = await self._call("get", self.timeout + self.lease_wait,
+                                    keys=[self._key(key) for key in keys], wait=self.lease_wait)
+        entries = response["entries"] if response is not None else [None] * len(keys)
+        found = sum(entry is not None for entry in entries)
+        self.hits += found
+        self.misses += len(keys) - found
+        return entries
+
+    async def get(self, key):
+        """:return: [value, seconds left] or None"""
+        return (await self.get_many([key]))[0]
+
+    async def put_many(self, entries):
+        """:param entries: (key, value, ttl) tuples"""
+        if entries:
+            await self._call("put", self.timeout,
+                             entries=[(self._key(key), value, ttl) for key, value, ttl in entries])
+
+    async def put(self, key, value, ttl):
+        await self.put_many([(key, value, ttl)])
+
+    async def release(self, keys):
+        """Gives up leases on keys this process could not fetch"""
+        if keys:
+            await self._call("release", self.timeout, keys=[self._key(key) for key in keys])
+
+    async def daemon_stats(self):
+        """Returns the daemon's counters, or None if it is unavailable"""
+        response = await self._call("stats", self.timeout)
+        return response["stats"] if response is not None else None
+
+    def stats(self):
+        """Returns this process's hit/miss counters and connection state"""
+        lookups = self.hits + self.misses
+        return {"path": self.path,
+                "connected": self._writer is not None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errors,
+                "hit_ratio": self.hits / lookups if lookups else 0.0}
+
+
+async def _print_stats(path):
+    client = SharedCache(path)
+    stats = await client.daemon_stats()
+    if stats is None:
+        print("Cache daemon is not running at " + path)
+        return 1
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+async def _already_running(path):
+    try:
+        _, writer = await asyncio.open_unix_connection(path)
+    except OSError:
+        return False
+    writer.close()
+    return True
+
+
+async def _serve(path):
+    if await _already_running(path):
+        print("Cache daemon is already running at " + path)
+        return 1
+    daemon = CacheDaemon.from_config(load_config(), path)
+    print("Cache daemon listening on " + daemon.path)
+    await daemon.serve_forever()
+    return 0
+
+
+def main():
+    args = sys.argv[1:]
+    run = _print_stats if args and args[0] == "stats" else _serve
+    if run is _print_stats:
+        args = args[1:]
+    path = args[0] if args else load_config().get("DEFAULT", "SHARED_CACHE_SOCKET", fallback="") or DEFAULT_SOCKET_PATH
+    try:
+        sys.exit(asyncio.run(run(path)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,64 @@
+import atexit
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from app_config import load_config
+
+LOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "python_client.log")
+
+# Share of response bodies logged at DEBUG level, and characters kept per body
+body_sample_rate = 1.0
+body_max_chars = 2000
+
 
 def setup_logger():
+    global body_sample_rate, body_max_chars
     logger = logging.getLogger('my_logger')
     # If handlers already exist, don't add them again to avoid duplication
     if logger.handlers:
         return logger
-        
-    logger.setLevel(logging.DEBUG)
-    
-    # Use absolute path for log file
-    log_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "python_client.log")
-    
-    handler = RotatingFileHandler(log_file, maxBytes=5*1024*1024, backupCount=3)
+
+    config = load_config()
+    logger.setLevel(config.get("DEFAULT", "LOG_LEVEL", fallback="INFO").upper())
+    body_sample_rate = config.getfloat("DEFAULT", "LOG_BODY_SAMPLE_RATE", fallback=1.0)
+    body_max_chars = config.getint("DEFAULT", "LOG_BODY_MAX_CHARS", fallback=2000)
+
+    handler = RotatingFileHandler(LOG_FILE, maxBytes=5*1024*1024, backupCount=3)
     FORMAT = "%(asctime)-15s %(message)s"
     fmt = logging.Formatter(FORMAT, datefmt='%m/%d/%Y %I:%M:%S %p')
     handler.setFormatter(fmt)
-    logger.addHandler(handler)
+
+    # Records are written to the file by a background thread, so request
+    # threads and the event loop never wait on disk I/O
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, handler)
+    listener.start()
+    atexit.register(listener.stop)
     return logger
 
+
+def log_response_body(response, label="Response Body"):
+    """
+    Logs a response body at DEBUG level, sampled and truncated.
+    The body is not read or formatted unless DEBUG is enabled and the response is sampled.
+    :param response: requests or httpx response, or None
+    :param label: Prefix of the log line
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    if body_sample_rate < 1.0 and random.random() >= body_sample_rate:
+        return
+    if response is None:
+        logger.debug("%s: None", label)
+        return
+    body = response.text
+    if len(body) > body_max_chars:
+        body = "%s... (%d more characters)" % (body[:body_max_chars], len(body) - body_max_chars)
+    logger.debug("%s: %s", label, body)
+
+
 logger = setup_logger()
@@ -1,14 +1,77 @@
+import time
+# Measured from here so startup stats include loading FastMCP itself
+_import_started = time.perf_counter()
+
+import asyncio
+from contextlib import asynccontextmanager
 from fastmcp import FastMCP
-from etrade_python_client import get_session
-from accounts.accounts import Accounts
-from market.market import Market
+from fastmcp.server.dependencies import get_context
+from etrade_python_client import get_async_session, load_tokens, TOKEN_FILE, config, rate_limiter, resilience, http_transport
+from client_logger import logger
+from accounts.async_accounts import AsyncAccounts
+from market.async_market import AsyncMarket
+import threading
+from datetime import datetime
+from request_scheduler import RequestScheduler
+from token_manager import TokenManager, issued_at
+from market.quote_batcher import QuoteBatcher
+from market.quote_cache import QuoteCache
+from market.chain_cache import OptionChainCache
+from market.market_calendar import MarketCalendar, DEFAULT_HOLIDAYS_FILE
+from ttl_cache import TTLCache
+from cache_daemon import SharedCache
+# The order modules are only needed by the order tools and are imported on first use
+
+@asynccontextmanager
+async def _lifespan(server):
+    """Records the server's event loop and starts the optional background warm-up once it is running"""
+    global server_loop
+    server_loop = asyncio.get_running_loop()
+    task = None
+    if config.getboolean("DEFAULT", "WARMUP_ON_START", fallback=False):
+        task = asyncio.get_running_loop().create_task(_warm_up())
+    try:
+        yield
+    finally:
+        if task is not None:
+            task.cancel()
 
 # Initialize FastMCP server
-mcp = FastMCP("E*TRADE")
+mcp = FastMCP("E*TRADE", lifespan=_lifespan)
 
 # Global instances
 accounts_client = None
 market_client = None
+order_client = None
+order_sync = None
+order_books = {}
+quote_batcher = None
+quote_cache = None
+chain_cache = None
+token_manager = None
+# Event loop running the async tools; set by _lifespan
+server_loop = None
+account_list_cache = TTLCache(max_entries=1)
+# Optional second cache tier shared with other server processes (cache_daemon.py)
+shared_cache = None
+# Seconds spent importing, authenticating and warming up; see get_startup_stats
+startup_stats = {"import_seconds": None, "client_init_seconds": None, "ready_seconds": None,
+                 "warmup": {"state": "disabled"}}
+# Guards lazy creation of the globals above: sync tools run on FastMCP's
+# worker threads while async tools run on the event loop
+_init_lock = threading.RLock()
+
+def _mcp_session_id():
+    """Identifies the MCP client session making the current tool call"""
+    return get_context().session_id
+
+# Orders outrank account reads, which outrank quotes and chain scans
+request_scheduler = RequestScheduler(
+    max_concurrency=config.getint("DEFAULT", "MAX_CONCURRENT_REQUESTS", fallback=10),
+    reserved_slots=config.getint("DEFAULT", "ORDER_RESERVED_SLOTS", fallback=2),
+    flow_key=_mcp_session_id)
+
+market_calendar = MarketCalendar(config.get("DEFAULT", "MARKET_HOLIDAYS_FILE", fallback=DEFAULT_HOLIDAYS_FILE))
 
 def get_clients():
     """
@@ -16,27 +79,198 @@ def get_clients():
     This ensures that the server can start even if credentials aren't ready,
     but tools will fail gracefully if authentication is missing.
     """
-    global accounts_client, market_client
     if accounts_client is None or market_client is None:
-        try:
-            session, base_url = get_session(headless=True)
-            accounts_client = Accounts(session, base_url)
-            market_client = Market(session, base_url)
-        except Exception as e:
-            raise RuntimeError(f"Authentication failed: {e}")
+        with _init_lock:
+            if accounts_client is None or market_client is None:
+                _init_clients()
+    # The token manager renews the token and picks up tokens saved by the
+    # CLI in the background on the event loop; sync tools call this from
+    # worker threads, so the token state is only read here to fail fast
+    token_manager.start(server_loop)
+    if token_manager.is_expired():
+        raise RuntimeError(str(token_manager.expired_error()))
     return accounts_client, market_client
 
+def _init_clients():
+    """Authenticates once and creates the shared clients; called with _init_lock held"""
+    global accounts_client, market_client, token_manager, shared_cache
+    started = time.perf_counter()
+    try:
+        session, base_url = get_async_session(scheduler=request_scheduler)
+        token_manager = TokenManager(
+            session, issued_at(load_tokens() or {}), token_loader=load_tokens,
+            token_file=TOKEN_FILE, on_swap=_on_tokens_swapped,
+            watch_interval=config.getfloat("DEFAULT", "TOKEN_WATCH_INTERVAL", fallback=2.0),
+            renew_margin=config.getfloat("DEFAULT", "TOKEN_RENEW_MARGIN", fallback=600.0),
+            check_interval=config.getfloat("DEFAULT", "TOKEN_CHECK_INTERVAL", fallback=60.0))
+        shared_cache = SharedCache.from_config(config, _shared_namespace(session, base_url))
+        market_client = AsyncMarket(session, base_url)
+        # Assigned last: other threads check it without taking the lock
+        accounts_client = AsyncAccounts(session, base_url)
+    except Exception as e:
+        raise RuntimeError(f"Authentication failed: {e}")
+    startup_stats["client_init_seconds"] = round(time.perf_counter() - started, 4)
+
+def _shared_namespace(session, base_url):
+    """Shared cache entries are only visible to processes using the same consumer key and environment"""
+    return session.consumer_key + "@" + base_url
+
+def _on_tokens_swapped(tokens):
+    """Points the clients at the environment (sandbox or live) the new tokens were issued for"""
+    base_url = tokens.get("base_url")
+    if base_url is None or base_url == market_client.base_url:
+        return
+    for client in (accounts_client, market_client, order_client):
+        if client is not None:
+            client.base_url = base_url
+    # Cached data and synced orders belong to the previous environment
+    for cache in (quote_cache, chain_cache):
+        if cache is not None:
+            cache.cache.clear()
+    account_list_cache.clear()
+    if shared_cache is not None:
+        shared_cache.namespace = _shared_namespace(market_client.session, base_url)
+    order_books.clear()
+
+def get_order_client():
+    """
+    Returns the shared order client, initializing clients on first use.
+    """
+    global order_client
+    accts, _ = get_clients()
+    if order_client is None:
+        with _init_lock:
+            if order_client is None:
+                from order.async_order import AsyncOrder
+                order_client = AsyncOrder(accts.session, accts.base_url)
+    return order_client
+
+def get_order_sync():
+    """
+    Returns the shared incremental order history sync engine, creating it on first use.
+    """
+    global order_sync
+    orders = get_order_client()
+    with _init_lock:
+        if order_sync is None:
+            from order.order_sync import OrderSync, DEFAULT_STORE_DIR
+            order_sync = OrderSync(orders, config.get("DEFAULT", "ORDER_STORE_DIR", fallback=DEFAULT_STORE_DIR),
+                                   on_order=lambda account_id_key, order: get_order_book(account_id_key).upsert(order))
+    return order_sync
+
+def get_order_book(account_id_key):
+    """
+    Returns the in-memory order index for an account.
+    It is seeded from the local order store and kept current by order fetches.
+    Stored orders whose last known status was pending (e.g. OPEN) are left
+    out until get_orders or sync_order_history fetches them again, since they
+    may have filled or been cancelled since. The first call reads the store
+    file; async tools use load_order_book instead.
+    """
+    book = order_books.get(account_id_key)
+    if book is None:
+        sync = get_order_sync()
+        with _init_lock:
+            book = order_books.get(account_id_key)
+            if book is None:
+                from order.order_book import OrderBook
+                from order.order_sync import PENDING_STATUSES, order_status
+                book = order_books[account_id_key] = OrderBook(
+                    order for order in sync.store(account_id_key).orders.values()
+                    if order_status(order) not in PENDING_STATUSES)
+    return book
+
+async def load_order_book(account_id_key):
+    """Returns the order index for an account, reading the order store on a worker thread on first use"""
+    book = order_books.get(account_id_key)
+    if book is None:
+        book = await asyncio.to_thread(get_order_book, account_id_key)
+    return book
+
+def _epoch_ms(value):
+    """Converts an ISO date/time string to epoch milliseconds"""
+    if value is None:
+        return None
+    return int(datetime.fromisoformat(value).timestamp() * 1000)
+
+def get_quote_batcher():
+    """
+    Returns the shared quote batcher, creating it on first use.
+    Concurrent get_quote calls are coalesced into batched quote requests.
+    """
+    global quote_batcher
+    _, mkt = get_clients()
+    with _init_lock:
+        if quote_batcher is None:
+            quote_batcher = QuoteBatcher(
+                mkt,
+                window=config.getfloat("DEFAULT", "QUOTE_BATCH_WINDOW", fallback=0.01),
+                override_symbol_count=config.getboolean("DEFAULT", "QUOTE_OVERRIDE_SYMBOL_COUNT", fallback=False))
+    return quote_batcher
+
+def get_quote_cache():
+    """
+    Returns the shared quote cache, creating it on first use.
+    Cache misses go through the quote batcher.
+    """
+    global quote_cache
+    batcher = get_quote_batcher()
+    with _init_lock:
+        if quote_cache is None:
+            quote_cache = QuoteCache(
+                batcher,
+                max_entries=config.getint("DEFAULT", "QUOTE_CACHE_SIZE", fallback=10000),
+                stale_ttl=config.getfloat("DEFAULT", "QUOTE_CACHE_STALE_TTL", fallback=60.0),
+                calendar=market_calendar,
+                serve_stale_on_error=config.getboolean("DEFAULT", "SERVE_STALE_ON_ERROR", fallback=True),
+                shared=shared_cache)
+    return quote_cache
+
+def get_chain_cache():
+    """
+    Returns the shared option chain / expiration date cache, creating it on first use.
+    """
+    global chain_cache
+    _, mkt = get_clients()
+    with _init_lock:
+        if chain_cache is None:
+            chain_cache = OptionChainCache(
+                mkt,
+                chain_ttl=config.getfloat("DEFAULT", "OPTION_CHAIN_CACHE_TTL", fallback=30.0),
+                calendar=market_calendar,
+                serve_stale_on_error=config.getboolean("DEFAULT", "SERVE_STALE_ON_ERROR", fallback=True),
+                shared=shared_cache)
+    return chain_cache
+
 @mcp.tool()
-def list_accounts() -> list:
+async def list_accounts() -> list:
     """
     List all available brokerage accounts.
     Returns a list of account dictionaries containing details like accountId, accountDesc, etc.
     """
     accts, _ = get_clients()
-    return accts.fetch_account_list()
+    cached = account_list_cache.get("accounts")
+    if cached is not None:
+        return cached[0]
+    ttl = config.getfloat("DEFAULT", "ACCOUNT_LIST_CACHE_TTL", fallback=300.0)
+    if shared_cache is not None:
+        entry = await shared_cache.get(("accounts",))
+        if entry is not None:
+            account_list_cache.put("accounts", entry[0], entry[1])
+            return entry[0]
+    try:
+        accounts = await accts.fetch_account_list()
+    except BaseException:
+        if shared_cache is not None:
+            await shared_cache.release([("accounts",)])
+        raise
+    account_list_cache.put("accounts", accounts, ttl)
+    if shared_cache is not None:
+        await shared_cache.put(("accounts",), accounts, ttl)
+    return accounts
 
 @mcp.tool()
-def get_portfolio(account_id_key: str) -> dict:
+async def get_portfolio(account_id_key: str) -> dict:
     """
     Get the portfolio positions for a specific account.
     Args:
@@ -45,10 +279,10 @@ def get_portfolio(account_id_key: str) -> dict:
         A dictionary containing the portfolio data.
     """
     accts, _ = get_clients()
-    return accts.fetch_portfolio(account_id_key)
+    return await accts.fetch_portfolio(account_id_key)
 
 @mcp.tool()
-def get_balance(account_id_key: str) -> dict:
+async def get_balance(account_id_key: str) -> dict:
     """
     Get the balance details for a specific account.
     Args:
@@ -57,22 +291,107 @@ def get_balance(account_id_key: str) -> dict:
         A dictionary containing balance information.
     """
     accts, _ = get_clients()
-    return accts.fetch_balance(account_id_key)
+    return await accts.fetch_balance(account_id_key)
 
 @mcp.tool()
-def get_quote(symbols: list[str]) -> list:
+async def get_orders(account_id_key: str, statuses: list[str] = None) -> dict:
+    """
+    Get orders for a specific account, grouped by status.
+    All statuses are fetched concurrently.
+    Args:
+        account_id_key: The unique key for the account.
+        statuses: Optional list of statuses. Any of: "OPEN", "EXECUTED", "INDIVIDUAL_FILLS",
+                  "CANCELLED", "REJECTED", "EXPIRED". If omitted, all statuses are returned.
+    Returns:
+        A dictionary with "orders" (status -> list of orders) and "errors" (status -> message).
+    """
+    result = await get_order_client().fetch_orders_by_status(account_id_key, statuses)
+    book = await load_order_book(account_id_key)
+    for order in result.all_orders():
+        book.upsert(order)
+    return result.to_dict()
+
+@mcp.tool()
+async def sync_order_history(account_id_key: str) -> dict:
+    """
+    Incrementally sync an account's order history into the local order store.
+    Only orders placed since the last sync and currently open orders are downloaded.
+    Args:
+        account_id_key: The unique key for the account.
+    Returns:
+        A dictionary with the new and changed order ids and the number of stored orders.
+    """
+    # Loads the store off the event loop before the sync merges into it
+    book = await load_order_book(account_id_key)
+    sync = get_order_sync()
+    result = await sync.sync_async(account_id_key)
+    # Every pending order was fetched again, so the stored statuses of those
+    # still pending are current (changed orders were already indexed)
+    store = sync.store(account_id_key)
+    unlisted = set(result.unlisted)
+    for key in store.pending_ids():
+        order = store.orders[key]
+        if order["orderId"] not in unlisted:
+            book.upsert(order)
+    return result.to_dict()
+
+@mcp.tool()
+def find_orders(account_id_key: str, symbol: str = None, status: str = None,
+                placed_from: str = None, placed_to: str = None) -> list:
+    """
+    Search an account's orders in the local order index without calling the API.
+    The index is filled by get_orders and sync_order_history; open orders
+    from earlier sessions appear once one of them has fetched them again.
+    Args:
+        account_id_key: The unique key for the account.
+        symbol: Optional symbol filter (e.g., "AAPL").
+        status: Optional status filter (e.g., "OPEN", "EXECUTED", "CANCELLED").
+        placed_from: Optional earliest placed time, ISO format (e.g., "2026-01-31" or "2026-01-31T09:30:00").
+        placed_to: Optional latest placed time, ISO format.
+    Returns:
+        A list of matching orders, most recently placed first.
+    """
+    return get_order_book(account_id_key).find(symbol, status, _epoch_ms(placed_from), _epoch_ms(placed_to))
+
+@mcp.tool()
+def get_order(account_id_key: str, order_id: int) -> dict:
+    """
+    Get a single order from the local order index without calling the API.
+    Args:
+        account_id_key: The unique key for the account.
+        order_id: The order id.
+    Returns:
+        The order dictionary, or an empty dictionary if it is not indexed.
+    """
+    return get_order_book(account_id_key).get(order_id) or {}
+
+@mcp.tool()
+def get_order_book_summary(account_id_key: str) -> dict:
+    """
+    Summarize the local order index for an account without calling the API.
+    Args:
+        account_id_key: The unique key for the account.
+    Returns:
+        A dictionary with the order count, counts per status and traded symbols.
+    """
+    book = get_order_book(account_id_key)
+    return {"orders": len(book), "statuses": book.status_counts(), "symbols": book.symbols()}
+
+@mcp.tool()
+async def get_quote(symbols: list[str], detail_flag: str = None) -> list:
     """
     Get real-time quotes for one or more stock symbols.
     Args:
         symbols: A list of stock symbols (e.g., ["AAPL", "GOOG"]).
+        detail_flag: Optional field set. One of: "ALL", "FUNDAMENTAL", "INTRADAY", "OPTIONS", "WEEK_52", "MF_DETAIL".
+                     If omitted, the API default (same fields as "ALL") is returned.
     Returns:
         A list of quote dictionaries.
     """
-    _, mkt = get_clients()
-    return mkt.fetch_quote(symbols)
+    return [quote.to_dict() for quote in await get_quote_cache().fetch_quote(symbols, detail_flag)]
 
 @mcp.tool()
-def get_option_expire_dates(symbol: str, expiry_type: str = None) -> list:
+async def get_option_expire_dates(symbol: str, expiry_type: str = None) -> list:
     """
     Get option expiration dates for a specific symbol.
     Args:
@@ -82,11 +401,10 @@ def get_option_expire_dates(symbol: str, expiry_type: str = None) -> list:
     Returns:
         A list of expiration date dictionaries.
     """
-    _, mkt = get_clients()
-    return mkt.fetch_option_expire_dates(symbol, expiry_type)
+    return await get_chain_cache().fetch_option_expire_dates(symbol, expiry_type)
 
 @mcp.tool()
-def get_option_chains(symbol: str, expiry_year: int = None, expiry_month: int = None, expiry_day: int = None,
+async def get_option_chains(symbol: str, expiry_year: int = None, expiry_month: int = None, expiry_day: int = None,
                       chain_type: str = "CALLPUT", strike_price_near: float = None, no_of_strikes: int = None,
                       include_weekly: bool = False, skip_adjusted: bool = True, option_category: str = "STANDARD",
                       price_type: str = "ATNM") -> dict:
@@ -107,12 +425,215 @@ def get_option_chains(symbol: str, expiry_year: int = None, expiry_month: int =
     Returns:
         A dictionary containing the option chain response.
     """
-    _, mkt = get_clients()
-    return mkt.fetch_option_chains(
+    chain = await get_chain_cache().fetch_option_chains(
         symbol, expiry_year, expiry_month, expiry_day,
         chain_type, strike_price_near, no_of_strikes,
         include_weekly, skip_adjusted, option_category, price_type
     )
+    return chain.to_dict()
+
+@mcp.tool()
+async def screen_option_chain(symbol: str, expiry_year: int = None, expiry_month: int = None, expiry_day: int = None,
+                              chain_type: str = "CALLPUT", min_moneyness: float = None, max_moneyness: float = None,
+                              min_open_interest: int = None, min_volume: int = None, max_spread: float = None,
+                              max_spread_pct: float = None, include_weekly: bool = False) -> dict:
+    """
+    Screen a full option chain (all strikes) and return only the contracts passing every filter.
+    Args:
+        symbol: The stock symbol (e.g., "AAPL").
+        expiry_year: Expiration year (e.g., 2026).
+        expiry_month: Expiration month (1-12).
+        expiry_day: Expiration day (1-31).
+        chain_type: Type of options to return. One of: "CALLPUT", "CALL", "PUT".
+        min_moneyness: Minimum strike / underlying price (e.g., 0.9).
+        max_moneyness: Maximum strike / underlying price (e.g., 1.1).
+        min_open_interest: Minimum open interest.
+        min_volume: Minimum volume traded today.
+        max_spread: Maximum bid/ask spread in dollars.
+        max_spread_pct: Maximum bid/ask spread as a fraction of the mid price (e.g., 0.1).
+        include_weekly: Whether to include weekly options.
+    Returns:
+        A dictionary with the near price, the expiration and the matching calls and puts.
+    """
+    columns = await get_chain_cache().fetch_option_chains(
+        symbol, expiry_year, expiry_month, expiry_day, chain_type,
+        include_weekly=include_weekly, price_type="ALL", columnar=True
+    )
+    moneyness = None
+    if min_moneyness is not None or max_moneyness is not None:
+        moneyness = (min_moneyness if min_moneyness is not None else 0.0,
+                     max_moneyness if max_moneyness is not None else float("inf"))
+    screened = columns.screen(moneyness=moneyness, min_open_interest=min_open_interest, min_volume=min_volume,
+                              max_spread=max_spread, max_spread_pct=max_spread_pct)
+    return {"nearPrice": columns.near_price, "SelectedED": columns.selected_expiry,
+            "totalContracts": len(columns), "Call": screened.calls.to_dicts(), "Put": screened.puts.to_dicts()}
+
+def _priced_contracts(columns, priced):
+    """Rows of get_option_greeks for one side of a chain; values that could not be computed are None"""
+    names = ("market_price", "iv", "price", "delta", "gamma", "theta", "vega", "rho")
+    keys = ("marketPrice", "iv", "price", "delta", "gamma", "theta", "vega", "rho")
+    columns_list = [priced[name].tolist() for name in names]
+    rows = []
+    for i, contract in enumerate(columns.contracts):
+        row = {"displaySymbol": contract.display_symbol, "osiKey": contract.osi_key,
+               "strikePrice": contract.strike_price}
+        for key, values in zip(keys, columns_list):
+            value = values[i]
+            row[key] = None if value != value else value
+        rows.append(row)
+    return rows
+
+@mcp.tool()
+async def get_option_greeks(symbol: str, expiry_year: int = None, expiry_month: int = None, expiry_day: int = None,
+                            chain_type: str = "CALLPUT", underlying_price: float = None, rate: float = None,
+                            dividend_yield: float = 0.0, include_weekly: bool = False) -> dict:
+    """
+    Compute Black-Scholes prices and Greeks for every strike of an option chain expiration.
+    Implied volatility is solved from each contract's bid/ask mid (or last price) at the current
+    underlying price; prices and Greeks are then computed at `underlying_price`, so what-if prices
+    need no new chain request. Theta is per day, vega and rho per 1% like E*TRADE's Greeks.
+    Args:
+        symbol: The stock symbol (e.g., "AAPL").
+        expiry_year: Expiration year (e.g., 2026).
+        expiry_month: Expiration month (1-12).
+        expiry_day: Expiration day (1-31).
+        chain_type: Type of options to return. One of: "CALLPUT", "CALL", "PUT".
+        underlying_price: What-if underlying price; defaults to the chain's near price.
+        rate: Risk-free rate (e.g., 0.04); defaults to RISK_FREE_RATE in config.ini.
+        dividend_yield: Continuous dividend yield of the underlying (e.g., 0.005).
+        include_weekly: Whether to include weekly options.
+    Returns:
+        A dictionary with the pricing inputs and the priced calls and puts.
+    """
+    from market.option_pricing import price_columns, years_to_expiry
+
+    columns = await get_chain_cache().fetch_option_chains(
+        symbol, expiry_year, expiry_month, expiry_day, chain_type,
+        include_weekly=include_weekly, price_type="ALL", columnar=True
+    )
+    if not columns.selected_expiry:
+        raise Exception("Option chain response has no expiration date")
+    if rate is None:
+        rate = config.getfloat("DEFAULT", "RISK_FREE_RATE", fallback=0.04)
+    years = years_to_expiry(columns.selected_expiry)
+    result = {"nearPrice": columns.near_price,
+              "underlyingPrice": columns.near_price if underlying_price is None else underlying_price,
+              "SelectedED": columns.selected_expiry, "yearsToExpiry": years, "rate": rate,
+              "dividendYield": dividend_yield}
+    for key, side in (("Call", columns.calls), ("Put", columns.puts)):
+        priced = price_columns(side, years, underlying_price, rate, dividend_yield)
+        result[key] = _priced_contracts(side, priced)
+    return result
+
+@mcp.tool()
+def get_cache_stats() -> dict:
+    """
+    Get hit/miss counters for the server's market data caches.
+    Returns:
+        A dictionary of statistics per cache.
+    """
+    stats = {}
+    if quote_cache is not None:
+        stats["quotes"] = quote_cache.stats()
+    if quote_batcher is not None:
+        stats["quote_batcher"] = quote_batcher.stats()
+    if chain_cache is not None:
+        stats["option_chains"] = chain_cache.stats()
+    stats["accounts"] = account_list_cache.stats()
+    if shared_cache is not None:
+        stats["shared"] = shared_cache.stats()
+    if market_client is not None:
+        stats["singleflight"] = market_client.session.singleflight.stats()
+    return stats
+
+@mcp.tool()
+def get_rate_limit_stats() -> dict:
+    """
+    Get client-side rate limiter metrics per API class (market, accounts, orders).
+    Returns:
+        A dictionary with rate, burst, queue depth, rejections and wait times per class.
+        With RATE_LIMIT_SHARED, the budget shared by the processes on this host and what each process consumed.
+    """
+    return rate_limiter.stats()
+
+@mcp.tool()
+def get_token_status() -> dict:
+    """
+    Get the state of the E*TRADE access token (active, expired or revoked), when it expires and when it is next renewed.
+    Returns:
+        A dictionary with the token state, expiry time (midnight ET), idle time and renewal counters.
+    """
+    get_clients()
+    return token_manager.status()
+
+@mcp.tool()
+def get_upstream_health() -> dict:
+    """
+    Get retry counters and circuit breaker state per E*TRADE endpoint.
+    An endpoint whose breaker is "open" fails fast until it recovers; retrying such calls immediately will not help.
+    Returns:
+        A dictionary with total retries and failures, and state, consecutive failures and rejections per endpoint.
+    """
+    return resilience.stats()
+
+@mcp.tool()
+def get_connection_stats() -> dict:
+    """
+    Get HTTP connection pool settings and connection reuse for the sync and async sessions.
+    Returns:
+        A dictionary with the transport settings, and requests, new connections and reuse ratio per session type.
+    """
+    return http_transport.stats()
+
+@mcp.tool()
+def get_scheduler_stats() -> dict:
+    """
+    Get request scheduler metrics per priority class (order_actions, accounts, quotes, chains).
+    Returns:
+        A dictionary with the concurrency cap, running and queued requests and average wait per class.
+    """
+    return request_scheduler.stats()
+
+@mcp.tool()
+def get_startup_stats() -> dict:
+    """
+    Get server startup timings and the state of the background warm-up.
+    Returns:
+        A dictionary with the seconds spent importing, authenticating and warming up, and the warm-up results.
+    """
+    return startup_stats
+
+async def _warm_up():
+    """
+    Authenticates, opens pooled connections to the API and prefetches the
+    account list in the background, so the first tool call does not pay for them.
+    """
+    warmup = startup_stats["warmup"] = {"state": "running", "phases": {}}
+    started = phase_started = time.perf_counter()
+
+    def phase(name):
+        nonlocal phase_started
+        now = time.perf_counter()
+        warmup["phases"][name] = round(now - phase_started, 4)
+        phase_started = now
+
+    try:
+        accts, _ = get_clients()
+        phase("authenticate")
+        warmup["connections_opened"] = await http_transport.warm_up(
+            accts.session.client, accts.base_url, config.getint("DEFAULT", "WARMUP_CONNECTIONS", fallback=2))
+        phase("connect")
+        warmup["accounts_prefetched"] = len(await list_accounts())
+        phase("prefetch_accounts")
+        warmup["state"] = "done"
+    except Exception as e:
+        warmup["state"] = "failed"
+        warmup["error"] = str(e)
+        logger.warning("Startup warm-up failed: %s", e)
+    warmup["seconds"] = round(time.perf_counter() - started, 4)
+    startup_stats["ready_seconds"] = round(time.perf_counter() - _import_started, 4)
+
+startup_stats["import_seconds"] = round(time.perf_counter() - _import_started, 4)
 
 if __name__ == "__main__":
     mcp.run()
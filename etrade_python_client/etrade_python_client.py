@@ -3,25 +3,36 @@ from __future__ import print_function
 import webbrowser
 import json
 import logging
-import configparser
 import sys
 import os
+import tempfile
+from datetime import datetime, timezone
 import requests
 from rauth import OAuth1Service
 from client_logger import logger
-from accounts.accounts import Accounts
-from market.market import Market
+from etrade_session import EtradeOAuth1Session
+from rate_limiter import RateLimiter
+from resilience import Resilience
+from http_transport import HttpTransport
+from oauth_signer import OAuth1Signer
+from session_pool import SessionPool
+from app_config import BASE_DIR, load_config
 
 # loading configuration file
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-config = configparser.ConfigParser()
-config.read(os.path.join(BASE_DIR, 'config.ini'))
+config = load_config()
 
 # logger settings
 # (Managed by client_logger, which is imported)
 
 TOKEN_FILE = os.path.join(BASE_DIR, 'tokens.json')
 
+# client-side rate limiter shared by every session in this process
+rate_limiter = RateLimiter.from_config(config)
+# retries and per-endpoint circuit breakers shared by every session in this process
+resilience = Resilience.from_config(config)
+# connection pooling, keep-alive and timeouts shared by every session in this process
+http_transport = HttpTransport.from_config(config)
+
 def get_etrade_service():
     """Initializes and returns the OAuth1Service"""
     return OAuth1Service(
@@ -31,17 +42,27 @@ def get_etrade_service():
         request_token_url="https://api.etrade.com/oauth/request_token",
         access_token_url="https://api.etrade.com/oauth/access_token",
         authorize_url="https://us.etrade.com/e/t/etws/authorize?key={}&token={}",
-        base_url="https://api.etrade.com")
+        base_url="https://api.etrade.com",
+        session_obj=EtradeOAuth1Session)
 
 def save_tokens(token, secret, base_url):
     """Saves the access token and secret to a file"""
     data = {
         "access_token": token,
         "access_token_secret": secret,
-        "base_url": base_url
+        "base_url": base_url,
+        "issued_at": datetime.now(timezone.utc).isoformat()
     }
-    with open(TOKEN_FILE, 'w') as f:
-        json.dump(data, f)
+    # Write to a temporary file and rename it over TOKEN_FILE, so a running
+    # MCP server watching the file never reads a partially written token
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(TOKEN_FILE), suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, TOKEN_FILE)
+    except Exception:
+        os.remove(tmp_path)
+        raise
     logger.info("Tokens saved to %s", TOKEN_FILE)
 
 def load_tokens():
@@ -54,6 +75,16 @@ def load_tokens():
             logger.error("Error loading tokens: %s", e)
     return None
 
+def _configure_session(session):
+    """Attaches a fast signer and the process-wide rate limiter, retry policy and HTTP transport to a session"""
+    session.signature = OAuth1Signer(session.consumer_key, session.consumer_secret,
+                                     session.access_token, session.access_token_secret)
+    session.rate_limiter = rate_limiter
+    session.resilience = resilience
+    http_transport.mount(session)
+    # Concurrent worker threads (e.g. the order status fan-out) never share a session object
+    return SessionPool(session)
+
 def get_session(headless=False):
     """
     Returns an authenticated session.
@@ -66,7 +97,7 @@ def get_session(headless=False):
         session = etrade.get_session(
             (tokens["access_token"], tokens["access_token_secret"])
         )
-        return session, tokens["base_url"]
+        return _configure_session(session), tokens["base_url"]
     
     if headless:
         raise Exception("No saved tokens found. Please run the CLI application first to authenticate.")
@@ -109,7 +140,20 @@ def get_session(headless=False):
                                   params={"oauth_verifier": text_code})
 
     save_tokens(session.access_token, session.access_token_secret, base_url)
-    return session, base_url
+    return _configure_session(session), base_url
+
+def get_async_session(**kwargs):
+    """
+    Returns an authenticated non-blocking session built from the saved tokens.
+    Raises an error if no tokens have been saved yet.
+
+    :param kwargs: extra AsyncOAuth1Session options (e.g. scheduler)
+    """
+    from async_session import AsyncOAuth1Session
+
+    session, base_url = get_session(headless=True)
+    kwargs.setdefault("client", http_transport.async_client())
+    return AsyncOAuth1Session.from_session(session, **kwargs), base_url
 
 def oauth():
     """Allows user authorization for the sample application with OAuth 1"""
@@ -125,6 +169,9 @@ def main_menu(session, base_url):
 
     :param session: authenticated session
     """
+    # Imported here so the MCP server, which only needs the session helpers, does not load the CLI clients
+    from accounts.accounts import Accounts
+    from market.market import Market
 
     menu_items = {"1": "Market Quotes",
                   "2": "Option Expire Dates",
@@ -0,0 +1,49 @@
+"""rauth session used for every authenticated E*TRADE request"""
+from rauth import OAuth1Session
+
+
+class EtradeOAuth1Session(OAuth1Session):
+    """
+    OAuth1Session that waits on the shared client-side rate limiter before
+    each request, so Market, Accounts and Order calls stay under E*TRADE's
+    per-class throttles, and sends requests through the shared Resilience
+    policy (retries, deadline, circuit breaker) when one is set.
+    """
+    rate_limiter = None
+    resilience = None
+    # Default (connect, read) timeout, set by HttpTransport.mount
+    timeout = None
+
+    def request(self, method, url, header_auth=False, realm='', **req_kwargs):
+        if self.timeout is not None:
+            req_kwargs.setdefault("timeout", self.timeout)
+        if self.resilience is None:
+            return self._send(method, url, header_auth, realm, req_kwargs)
+
+        def send(remaining):
+            return self._send(method, url, header_auth, realm,
+                              dict(req_kwargs, timeout=_cap_timeout(req_kwargs.get("timeout"), remaining)))
+        return self.resilience.call_sync(method, url, send)
+
+    def _get_oauth_params(self, req_kwargs):
+        """Uses the precomputed OAuth parameters of an OAuth1Signer when one is installed as the signature"""
+        oauth_params_factory = getattr(self.signature, "oauth_params", None)
+        if oauth_params_factory is None:
+            return super(EtradeOAuth1Session, self)._get_oauth_params(req_kwargs)
+        oauth_params = oauth_params_factory()
+        self._parse_optional_params(oauth_params, req_kwargs)
+        return oauth_params
+
+    def _send(self, method, url, header_auth, realm, req_kwargs):
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire_sync(url)
+        return super(EtradeOAuth1Session, self).request(method, url, header_auth, realm, **req_kwargs)
+
+
+def _cap_timeout(timeout, remaining):
+    """Limits a requests timeout (seconds or a (connect, read) tuple) to the time left before the deadline"""
+    if timeout is None:
+        return remaining
+    if isinstance(timeout, tuple):
+        return tuple(remaining if t is None else min(t, remaining) for t in timeout)
+    return min(timeout, remaining)
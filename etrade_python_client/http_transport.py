@@ -0,0 +1,140 @@
+"""Connection pooling, keep-alive and timeouts for the sync and async sessions"""
+import weakref
+
+from requests.adapters import HTTPAdapter
+from client_logger import logger
+
+
+class HttpTransport:
+    """
+    Shared HTTP transport settings for Market, Accounts and Order.
+
+    The rauth (requests) session gets an HTTPAdapter sized for parallel
+    fan-outs and default connect/read timeouts; the async session gets an
+    httpx.AsyncClient with the same pool size, a keep-alive expiry and
+    optional HTTP/2. Both report how many requests reused a warm
+    connection instead of opening (and TLS-handshaking) a new one.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=20, keepalive_expiry=30.0,
+                 connect_timeout=5.0, read_timeout=30.0, http2=False):
+        """
+        :param pool_connections: Number of per-host connection pools to keep
+        :param pool_maxsize: Maximum connections kept open per host
+        :param keepalive_expiry: Seconds an idle async connection is kept alive
+        :param connect_timeout: Seconds to wait for a TCP/TLS connection
+        :param read_timeout: Seconds to wait for response data
+        :param http2: Use HTTP/2 for the async client (requires the h2 package)
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.keepalive_expiry = keepalive_expiry
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.http2 = http2
+
+        self._adapters = weakref.WeakSet()
+        self.async_requests = 0
+        self.async_connections = 0
+
+    @classmethod
+    def from_config(cls, config):
+        """Builds the transport from HTTP_* settings in the DEFAULT section of config.ini"""
+        return cls(pool_connections=config.getint("DEFAULT", "HTTP_POOL_CONNECTIONS", fallback=10),
+                   pool_maxsize=config.getint("DEFAULT", "HTTP_POOL_MAXSIZE", fallback=20),
+                   keepalive_expiry=config.getfloat("DEFAULT", "HTTP_KEEPALIVE_EXPIRY", fallback=30.0),
+                   connect_timeout=config.getfloat("DEFAULT", "HTTP_CONNECT_TIMEOUT", fallback=5.0),
+                   read_timeout=config.getfloat("DEFAULT", "HTTP_READ_TIMEOUT", fallback=30.0),
+                   http2=config.getboolean("DEFAULT", "HTTP2", fallback=False))
+
+    @property
+    def timeout(self):
+        """(connect, read) timeout tuple in the form requests expects"""
+        return self.connect_timeout, self.read_timeout
+
+    def mount(self, session):
+        """
+        Configures a requests-based session (e.g. EtradeOAuth1Session) to use this transport.
+        :param session: requests.Session or subclass
+        """
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.timeout = self.timeout
+        self._adapters.add(adapter)
+        return session
+
+    def async_client(self):
+        """Creates an httpx.AsyncClient with this transport's pool, keep-alive and timeout settings"""
+        import httpx
+
+        http2 = self.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("HTTP2 is enabled but the h2 package is not installed; using HTTP/1.1")
+                http2 = False
+        return httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=self.pool_maxsize,
+                                max_keepalive_connections=self.pool_maxsize,
+                                keepalive_expiry=self.keepalive_expiry),
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            http2=http2,
+            event_hooks={"request": [self._on_async_request]})
+
+    async def warm_up(self, client, url, connections=2):
+        """
+        Opens keep-alive connections to a host ahead of the first API call,
+        so it does not pay the TCP and TLS handshakes.
+        The requests are unsigned HEADs; their response status is ignored.
+        :param client: httpx.AsyncClient created by async_client()
+        :param url: Any URL on the host, e.g. the API base URL
+        :param connections: Number of connections to open, at most pool_maxsize
+        :return: Number of connections opened
+        """
+        import asyncio
+
+        async def head():
+            try:
+                await client.head(url)
+                return True
+            except Exception as e:
+                logger.debug("Connection warm-up to %s failed: %s", url, e)
+                return False
+        results = await asyncio.gather(*[head() for _ in range(min(connections, self.pool_maxsize))])
+        return sum(results)
+
+    async def _on_async_request(self, request):
+        self.async_requests += 1
+        request.extensions["trace"] = self._trace
+
+    async def _trace(self, event, info):
+        """httpcore trace callback; a TCP connect means the request could not reuse a pooled connection"""
+        if event == "connection.connect_tcp.complete":
+            self.async_connections += 1
+
+    @staticmethod
+    def _reuse(requests, connections):
+        return {"requests": requests,
+                "new_connections": connections,
+                "reuse_ratio": max(requests - connections, 0) / requests if requests else 0.0}
+
+    def stats(self):
+        """Returns request and new-connection counts, and the share of requests served on a warm connection"""
+        requests = connections = 0
+        for adapter in list(self._adapters):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    requests += pool.num_requests
+                    connections += pool.num_connections
+        return {"settings": {"pool_connections": self.pool_connections,
+                             "pool_maxsize": self.pool_maxsize,
+                             "keepalive_expiry": self.keepalive_expiry,
+                             "connect_timeout": self.connect_timeout,
+                             "read_timeout": self.read_timeout,
+                             "http2": self.http2},
+                "sync": self._reuse(requests, connections),
+                "async": self._reuse(self.async_requests, self.async_connections)}
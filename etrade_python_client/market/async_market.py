@@ -0,0 +1,52 @@
+from market.market import Market
+
+
+class AsyncMarket(Market):
+    """
+    Non-blocking variant of Market for use with an AsyncOAuth1Session.
+    Request building and response parsing are shared with Market.
+    """
+
+    async def fetch_quote(self, symbols, override_symbol_count=False, detail_flag=None):
+        """
+        Fetches quotes for the given symbols.
+        :param symbols: A string of comma-separated symbols (e.g., "AAPL,GOOG") or a list of symbols.
+        :param override_symbol_count: Allow up to 50 symbols per request instead of 25.
+        :param detail_flag: Optional field set (ALL, FUNDAMENTAL, INTRADAY, OPTIONS, WEEK_52, MF_DETAIL).
+        :return: List of Quote records.
+        """
+        params = {"overrideSymbolCount": "true"} if override_symbol_count else {}
+        if detail_flag:
+            params["detailFlag"] = detail_flag
+        return await self.session.get_parsed(self._quote_url(symbols), self._handle_quote_response, params=params)
+
+    async def fetch_option_expire_dates(self, symbol, expiry_type=None):
+        """
+        Fetches option expiration dates for a given symbol.
+        :param symbol: The stock symbol.
+        :param expiry_type: Optional filter (ALL, WEEKLY, MONTHLY, QUARTERLY).
+        :return: List of expiration date dictionaries.
+        """
+        url = self.base_url + "/v1/market/optionexpiredate.json"
+        params = {"symbol": symbol}
+        if expiry_type:
+            params["expiryType"] = expiry_type
+
+        return await self.session.get_parsed(url, self._handle_option_expire_dates_response, params=params)
+
+    async def fetch_option_chains(self, symbol, expiry_year=None, expiry_month=None, expiry_day=None,
+                                  chain_type="CALLPUT", strike_price_near=None, no_of_strikes=None,
+                                  include_weekly=False, skip_adjusted=True, option_category="STANDARD",
+                                  price_type="ATNM", columnar=False):
+        """
+        Fetches option chains for a given symbol.
+        :param columnar: Return ChainColumns (NumPy arrays per field, for screening) instead of the OptionChain.
+        :return: OptionChain record of the OptionChainResponse, or its ChainColumns.
+        """
+        params = self._option_chain_params(symbol, expiry_year, expiry_month, expiry_day,
+                                           chain_type, strike_price_near, no_of_strikes,
+                                           include_weekly, skip_adjusted, option_category, price_type)
+        url = self.base_url + "/v1/market/optionchains.json"
+
+        chain = await self.session.get_parsed(url, self._handle_option_chains_response, params=params)
+        return chain.columns() if columnar else chain
@@ -0,0 +1,123 @@
+import time
+from client_logger import logger
+from market.market import Market
+from market.records import OptionChain
+from resilience import TransientAPIError
+from ttl_cache import TTLCache
+
+
+class OptionChainCache:
+    """
+    In-memory cache in front of AsyncMarket.fetch_option_chains and
+    fetch_option_expire_dates, keyed by the normalized request parameters.
+
+    Options only trade during the regular session, so with a MarketCalendar
+    entries fetched after the close stay valid until the next regular open.
+    With `serve_stale_on_error`, an expired entry is returned while the
+    upstream is unavailable instead of failing the call. With a SharedCache,
+    misses are looked up in the cache daemon shared with other server
+    processes before calling E*TRADE.
+    """
+
+    def __init__(self, market, max_entries=500, chain_ttl=30.0, expire_dates_ttl=3600.0, calendar=None,
+                 serve_stale_on_error=True, shared=None, clock=time.monotonic):
+        """
+        :param market: AsyncMarket used on a miss
+        :param max_entries: Maximum number of cached responses
+        :param chain_ttl: Seconds an option chain stays fresh during the session
+        :param expire_dates_ttl: Seconds an expiration date list stays fresh during the session
+        :param calendar: Optional MarketCalendar used to extend TTLs outside trading hours
+        :param serve_stale_on_error: Serve expired entries while the upstream is unavailable
+        :param shared: Optional SharedCache consulted on a miss
+        :param clock: Monotonic time source
+        """
+        self.market = market
+        self.serve_stale_on_error = serve_stale_on_error
+        self.served_on_error = 0
+        self.shared = shared
+        self.chain_ttl = chain_ttl
+        self.expire_dates_ttl = expire_dates_ttl
+        self.calendar = calendar
+        self.cache = TTLCache(max_entries, clock=clock)
+
+    def _ttl(self, base_ttl):
+        if self.calendar is not None:
+            return self.calendar.ttl(base_ttl, extended=False)
+        return base_ttl
+
+    def stats(self):
+        """Returns hit/miss counters and the current size"""
+        return dict(self.cache.stats(), served_on_error=self.served_on_error)
+
+    async def _fetch(self, key, fetch, ttl, record=None):
+        """
+        Fetches and stores an entry, falling back to an expired one while the upstream is unavailable.
+        :param record: Record class of the value (e.g. OptionChain), shared with other processes as its dict
+        """
+        if self.shared is not None:
+            entry = await self.shared.get(key)
+            if entry is not None:
+                # Expire it when the process that fetched it does
+                value, remaining = entry
+                if record is not None:
+                    value = record.from_api(value)
+                self.cache.put(key, value, remaining)
+                return value
+        ttl = self._ttl(ttl)
+        fetched = False
+        try:
+            value = await fetch()
+            fetched = True
+        except TransientAPIError as e:
+            cached = self.cache.peek(key) if self.serve_stale_on_error else None
+            if cached is None:
+                raise
+            logger.warning("Serving cached %s for %s: %s", key[0], key[1:], e)
+            self.served_on_error += 1
+            return cached
+        finally:
+            if self.shared is not None:
+                # Publishing the entry also gives up this process's lease on it
+                if not fetched:
+                    await self.shared.release([key])
+                else:
+                    await self.shared.put(key, value.to_dict() if record is not None else value, ttl)
+        self.cache.put(key, value, ttl)
+        return value
+
+    async def fetch_option_expire_dates(self, symbol, expiry_type=None):
+        """
+        Fetches option expiration dates for a given symbol, using the cache when fresh.
+        :return: List of expiration date dictionaries.
+        """
+        key = ("optionexpiredate", symbol.upper(), expiry_type)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached[0]
+        return await self._fetch(key, lambda: self.market.fetch_option_expire_dates(symbol, expiry_type),
+                                 self.expire_dates_ttl)
+
+    async def fetch_option_chains(self, symbol, expiry_year=None, expiry_month=None, expiry_day=None,
+                                  chain_type="CALLPUT", strike_price_near=None, no_of_strikes=None,
+                                  include_weekly=False, skip_adjusted=True, option_category="STANDARD",
+                                  price_type="ATNM", columnar=False):
+        """
+        Fetches option chains for a given symbol, using the cache when fresh.
+        :param columnar: Return ChainColumns (NumPy arrays per field, for screening) instead of the OptionChain.
+        :return: OptionChain record of the OptionChainResponse, or its ChainColumns.
+        """
+        params = Market._option_chain_params(symbol.upper(), expiry_year, expiry_month, expiry_day,
+                                             chain_type, strike_price_near, no_of_strikes,
+                                             include_weekly, skip_adjusted, option_category, price_type)
+        key = ("optionchains",) + tuple(sorted((k, str(v)) for k, v in params.items()))
+        cached = self.cache.get(key)
+        if cached is not None:
+            chain = cached[0]
+        else:
+            chain = await self._fetch(key, lambda: self.market.fetch_option_chains(
+                symbol, expiry_year, expiry_month, expiry_day,
+                chain_type, strike_price_near, no_of_strikes,
+                include_weekly, skip_adjusted, option_category, price_type
+            ), self.chain_ttl, OptionChain)
+        # The columns are built once and kept with the cached chain
+        return chain.columns() if columnar else chain
@@ -1,32 +1,49 @@
-import json
 import logging
-from client_logger import logger
+from client_logger import logger, log_response_body
+from response_parser import parse_json
+from market.records import Greeks, OptionChain, Quote
+
+_NO_GREEKS = Greeks()
 
 class Market:
     def __init__(self, session, base_url):
         self.session = session
         self.base_url = base_url
 
-    def fetch_quote(self, symbols):
+    def fetch_quote(self, symbols, override_symbol_count=False, detail_flag=None):
         """
         Fetches quotes for the given symbols.
         :param symbols: A string of comma-separated symbols (e.g., "AAPL,GOOG") or a list of symbols.
-        :return: List of quote data dictionaries.
+        :param override_symbol_count: Allow up to 50 symbols per request instead of 25.
+        :param detail_flag: Optional field set (ALL, FUNDAMENTAL, INTRADAY, OPTIONS, WEEK_52, MF_DETAIL).
+        :return: List of Quote records.
         """
+        params = {"overrideSymbolCount": "true"} if override_symbol_count else {}
+        if detail_flag:
+            params["detailFlag"] = detail_flag
+        response = self.session.get(self._quote_url(symbols), params=params)
+        return self._handle_quote_response(response)
+
+    def _quote_url(self, symbols):
+        """Builds the quote endpoint URL for a symbol string or list"""
         if isinstance(symbols, list):
             symbols = ",".join(symbols)
-            
-        url = self.base_url + "/v1/market/quote/" + symbols + ".json"
-        response = self.session.get(url)
+        return self.base_url + "/v1/market/quote/" + symbols + ".json"
+
+    @staticmethod
+    def _handle_quote_response(response):
+        """
+        Parses a quote API response.
+        :return: List of Quote records.
+        """
         logger.debug("Request Header: %s", response.request.headers)
 
         if response is not None and response.status_code == 200:
-            parsed = json.loads(response.text)
-            logger.debug("Response Body: %s", json.dumps(parsed, indent=4, sort_keys=True))
-            data = response.json()
+            log_response_body(response)
+            data = parse_json(response)
             
             if data is not None and "QuoteResponse" in data and "QuoteData" in data["QuoteResponse"]:
-                return data["QuoteResponse"]["QuoteData"]
+                return [Quote.from_api(quote) for quote in data["QuoteResponse"]["QuoteData"]]
             else:
                  if (data is not None and 'QuoteResponse' in data and 'Messages' in data["QuoteResponse"]
                         and 'Message' in data["QuoteResponse"]["Messages"]
@@ -35,7 +52,7 @@ class Market:
                      raise Exception(f"API Error: {', '.join(messages)}")
                  raise Exception("Quote API service error")
         else:
-            logger.debug("Response Body: %s", response)
+            log_response_body(response)
             raise Exception("Quote API service error")
 
     def quotes(self):
@@ -53,24 +70,21 @@ class Market:
             print("=" * 80)
 
             for quote in quotes_data:
-                all_data = quote.get("All", {})
-                product = quote.get("Product", {})
-
-                symbol = product.get("symbol", "N/A")
-                sec_type = product.get("securityType", "N/A")
-                date_time = quote.get("dateTime", "N/A")
-
-                last_price = all_data.get("lastTrade", 0)
-                change = all_data.get("changeClose", 0)
-                change_pct = all_data.get("changeClosePercentage", 0)
-                prev_close = all_data.get("previousClose", 0)
-                bid = all_data.get("bid", 0)
-                bid_size = all_data.get("bidSize", 0)
-                ask = all_data.get("ask", 0)
-                ask_size = all_data.get("askSize", 0)
-                low = all_data.get("low", 0)
-                high = all_data.get("high", 0)
-                volume = all_data.get("totalVolume", 0)
+                symbol = quote.symbol or "N/A"
+                sec_type = quote.security_type or "N/A"
+                date_time = quote.date_time or "N/A"
+
+                last_price = quote.last_trade or 0
+                change = quote.change_close or 0
+                change_pct = quote.change_close_pct or 0
+                prev_close = quote.previous_close or 0
+                bid = quote.bid or 0
+                bid_size = quote.bid_size or 0
+                ask = quote.ask or 0
+                ask_size = quote.ask_size or 0
+                low = quote.low or 0
+                high = quote.high or 0
+                volume = quote.total_volume or 0
 
                 # Determine change color indicator
                 change_indicator = "▲" if change >= 0 else "▼"
@@ -107,12 +121,19 @@ class Market:
             params["expiryType"] = expiry_type
 
         response = self.session.get(url, params=params)
+        return self._handle_option_expire_dates_response(response)
+
+    @staticmethod
+    def _handle_option_expire_dates_response(response):
+        """
+        Parses an option expire date API response.
+        :return: List of expiration date dictionaries.
+        """
         logger.debug("Request Header: %s", response.request.headers)
 
         if response is not None and response.status_code == 200:
-            parsed = json.loads(response.text)
-            logger.debug("Response Body: %s", json.dumps(parsed, indent=4, sort_keys=True))
-            data = response.json()
+            log_response_body(response)
+            data = parse_json(response)
             
             if data is not None and "OptionExpireDateResponse" in data \
                     and "ExpirationDate" in data["OptionExpireDateResponse"]:
@@ -122,7 +143,7 @@ class Market:
             else:
                 raise Exception("Option Expire Date API service error")
         else:
-            logger.debug("Response Body: %s", response)
+            log_response_body(response)
             raise Exception("Option Expire Date API service error")
 
     def option_expire_dates(self):
@@ -180,11 +201,29 @@ class Market:
     def fetch_option_chains(self, symbol, expiry_year=None, expiry_month=None, expiry_day=None,
                            chain_type="CALLPUT", strike_price_near=None, no_of_strikes=None,
                            include_weekly=False, skip_adjusted=True, option_category="STANDARD",
-                           price_type="ATNM"):
+                           price_type="ATNM", columnar=False):
         """
         Fetches option chains for a given symbol.
-        :return: Dict containing the OptionChainResponse.
+        :param columnar: Return ChainColumns (NumPy arrays per field, for screening) instead of the OptionChain.
+        :return: OptionChain record of the OptionChainResponse, or its ChainColumns.
         """
+        params = self._option_chain_params(symbol, expiry_year, expiry_month, expiry_day,
+                                           chain_type, strike_price_near, no_of_strikes,
+                                           include_weekly, skip_adjusted, option_category, price_type)
+
+        # Build URL for the API endpoint
+        url = self.base_url + "/v1/market/optionchains.json"
+
+        # Make API call for GET request
+        response = self.session.get(url, params=params)
+        chain = self._handle_option_chains_response(response)
+        return chain.columns() if columnar else chain
+
+    @staticmethod
+    def _option_chain_params(symbol, expiry_year, expiry_month, expiry_day, chain_type,
+                             strike_price_near, no_of_strikes, include_weekly, skip_adjusted,
+                             option_category, price_type):
+        """Builds the query parameters for the option chains API"""
         # Build parameters
         params = {"symbol": symbol, "chainType": chain_type}
         
@@ -198,30 +237,31 @@ class Market:
         params["skipAdjusted"] = "true" if skip_adjusted else "false"
         params["optionCategory"] = option_category
         params["priceType"] = price_type
+        return params
 
-        # Build URL for the API endpoint
-        url = self.base_url + "/v1/market/optionchains.json"
-
-        # Make API call for GET request
-        response = self.session.get(url, params=params)
+    @staticmethod
+    def _handle_option_chains_response(response):
+        """
+        Parses an option chains API response.
+        :return: OptionChain record of the OptionChainResponse.
+        """
         logger.debug("Request Header: %s", response.request.headers)
 
         if response is not None and response.status_code == 200:
-            parsed = json.loads(response.text)
-            logger.debug("Response Body: %s", json.dumps(parsed, indent=4, sort_keys=True))
+            log_response_body(response)
 
-            data = response.json()
+            data = parse_json(response)
             if data is not None and "OptionChainResponse" in data:
-                return data["OptionChainResponse"]
+                return OptionChain.from_api(data["OptionChainResponse"])
             elif data is not None and "Error" in data and "message" in data["Error"]:
                 raise Exception(data["Error"]["message"])
             else:
                 raise Exception("Option Chain API service error")
         else:
-            logger.debug("Response Body: %s", response)
+            log_response_body(response)
             if response is not None:
                 try:
-                    error_data = response.json()
+                    error_data = parse_json(response)
                     if "Error" in error_data and "message" in error_data["Error"]:
                         raise Exception(error_data["Error"]["message"])
                 except:
@@ -274,9 +314,8 @@ class Market:
                 chain_type, strike_near, no_of_strikes, include_weekly
             )
             
-            option_pairs = chain_response.get("OptionPair", [])
-            near_price = chain_response.get("nearPrice", 0)
-            selected = chain_response.get("SelectedED", {})
+            near_price = chain_response.near_price or 0
+            selected = chain_response.selected_expiry or {}
 
             exp_month = selected.get("month", "")
             exp_day = selected.get("day", "")
@@ -291,21 +330,17 @@ class Market:
 
             if chain_type in ["CALLPUT", "CALL"]:
                 self._print_option_chain_header("CALLS")
-                for pair in option_pairs:
-                    call = pair.get("Call")
-                    if call:
-                        self._print_option_row(call)
+                for call in chain_response.calls():
+                    self._print_option_row(call)
                 print("-" * 120)
 
             if chain_type in ["CALLPUT", "PUT"]:
                 self._print_option_chain_header("PUTS")
-                for pair in option_pairs:
-                    put = pair.get("Put")
-                    if put:
-                        self._print_option_row(put)
+                for put in chain_response.puts():
+                    self._print_option_row(put)
                 print("-" * 120)
 
-            print(f"\n  Total Option Pairs: {len(option_pairs)}")
+            print(f"\n  Total Option Pairs: {len(chain_response)}")
             print("=" * 120)
 
         except Exception as e:
@@ -320,16 +355,16 @@ class Market:
 
     def _print_option_row(self, option):
         """Print a single option row"""
-        strike = option.get("strikePrice", 0)
-        last = option.get("lastPrice", 0)
-        bid = option.get("bid", 0)
-        ask = option.get("ask", 0)
-        volume = option.get("volume", 0)
-        open_int = option.get("openInterest", 0)
-
-        greeks = option.get("OptionGreeks", {})
-        iv = greeks.get("iv", 0) * 100 if greeks.get("iv") else 0
-        delta = greeks.get("delta", 0)
-        theta = greeks.get("theta", 0)
+        strike = option.strike_price or 0
+        last = option.last_price or 0
+        bid = option.bid or 0
+        ask = option.ask or 0
+        volume = option.volume or 0
+        open_int = option.open_interest or 0
+
+        greeks = option.greeks or _NO_GREEKS
+        iv = greeks.iv * 100 if greeks.iv else 0
+        delta = greeks.delta or 0
+        theta = greeks.theta or 0
 
         print(f"  {strike:>10.2f} {last:>10.2f} {bid:>10.2f} {ask:>10.2f} {volume:>10,} {open_int:>10,} {iv:>9.1f}% {delta:>8.3f} {theta:>8.3f}")
\ No newline at end of file
@@ -0,0 +1,95 @@
+import json
+import os
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+EASTERN = ZoneInfo("America/New_York")
+DEFAULT_HOLIDAYS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "market_holidays.json")
+
+# US equity session times (Eastern)
+PRE_MARKET_OPEN = time(4, 0)
+REGULAR_OPEN = time(9, 30)
+REGULAR_CLOSE = time(16, 0)
+AFTER_HOURS_CLOSE = time(20, 0)
+
+# After-hours trading ends this long after an early regular close
+AFTER_HOURS_LENGTH = timedelta(hours=4)
+
+
+class MarketCalendar:
+    """
+    US equity market calendar: regular and extended sessions, weekends and
+    exchange holidays loaded from a local table.
+
+    Caches use ttl() so that data fetched while the market is closed stays
+    valid until the next session opens.
+    """
+
+    def __init__(self, holidays_file=DEFAULT_HOLIDAYS_FILE):
+        """
+        :param holidays_file: JSON file with a "holidays" list of ISO dates and an
+                              "early_closes" mapping of ISO date to HH:MM close time
+        """
+        self.holidays = set()
+        self.early_closes = {}
+        if holidays_file and os.path.exists(holidays_file):
+            with open(holidays_file, 'r') as f:
+                table = json.load(f)
+            self.holidays = {date.fromisoformat(d) for d in table.get("holidays", [])}
+            self.early_closes = {date.fromisoformat(d): time.fromisoformat(t)
+                                 for d, t in table.get("early_closes", {}).items()}
+
+    def is_trading_day(self, day):
+        """Returns True if the exchange is open at all on the given date"""
+        return day.weekday() < 5 and day not in self.holidays
+
+    def session_bounds(self, day, extended=True):
+        """
+        Returns the (open, close) datetimes in Eastern time for a date, or None if closed.
+        :param extended: Include pre-market and after-hours sessions
+        """
+        if not self.is_trading_day(day):
+            return None
+        regular_close = datetime.combine(day, self.early_closes.get(day, REGULAR_CLOSE), EASTERN)
+        if not extended:
+            return datetime.combine(day, REGULAR_OPEN, EASTERN), regular_close
+        if day in self.early_closes:
+            return datetime.combine(day, PRE_MARKET_OPEN, EASTERN), regular_close + AFTER_HOURS_LENGTH
+        return datetime.combine(day, PRE_MARKET_OPEN, EASTERN), datetime.combine(day, AFTER_HOURS_CLOSE, EASTERN)
+
+    @staticmethod
+    def _now(now):
+        if now is None:
+            return datetime.now(EASTERN)
+        if now.tzinfo is None:
+            return now.replace(tzinfo=EASTERN)
+        return now.astimezone(EASTERN)
+
+    def is_open(self, now=None, extended=True):
+        """Returns True if a session is in progress"""
+        now = self._now(now)
+        bounds = self.session_bounds(now.date(), extended)
+        return bounds is not None and bounds[0] <= now < bounds[1]
+
+    def next_open(self, now=None, extended=True):
+        """Returns the start of the next session, or `now` if a session is in progress"""
+        now = self._now(now)
+        day = now.date()
+        # Holidays never span more than a few days; two weeks is a generous bound
+        for _ in range(15):
+            bounds = self.session_bounds(day, extended)
+            if bounds is not None and now < bounds[1]:
+                return max(bounds[0], now)
+            day += timedelta(days=1)
+        return now
+
+    def ttl(self, base_ttl, now=None, extended=True):
+        """
+        Returns how long data fetched now stays valid.
+        While a session is open this is base_ttl; outside trading hours it
+        stretches to the next session open.
+        """
+        now = self._now(now)
+        if self.is_open(now, extended):
+            return base_ttl
+        return max(base_ttl, (self.next_open(now, extended) - now).total_seconds())
@@ -0,0 +1,151 @@
+"""
+Columnar view of an option chain for screening and analytics.
+
+Each side of the chain (calls, puts) is stored as NumPy arrays, one per
+field, so filters such as a moneyness window, a minimum open interest or a
+maximum bid/ask spread are a few array comparisons over the whole chain
+instead of a Python loop over OptionPair dicts. Requires numpy.
+"""
+import numpy as np
+
+# Array name, OptionContract attribute, dtype; missing floats are NaN and missing counts 0
+CONTRACT_COLUMNS = (
+    ("strike", "strike_price", np.float64),
+    ("bid", "bid", np.float64),
+    ("ask", "ask", np.float64),
+    ("last", "last_price", np.float64),
+    ("volume", "volume", np.int64),
+    ("open_interest", "open_interest", np.int64),
+)
+GREEK_COLUMNS = (
+    ("iv", "iv"),
+    ("delta", "delta"),
+    ("gamma", "gamma"),
+    ("theta", "theta"),
+    ("vega", "vega"),
+)
+
+
+class OptionColumns:
+    """
+    One side of a chain as parallel arrays: strike, bid, ask, last, volume,
+    open_interest, iv, delta, gamma, theta and vega. `contracts` holds the
+    OptionContract records in the same order, so a filtered view can be
+    mapped back to symbols and OSI keys.
+    """
+
+    def __init__(self, contracts, arrays, near_price=None):
+        """
+        :param contracts: List of OptionContract records
+        :param arrays: Dict of column name to array, each the length of `contracts`
+        :param near_price: Underlying price used for moneyness, or None
+        """
+        self.contracts = contracts
+        self.near_price = near_price
+        self.arrays = arrays
+        for name, array in arrays.items():
+            setattr(self, name, array)
+
+    @classmethod
+    def from_contracts(cls, contracts, near_price=None):
+        """Builds the columns from a list of OptionContract records"""
+        contracts = list(contracts)
+        arrays = {}
+        for name, attr, dtype in CONTRACT_COLUMNS:
+            missing = np.nan if dtype is np.float64 else 0
+            arrays[name] = np.fromiter(
+                (missing if value is None else value for value in (getattr(c, attr) for c in contracts)),
+                dtype=dtype, count=len(contracts))
+        greeks = [c.greeks for c in contracts]
+        for name, attr in GREEK_COLUMNS:
+            arrays[name] = np.fromiter(
+                (np.nan if g is None or getattr(g, attr) is None else getattr(g, attr) for g in greeks),
+                dtype=np.float64, count=len(contracts))
+        return cls(contracts, arrays, near_price)
+
+    def __len__(self):
+        return len(self.contracts)
+
+    @property
+    def mid(self):
+        return (self.bid + self.ask) / 2
+
+    @property
+    def spread(self):
+        return self.ask - self.bid
+
+    @property
+    def moneyness(self):
+        """Strike divided by the underlying price (NaN without a near price)"""
+        if not self.near_price:
+            return np.full(len(self), np.nan)
+        return self.strike / self.near_price
+
+    def mask(self, moneyness=None, min_open_interest=None, min_volume=None, max_spread=None,
+             max_spread_pct=None):
+        """
+        Returns a boolean array of the contracts passing every given filter.
+        Contracts missing a field a filter needs (NaN) do not pass it.
+        :param moneyness: (low, high) window of strike / near price, e.g. (0.9, 1.1)
+        :param min_open_interest: Minimum open interest
+        :param min_volume: Minimum volume traded today
+        :param max_spread: Maximum ask - bid in dollars
+        :param max_spread_pct: Maximum (ask - bid) / mid, e.g. 0.1 for 10%
+        """
+        keep = np.ones(len(self), dtype=bool)
+        if moneyness is not None:
+            low, high = moneyness
+            ratio = self.moneyness
+            keep &= (ratio >= low) & (ratio <= high)
+        if min_open_interest is not None:
+            keep &= self.open_interest >= min_open_interest
+        if min_volume is not None:
+            keep &= self.volume >= min_volume
+        if max_spread is not None or max_spread_pct is not None:
+            spread = self.spread
+            if max_spread is not None:
+                keep &= spread <= max_spread
+            if max_spread_pct is not None:
+                mid = self.mid
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    keep &= (mid > 0) & (spread <= max_spread_pct * mid)
+        return keep
+
+    def select(self, mask):
+        """Returns the subset of rows where `mask` (boolean array or indices) is set"""
+        indices = np.flatnonzero(mask) if np.asarray(mask).dtype == bool else np.asarray(mask)
+        return OptionColumns([self.contracts[i] for i in indices],
+                             {name: array[indices] for name, array in self.arrays.items()}, self.near_price)
+
+    def screen(self, **filters):
+        """Returns the rows passing the filters of mask()"""
+        return self.select(self.mask(**filters))
+
+    def to_dicts(self):
+        """Returns the contracts as API-shaped dicts"""
+        return [contract.to_dict() for contract in self.contracts]
+
+
+class ChainColumns:
+    """Columnar OptionChain: `calls` and `puts` OptionColumns plus the chain's near price and expiry"""
+
+    def __init__(self, calls, puts, near_price=None, selected_expiry=None):
+        self.calls = calls
+        self.puts = puts
+        self.near_price = near_price
+        self.selected_expiry = selected_expiry
+
+    @classmethod
+    def from_chain(cls, chain):
+        """Builds the columns from an OptionChain record"""
+        return cls(OptionColumns.from_contracts(chain.calls(), chain.near_price),
+                   OptionColumns.from_contracts(chain.puts(), chain.near_price),
+                   chain.near_price, chain.selected_expiry)
+
+    def __len__(self):
+        return len(self.calls) + len(self.puts)
+
+    def screen(self, **filters):
+        """Applies OptionColumns.mask() filters to both sides"""
+        return ChainColumns(self.calls.screen(**filters), self.puts.screen(**filters), self.near_price,
+                            self.selected_expiry)
@@ -0,0 +1,209 @@
+"""
+Vectorized Black-Scholes pricing, greeks and implied volatility.
+
+Every function takes NumPy arrays (or scalars, broadcast against them), so
+a whole chain is priced or solved at once. Greeks follow the conventions of
+E*TRADE's OptionGreeks: theta per calendar day, vega and rho per one
+percentage point. Underlyings are modeled with a continuous dividend
+yield (Black-Scholes-Merton). Requires numpy.
+"""
+from datetime import datetime
+
+import numpy as np
+
+from market.market_calendar import EASTERN, REGULAR_CLOSE
+
+SECONDS_PER_YEAR = 365.0 * 24 * 3600
+_INV_SQRT_2PI = 1.0 / np.sqrt(2.0 * np.pi)
+_INV_SQRT_2 = 1.0 / np.sqrt(2.0)
+
+
+def _erfc(x):
+    """Complementary error function (Chebyshev fit, fractional error below 1.2e-7)"""
+    z = np.abs(x)
+    t = 1.0 / (1.0 + 0.5 * z)
+    poly = -1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (
+        -0.18628806 + t * (0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (
+            -0.82215223 + t * 0.17087277))))))))
+    result = t * np.exp(-z * z + poly)
+    return np.where(x >= 0, result, 2.0 - result)
+
+
+def norm_cdf(x):
+    """Standard normal cumulative distribution"""
+    return 0.5 * _erfc(-np.asarray(x, dtype=np.float64) * _INV_SQRT_2)
+
+
+def norm_pdf(x):
+    """Standard normal density"""
+    x = np.asarray(x, dtype=np.float64)
+    return _INV_SQRT_2PI * np.exp(-0.5 * x * x)
+
+
+def _inputs(spot, strike, years, rate, dividend_yield, is_call):
+    """Broadcasts the pricing inputs to float arrays (is_call to bool) of one shape"""
+    return np.broadcast_arrays(np.asarray(spot, dtype=np.float64), np.asarray(strike, dtype=np.float64),
+                               np.asarray(years, dtype=np.float64), np.asarray(rate, dtype=np.float64),
+                               np.asarray(dividend_yield, dtype=np.float64), np.asarray(is_call, dtype=bool))
+
+
+def _price_and_vega(spot, strike, years, vol, rate, dividend_yield, is_call):
+    """Model price and raw vega (per 1.00 of volatility) for positive years and vol"""
+    sqrt_t = np.sqrt(years)
+    vol_t = vol * sqrt_t
+    d1 = (np.log(spot / strike) + (rate - dividend_yield + 0.5 * vol * vol) * years) / vol_t
+    d2 = d1 - vol_t
+    spot_df = spot * np.exp(-dividend_yield * years)
+    strike_df = strike * np.exp(-rate * years)
+    call = spot_df * norm_cdf(d1) - strike_df * norm_cdf(d2)
+    # Put-call parity
+    price = np.where(is_call, call, call - spot_df + strike_df)
+    return price, spot_df * norm_pdf(d1) * sqrt_t
+
+
+def black_scholes(spot, strike, years, vol, rate=0.0, dividend_yield=0.0, is_call=True):
+    """
+    Prices options and computes their greeks.
+    Expired contracts (years <= 0) and zero volatility are valued at intrinsic value.
+    :param spot: Underlying price
+    :param strike: Strike prices
+    :param years: Time to expiration in years
+    :param vol: Annualized volatility, e.g. 0.3 for 30%
+    :param rate: Continuously compounded risk-free rate
+    :param dividend_yield: Continuous dividend yield of the underlying
+    :param is_call: True for calls, False for puts
+    :return: Dict of arrays: price, delta, gamma, theta (per day), vega and rho (per 1%).
+    """
+    spot, strike, years, rate, dividend_yield, is_call = _inputs(spot, strike, years, rate, dividend_yield,
+                                                                 is_call)
+    vol = np.broadcast_to(np.asarray(vol, dtype=np.float64), spot.shape)
+    live = (years > 0) & (vol > 0)
+    t = np.where(live, years, 1.0)
+    v = np.where(live, vol, 1.0)
+
+    sqrt_t = np.sqrt(t)
+    d1 = (np.log(spot / strike) + (rate - dividend_yield + 0.5 * v * v) * t) / (v * sqrt_t)
+    d2 = d1 - v * sqrt_t
+    div_df = np.exp(-dividend_yield * t)
+    rate_df = np.exp(-rate * t)
+    sign = np.where(is_call, 1.0, -1.0)
+    n_d1 = norm_cdf(sign * d1)
+    n_d2 = norm_cdf(sign * d2)
+    pdf_d1 = norm_pdf(d1)
+
+    price = sign * (spot * div_df * n_d1 - strike * rate_df * n_d2)
+    delta = sign * div_df * n_d1
+    gamma = div_df * pdf_d1 / (spot * v * sqrt_t)
+    vega = spot * div_df * pdf_d1 * sqrt_t
+    theta = (-spot * div_df * pdf_d1 * v / (2 * sqrt_t)
+             - sign * rate * strike * rate_df * n_d2 + sign * dividend_yield * spot * div_df * n_d1)
+    rho = sign * strike * t * rate_df * n_d2
+
+    intrinsic = np.maximum(sign * (spot - strike), 0.0)
+    in_the_money = sign * (spot - strike) > 0
+    return {
+        "price": np.where(live, price, intrinsic),
+        "delta": np.where(live, delta, np.where(in_the_money, sign, 0.0)),
+        "gamma": np.where(live, gamma, 0.0),
+        "theta": np.where(live, theta / 365.0, 0.0),
+        "vega": np.where(live, vega / 100.0, 0.0),
+        "rho": np.where(live, rho / 100.0, 0.0),
+    }
+
+
+def implied_volatility(price, spot, strike, years, rate=0.0, dividend_yield=0.0, is_call=True, tol=1e-6,
+                       max_iter=60, low=1e-4, high=5.0):
+    """
+    Solves the volatility reproducing each option price, all contracts at once.
+    Each step is a Newton step on vega, replaced by bisection whenever it would
+    leave the bracket known to contain the root, so every contract converges.
+    :param price: Option prices (e.g. bid/ask mid)
+    :param tol: Pricing error in dollars at which a contract is solved; contracts with negligible vega
+        (deep out of the money, near expiry) are only as precise as this allows
+    :param low: Lowest volatility searched
+    :param high: Highest volatility searched
+    :return: Array of implied volatilities; NaN where the price is outside the model's no-arbitrage
+        bounds, the contract has expired, or no volatility in [low, high] matches.
+    """
+    spot, strike, years, rate, dividend_yield, is_call = _inputs(spot, strike, years, rate, dividend_yield,
+                                                                 is_call)
+    price = np.broadcast_to(np.asarray(price, dtype=np.float64), spot.shape)
+    spot_df = spot * np.exp(-dividend_yield * years)
+    strike_df = strike * np.exp(-rate * years)
+    lower_bound = np.maximum(np.where(is_call, spot_df - strike_df, strike_df - spot_df), 0.0)
+    upper_bound = np.where(is_call, spot_df, strike_df)
+    valid = (years > 0) & np.isfinite(price) & (price > lower_bound) & (price < upper_bound)
+
+    vol = np.full(spot.shape, np.nan)
+    idx = np.flatnonzero(valid)
+    if idx.size == 0:
+        return vol
+    s, k, t, r, q, c, p = (a.ravel()[idx] for a in (spot, strike, years, rate, dividend_yield, is_call, price))
+    lo = np.full(idx.size, low)
+    hi = np.full(idx.size, high)
+    # Brenner-Subrahmanyam approximation as the starting point
+    sigma = np.clip(np.sqrt(2 * np.pi / t) * p / s, low, high)
+    solved = np.zeros(idx.size, dtype=bool)
+
+    active = np.arange(idx.size)
+    for _ in range(max_iter):
+        model, vega = _price_and_vega(s[active], k[active], t[active], sigma[active], r[active], q[active],
+                                      c[active])
+        diff = model - p[active]
+        done = np.abs(diff) < tol
+        solved[active[done]] = True
+        over = diff > 0
+        hi[active] = np.where(over, sigma[active], hi[active])
+        lo[active] = np.where(over, lo[active], sigma[active])
+        with np.errstate(divide="ignore", over="ignore", invalid="ignore"):
+            step = sigma[active] - diff / vega
+        inside = np.isfinite(step) & (step > lo[active]) & (step < hi[active])
+        sigma[active] = np.where(done, sigma[active],
+                                 np.where(inside, step, 0.5 * (lo[active] + hi[active])))
+        active = active[~done]
+        if active.size == 0:
+            break
+    vol.ravel()[idx] = np.where(solved, sigma, np.nan)
+    return vol
+
+
+def years_to_expiry(selected_expiry, now=None):
+    """
+    Years from now until the close (4pm ET) of an expiration day.
+    :param selected_expiry: Dict with year, month and day (an option chain's SelectedED)
+    :param now: Aware datetime, defaults to the current time
+    """
+    close = datetime(int(selected_expiry["year"]), int(selected_expiry["month"]), int(selected_expiry["day"]),
+                     REGULAR_CLOSE.hour, REGULAR_CLOSE.minute, tzinfo=EASTERN)
+    now = now or datetime.now(EASTERN)
+    return max((close - now).total_seconds(), 0.0) / SECONDS_PER_YEAR
+
+
+def market_prices(columns):
+    """Bid/ask mid of each contract of an OptionColumns, or the last price without a two-sided quote"""
+    quoted = (columns.bid > 0) & (columns.ask >= columns.bid)
+    return np.where(quoted, columns.mid, columns.last)
+
+
+def price_columns(columns, years, underlying_price=None, rate=0.0, dividend_yield=0.0):
+    """
+    Solves implied volatility for one side of a chain from its market prices
+    at the chain's near price, then prices it and computes greeks at
+    `underlying_price` (a what-if price; the near price by default).
+    Contracts whose volatility cannot be solved use the chain's iv, if any.
+    :param columns: OptionColumns (calls or puts) of a ChainColumns
+    :param years: Time to expiration in years
+    :return: Dict of arrays: market_price, iv, price, delta, gamma, theta, vega, rho.
+    """
+    near_price = columns.near_price if columns.near_price else np.nan
+    spot = near_price if underlying_price is None else underlying_price
+    is_call = np.array([c.option_type == "CALL" for c in columns.contracts], dtype=bool)
+    prices = market_prices(columns)
+    iv = implied_volatility(prices, near_price, columns.strike, years, rate, dividend_yield, is_call)
+    iv = np.where(np.isnan(iv), columns.iv, iv)
+    result = black_scholes(spot, columns.strike, years, np.nan_to_num(iv), rate, dividend_yield, is_call)
+    unpriced = np.isnan(iv)
+    result = {name: np.where(unpriced, np.nan, values) for name, values in result.items()}
+    result["market_price"] = prices
+    result["iv"] = iv
+    return result
@@ -0,0 +1,149 @@
+import asyncio
+from client_logger import logger
+
+# Symbols accepted per quote request, without and with overrideSymbolCount
+MAX_SYMBOLS = 25
+MAX_SYMBOLS_OVERRIDE = 50
+
+
+def normalize_symbols(symbols):
+    """Splits a comma-separated string or list into unique upper-case symbols"""
+    if isinstance(symbols, str):
+        symbols = symbols.split(",")
+    normalized = []
+    for symbol in symbols:
+        symbol = symbol.strip().upper()
+        if symbol and symbol not in normalized:
+            normalized.append(symbol)
+    return normalized
+
+
+def match_quotes(symbols, quotes):
+    """
+    Maps each requested symbol to its quote in a quote API response.
+
+    Quotes come back in request order; option symbols do not echo the
+    requested symbol in their symbol, so match by position when possible.
+    """
+    if len(quotes) == len(symbols):
+        return dict(zip(symbols, quotes))
+    return {(quote.symbol or "").upper(): quote for quote in quotes}
+
+
+class QuoteBatcher:
+    """
+    Coalesces concurrent quote requests from many callers into as few
+    GET /v1/market/quote/{symbols}.json calls as possible.
+
+    Symbols requested within `window` seconds of each other are collected,
+    sent in batches of 25 (50 with override_symbol_count) and each caller
+    receives only the quotes it asked for. Requests for different detail
+    flags are batched separately.
+    """
+
+    def __init__(self, market, window=0.01, override_symbol_count=False):
+        """
+        :param market: AsyncMarket used to issue the batched requests
+        :param window: Seconds to wait for more symbols before sending a batch
+        :param override_symbol_count: Send up to 50 symbols per request instead of 25
+        """
+        self.market = market
+        self.window = window
+        self.override_symbol_count = override_symbol_count
+        self.batch_size = MAX_SYMBOLS_OVERRIDE if override_symbol_count else MAX_SYMBOLS
+        self._pending = {}
+        self._inflight = {}
+        self._timer = None
+        self._tasks = set()
+
+        # Counters for observing how much the batcher saves
+        self.symbols_requested = 0
+        self.requests_sent = 0
+
+    def stats(self):
+        """Returns counters describing how many requests the batcher has saved"""
+        return {"symbols_requested": self.symbols_requested,
+                "requests_sent": self.requests_sent}
+
+    async def fetch_quote(self, symbols, detail_flag=None):
+        """
+        Fetches quotes for the given symbols, sharing requests with concurrent callers.
+        :param symbols: A string of comma-separated symbols (e.g., "AAPL,GOOG") or a list of symbols.
+        :param detail_flag: Optional field set (ALL, FUNDAMENTAL, INTRADAY, OPTIONS, WEEK_52, MF_DETAIL).
+        :return: List of quote data dictionaries, in the order requested.
+        """
+        symbols = normalize_symbols(symbols)
+        found = await self.fetch_quote_map(symbols, detail_flag)
+        quotes = [found[symbol] for symbol in symbols if symbol in found]
+        if symbols and not quotes:
+            raise Exception("Quote API service error")
+        return quotes
+
+    async def fetch_quote_map(self, symbols, detail_flag=None):
+        """
+        Fetches quotes for the given symbols, sharing requests with concurrent callers.
+        :return: Dict of symbol to quote data; symbols the API did not return are omitted.
+        """
+        symbols = normalize_symbols(symbols)
+        loop = asyncio.get_running_loop()
+
+        futures = []
+        for symbol in symbols:
+            key = (detail_flag, symbol)
+            future = self._pending.get(key) or self._inflight.get(key)
+            if future is None:
+                future = loop.create_future()
+                self._pending[key] = future
+            futures.append(future)
+        self.symbols_requested += len(symbols)
+
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._timer is None and self._pending:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        # Shield the shared futures so one cancelled caller does not cancel the others
+        results = await asyncio.gather(*[asyncio.shield(f) for f in futures])
+        return {symbol: quote for symbol, quote in zip(symbols, results) if quote is not None}
+
+    def _flush(self):
+        """Sends every pending symbol, split by detail flag into batches of at most batch_size"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        pending, self._pending = self._pending, {}
+        by_flag = {}
+        for key in pending:
+            by_flag.setdefault(key[0], []).append(key)
+
+        for keys in by_flag.values():
+            for i in range(0, len(keys), self.batch_size):
+                batch = {key: pending[key] for key in keys[i:i + self.batch_size]}
+                self._inflight.update(batch)
+                task = asyncio.ensure_future(self._fetch_batch(batch))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _fetch_batch(self, batch):
+        """Issues one quote request and resolves the futures waiting on it"""
+        detail_flag = next(iter(batch))[0]
+        symbols = [symbol for _, symbol in batch]
+        self.requests_sent += 1
+        logger.debug("Quote batch of %d symbols: %s", len(symbols), ",".join(symbols))
+        try:
+            quotes = await self.market.fetch_quote(symbols, override_symbol_count=len(symbols) > MAX_SYMBOLS,
+                                                   detail_flag=detail_flag)
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            for key in batch:
+                self._inflight.pop(key, None)
+
+        by_symbol = match_quotes(symbols, quotes)
+        for (_, symbol), future in batch.items():
+            if not future.done():
+                future.set_result(by_symbol.get(symbol))
@@ -0,0 +1,178 @@
+import asyncio
+import time
+from client_logger import logger
+from resilience import TransientAPIError
+from ttl_cache import TTLCache
+from market.quote_batcher import normalize_symbols
+from market.records import Quote
+
+# Seconds a quote stays fresh, per detail flag (field set). None is the
+# API default, which returns the same fields as ALL.
+DEFAULT_TTLS = {
+    None: 5.0,
+    "ALL": 5.0,
+    "INTRADAY": 5.0,
+    "OPTIONS": 5.0,
+    "FUNDAMENTAL": 300.0,
+    "WEEK_52": 3600.0,
+    "MF_DETAIL": 3600.0,
+}
+
+
+class QuoteCache:
+    """
+    Bounded in-memory quote cache keyed by (symbol, detail flag).
+
+    Entries expire after the TTL of their field set and the least recently
+    used entry is evicted once `max_entries` is reached. Expired entries
+    younger than `stale_ttl` are still served immediately while a background
+    refresh fetches a new quote (stale-while-revalidate). On a partial hit
+    only the missing symbols are fetched. With a MarketCalendar, quotes
+    fetched outside trading hours stay fresh until the next session opens.
+    While the upstream is unavailable (TransientAPIError, including an open
+    circuit breaker), cached quotes of any age are served when
+    `serve_stale_on_error` is set. With a SharedCache, misses are looked up
+    in the cache daemon shared with other server processes before calling
+    E*TRADE, and fetched quotes are shared with them.
+    """
+
+    def __init__(self, fetcher, max_entries=10000, ttls=None, stale_ttl=60.0, calendar=None,
+                 serve_stale_on_error=True, shared=None, clock=time.monotonic):
+        """
+        :param fetcher: QuoteBatcher (or anything with fetch_quote_map) used on a miss
+        :param max_entries: Maximum number of cached quotes
+        :param ttls: Optional overrides of DEFAULT_TTLS, keyed by detail flag
+        :param stale_ttl: Seconds past expiry during which a stale quote may still be served
+        :param calendar: Optional MarketCalendar used to extend TTLs outside trading hours
+        :param serve_stale_on_error: Serve expired quotes while the upstream is unavailable
+        :param shared: Optional SharedCache consulted on a miss
+        :param clock: Monotonic time source
+        """
+        self.fetcher = fetcher
+        self.serve_stale_on_error = serve_stale_on_error
+        self.served_on_error = 0
+        self.shared = shared
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.calendar = calendar
+        self.cache = TTLCache(max_entries, stale_ttl, clock)
+        self._refreshing = set()
+        self._tasks = set()
+
+    def ttl(self, detail_flag=None):
+        """Returns the freshness lifetime in seconds for a field set"""
+        ttl = self.ttls.get(detail_flag, self.ttls[None])
+        if self.calendar is not None:
+            ttl = self.calendar.ttl(ttl)
+        return ttl
+
+    def get(self, symbol, detail_flag=None):
+        """
+        Looks up a cached quote without touching the network.
+        :return: (quote, is_fresh) or None when absent or too old to serve.
+        """
+        return self.cache.get((symbol, detail_flag))
+
+    def put(self, symbol, quote, detail_flag=None):
+        """Stores a quote, evicting the least recently used entries if needed"""
+        self.cache.put((symbol, detail_flag), quote, self.ttl(detail_flag))
+
+    def clear(self):
+        self.cache.clear()
+
+    def stats(self):
+        """Returns hit/miss counters and the current size"""
+        return dict(self.cache.stats(), served_on_error=self.served_on_error)
+
+    async def fetch_quote(self, symbols, detail_flag=None):
+        """
+        Returns quotes for the given symbols, fetching only what is not cached.
+        :param symbols: A string of comma-separated symbols (e.g., "AAPL,GOOG") or a list of symbols.
+        :param detail_flag: Optional field set (ALL, FUNDAMENTAL, INTRADAY, OPTIONS, WEEK_52, MF_DETAIL).
+        :return: List of Quote records, in the order requested.
+        """
+        symbols = normalize_symbols(symbols)
+        found = {}
+        missing = []
+        stale = []
+        for symbol in symbols:
+            cached = self.get(symbol, detail_flag)
+            if cached is None:
+                missing.append(symbol)
+                continue
+            quote, is_fresh = cached
+            found[symbol] = quote
+            if not is_fresh:
+                stale.append(symbol)
+
+        if stale:
+            self._refresh_in_background(stale, detail_flag)
+        if missing:
+            found.update(await self._fetch(missing, detail_flag))
+
+        quotes = [found[symbol] for symbol in symbols if symbol in found]
+        if symbols and not quotes:
+            raise Exception("Quote API service error")
+        return quotes
+
+    async def _fetch(self, symbols, detail_flag):
+        """Fetches quotes from the shared cache, then from upstream, and stores them"""
+        if self.shared is None:
+            return await self._fetch_upstream(symbols, detail_flag)
+        found = {}
+        entries = await self.shared.get_many([(symbol, detail_flag) for symbol in symbols])
+        for symbol, entry in zip(symbols, entries):
+            if entry is not None:
+                # Expire it when the process that fetched it does
+                quote, ttl = entry
+                quote = Quote.from_api(quote)
+                self.cache.put((symbol, detail_flag), quote, ttl)
+                found[symbol] = quote
+        missing = [symbol for symbol in symbols if symbol not in found]
+        if missing:
+            found.update(await self._fetch_upstream(missing, detail_flag))
+        return found
+
+    async def _fetch_upstream(self, symbols, detail_flag):
+        """Fetches quotes from upstream and stores them"""
+        fetched = {}
+        try:
+            fetched = await self.fetcher.fetch_quote_map(symbols, detail_flag)
+        except TransientAPIError as e:
+            fallback = {s: self.cache.peek((s, detail_flag)) for s in symbols} if self.serve_stale_on_error else {}
+            if not fallback or None in fallback.values():
+                raise
+            logger.warning("Serving cached quotes for %s: %s", ",".join(symbols), e)
+            self.served_on_error += len(fallback)
+            return fallback
+        finally:
+            if self.shared is not None:
+                await self._share(symbols, fetched, detail_flag)
+        for symbol, quote in fetched.items():
+            self.put(symbol, quote, detail_flag)
+        return fetched
+
+    async def _share(self, symbols, fetched, detail_flag):
+        """Publishes fetched quotes to the shared cache and gives up the leases on the rest"""
+        ttl = self.ttl(detail_flag)
+        await self.shared.put_many([((symbol, detail_flag), quote.to_dict(), ttl) for symbol, quote in fetched.items()])
+        await self.shared.release([(symbol, detail_flag) for symbol in symbols if symbol not in fetched])
+
+    def _refresh_in_background(self, symbols, detail_flag):
+        """Schedules a refresh of stale symbols unless one is already running"""
+        symbols = [s for s in symbols if (s, detail_flag) not in self._refreshing]
+        if not symbols:
+            return
+        keys = [(s, detail_flag) for s in symbols]
+        self._refreshing.update(keys)
+
+        async def refresh():
+            try:
+                await self._fetch(symbols, detail_flag)
+            except Exception as e:
+                logger.debug("Background quote refresh failed for %s: %s", ",".join(symbols), e)
+            finally:
+                self._refreshing.difference_update(keys)
+
+        task = asyncio.ensure_future(refresh())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
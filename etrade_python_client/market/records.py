@@ -0,0 +1,290 @@
+"""
+Compact typed records for quotes and option chains.
+
+The market API returns deeply nested dicts (QuoteData -> Product/All,
+OptionPair -> Call/Put -> OptionGreeks). Caches hold tens of thousands of
+them, so they are decoded once into __slots__ records, which have no
+per-instance dict and allow plain attribute access. to_dict() rebuilds the
+API's shape for the MCP tools and the shared cache: fields the records do
+not model are kept aside and included again, and fields that are None
+(absent from the response) are left out, as the API leaves them out.
+"""
+import sys
+
+_GREEK_KEYS = frozenset(("rho", "vega", "theta", "delta", "gamma", "iv", "currentValue"))
+_OPTION_KEYS = frozenset((
+    "optionCategory", "optionRootSymbol", "timeStamp", "adjustedFlag", "displaySymbol", "optionType",
+    "strikePrice", "symbol", "bid", "ask", "bidSize", "askSize", "inTheMoney", "volume", "openInterest",
+    "netChange", "lastPrice", "quoteDetail", "osiKey", "OptionGreeks"))
+_CHAIN_KEYS = frozenset(("timeStamp", "quoteType", "nearPrice", "SelectedED", "OptionPair"))
+_QUOTE_KEYS = frozenset(("dateTime", "dateTimeUTC", "quoteStatus", "ahFlag", "Product"))
+_PRODUCT_KEYS = frozenset(("symbol", "securityType"))
+
+# Detail block returned for each detail flag; the API default is the same as ALL
+DETAIL_BLOCKS = ("All", "Intraday", "Fundamental", "Option", "Week52", "MutualFund")
+
+# Quote fields decoded into typed attributes, as (attribute, API key) pairs
+QUOTE_FIELDS = (
+    ("last_trade", "lastTrade"),
+    ("change_close", "changeClose"),
+    ("change_close_pct", "changeClosePercentage"),
+    ("previous_close", "previousClose"),
+    ("open", "open"),
+    ("high", "high"),
+    ("low", "low"),
+    ("bid", "bid"),
+    ("bid_size", "bidSize"),
+    ("ask", "ask"),
+    ("ask_size", "askSize"),
+    ("total_volume", "totalVolume"),
+)
+_QUOTE_FIELD_KEYS = frozenset(key for _, key in QUOTE_FIELDS)
+
+# Key tuples of the remaining quote fields, shared by every quote with the same layout
+_KEY_LAYOUTS = {}
+
+
+def _intern(value):
+    """Interns strings repeated across a chain (symbol, type, category) so contracts share one copy"""
+    return sys.intern(value) if type(value) is str else value
+
+
+def _extra(data, known):
+    """Returns the entries of `data` whose keys are not in `known`, or None"""
+    return {k: v for k, v in data.items() if k not in known} or None
+
+
+def _present(fields):
+    """Drops the entries whose value is None, so to_dict() only emits the keys the API sent"""
+    return {k: v for k, v in fields.items() if v is not None}
+
+
+def _compact(fields):
+    """Splits a dict into a shared key tuple and a value tuple"""
+    keys = tuple(fields)
+    return _KEY_LAYOUTS.setdefault(keys, keys), tuple(fields.values())
+
+
+class Greeks:
+    """Option greeks and implied volatility (OptionGreeks)"""
+    __slots__ = ("delta", "gamma", "theta", "vega", "rho", "iv", "current_value", "extra")
+
+    def __init__(self, delta=None, gamma=None, theta=None, vega=None, rho=None, iv=None, current_value=None,
+                 extra=None):
+        self.delta = delta
+        self.gamma = gamma
+        self.theta = theta
+        self.vega = vega
+        self.rho = rho
+        self.iv = iv
+        self.current_value = current_value
+        self.extra = extra
+
+    @classmethod
+    def from_api(cls, data):
+        get = data.get
+        return cls(get("delta"), get("gamma"), get("theta"), get("vega"), get("rho"), get("iv"),
+                   get("currentValue"), _extra(data, _GREEK_KEYS))
+
+    def to_dict(self):
+        result = _present({"rho": self.rho, "vega": self.vega, "theta": self.theta, "delta": self.delta,
+                           "gamma": self.gamma, "iv": self.iv, "currentValue": self.current_value})
+        if self.extra:
+            result.update(self.extra)
+        return result
+
+
+class OptionContract:
+    """One call or put of an option chain"""
+    __slots__ = ("symbol", "option_type", "strike_price", "display_symbol", "osi_key", "option_root_symbol",
+                 "option_category", "adjusted_flag", "in_the_money", "bid", "ask", "bid_size", "ask_size",
+                 "last_price", "net_change", "volume", "open_interest", "time_stamp", "quote_detail", "greeks",
+                 "extra")
+
+    def __init__(self, symbol=None, option_type=None, strike_price=None, display_symbol=None, osi_key=None,
+                 option_root_symbol=None, option_category=None, adjusted_flag=None, in_the_money=None,
+                 bid=None, ask=None, bid_size=None, ask_size=None, last_price=None, net_change=None, volume=None,
+                 open_interest=None, time_stamp=None, quote_detail=None, greeks=None, extra=None):
+        self.symbol = symbol
+        self.option_type = option_type
+        self.strike_price = strike_price
+        self.display_symbol = display_symbol
+        self.osi_key = osi_key
+        self.option_root_symbol = option_root_symbol
+        self.option_category = option_category
+        self.adjusted_flag = adjusted_flag
+        self.in_the_money = in_the_money
+        self.bid = bid
+        self.ask = ask
+        self.bid_size = bid_size
+        self.ask_size = ask_size
+        self.last_price = last_price
+        self.net_change = net_change
+        self.volume = volume
+        self.open_interest = open_interest
+        self.time_stamp = time_stamp
+        self.quote_detail = quote_detail
+        self.greeks = greeks
+        self.extra = extra
+
+    @classmethod
+    def from_api(cls, data):
+        get = data.get
+        greeks = get("OptionGreeks")
+        return cls(_intern(get("symbol")), _intern(get("optionType")), get("strikePrice"), get("displaySymbol"),
+                   get("osiKey"), _intern(get("optionRootSymbol")), _intern(get("optionCategory")),
+                   get("adjustedFlag"), _intern(get("inTheMoney")), get("bid"), get("ask"), get("bidSize"),
+                   get("askSize"), get("lastPrice"), get("netChange"), get("volume"), get("openInterest"),
+                   get("timeStamp"), _intern(get("quoteDetail")),
+                   Greeks.from_api(greeks) if greeks is not None else None, _extra(data, _OPTION_KEYS))
+
+    @property
+    def mid(self):
+        """Midpoint of bid and ask, or None without both"""
+        if self.bid is None or self.ask is None:
+            return None
+        return (self.bid + self.ask) / 2
+
+    def to_dict(self):
+        result = _present({
+            "optionCategory": self.option_category, "optionRootSymbol": self.option_root_symbol,
+            "timeStamp": self.time_stamp, "adjustedFlag": self.adjusted_flag, "displaySymbol": self.display_symbol,
+            "optionType": self.option_type, "strikePrice": self.strike_price, "symbol": self.symbol,
+            "bid": self.bid, "ask": self.ask, "bidSize": self.bid_size, "askSize": self.ask_size,
+            "inTheMoney": self.in_the_money, "volume": self.volume, "openInterest": self.open_interest,
+            "netChange": self.net_change, "lastPrice": self.last_price, "quoteDetail": self.quote_detail,
+            "osiKey": self.osi_key})
+        if self.greeks is not None:
+            result["OptionGreeks"] = self.greeks.to_dict()
+        if self.extra:
+            result.update(self.extra)
+        return result
+
+
+class OptionChain:
+    """
+    An OptionChainResponse: the near price, the selected expiration and
+    (call, put) pairs by strike; either side is None when not requested.
+    """
+    __slots__ = ("near_price", "quote_type", "time_stamp", "selected_expiry", "pairs", "extra", "_columns")
+
+    def __init__(self, pairs=(), near_price=None, quote_type=None, time_stamp=None, selected_expiry=None,
+                 extra=None):
+        """
+        :param pairs: List of (call, put) OptionContract tuples
+        :param selected_expiry: SelectedED dict (year, month, day) or None
+        """
+        self.pairs = list(pairs)
+        self.near_price = near_price
+        self.quote_type = quote_type
+        self.time_stamp = time_stamp
+        self.selected_expiry = selected_expiry
+        self.extra = extra
+        self._columns = None
+
+    @classmethod
+    def from_api(cls, data):
+        from_api = OptionContract.from_api
+        pairs = []
+        for pair in data.get("OptionPair") or []:
+            call = pair.get("Call")
+            put = pair.get("Put")
+            pairs.append((from_api(call) if call is not None else None, from_api(put) if put is not None else None))
+        return cls(pairs, data.get("nearPrice"), data.get("quoteType"), data.get("timeStamp"),
+                   data.get("SelectedED"), _extra(data, _CHAIN_KEYS))
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def calls(self):
+        return [call for call, _ in self.pairs if call is not None]
+
+    def puts(self):
+        return [put for _, put in self.pairs if put is not None]
+
+    def columns(self):
+        """
+        Returns the chain as ChainColumns (NumPy arrays per field), built on
+        first use and kept with the record. Requires numpy.
+        """
+        if self._columns is None:
+            from market.option_columns import ChainColumns
+            self._columns = ChainColumns.from_chain(self)
+        return self._columns
+
+    def to_dict(self):
+        pairs = []
+        for call, put in self.pairs:
+            pair = {}
+            if call is not None:
+                pair["Call"] = call.to_dict()
+            if put is not None:
+                pair["Put"] = put.to_dict()
+            pairs.append(pair)
+        result = _present({"timeStamp": self.time_stamp, "quoteType": self.quote_type, "nearPrice": self.near_price})
+        result["OptionPair"] = pairs
+        if self.selected_expiry is not None:
+            result["SelectedED"] = self.selected_expiry
+        if self.extra:
+            result.update(self.extra)
+        return result
+
+
+class Quote:
+    """
+    One QuoteData entry. The commonly used price fields are typed
+    attributes; the rest of the detail block (All, Fundamental, ...) is
+    kept as a value tuple whose key tuple is shared by all quotes with the
+    same layout, so it costs far less than a dict per quote.
+    """
+    __slots__ = ("symbol", "security_type", "date_time", "date_time_utc", "quote_status", "ah_flag",
+                 "detail_block") + tuple(attr for attr, _ in QUOTE_FIELDS) + \
+                ("_detail_keys", "_detail_values", "product_extra", "extra")
+
+    @classmethod
+    def from_api(cls, data):
+        quote = cls.__new__(cls)
+        get = data.get
+        product = get("Product") or {}
+        quote.symbol = product.get("symbol")
+        quote.security_type = product.get("securityType")
+        quote.product_extra = _extra(product, _PRODUCT_KEYS)
+        quote.date_time = get("dateTime")
+        quote.date_time_utc = get("dateTimeUTC")
+        quote.quote_status = get("quoteStatus")
+        quote.ah_flag = get("ahFlag")
+
+        quote.detail_block = block = next((name for name in DETAIL_BLOCKS if name in data), None)
+        detail = data[block] if block is not None else {}
+        for attr, key in QUOTE_FIELDS:
+            setattr(quote, attr, detail.get(key))
+        quote._detail_keys, quote._detail_values = _compact(
+            {k: v for k, v in detail.items() if k not in _QUOTE_FIELD_KEYS})
+        quote.extra = _extra(data, _QUOTE_KEYS.union((block,)))
+        return quote
+
+    def get(self, key, default=None):
+        """Returns any field of the detail block by its API name (e.g. "pe", "week52High")"""
+        for attr, api_key in QUOTE_FIELDS:
+            if api_key == key:
+                value = getattr(self, attr)
+                return default if value is None else value
+        try:
+            return self._detail_values[self._detail_keys.index(key)]
+        except ValueError:
+            return default
+
+    def to_dict(self):
+        product = _present({"symbol": self.symbol, "securityType": self.security_type})
+        if self.product_extra:
+            product.update(self.product_extra)
+        result = _present({"dateTime": self.date_time, "dateTimeUTC": self.date_time_utc,
+                           "quoteStatus": self.quote_status, "ahFlag": self.ah_flag})
+        result["Product"] = product
+        if self.detail_block is not None:
+            detail = {key: getattr(self, attr) for attr, key in QUOTE_FIELDS if getattr(self, attr) is not None}
+            detail.update(zip(self._detail_keys, self._detail_values))
+            result[self.detail_block] = detail
+        if self.extra:
+            result.update(self.extra)
+        return result
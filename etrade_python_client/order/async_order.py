@@ -0,0 +1,71 @@
+import asyncio
+from order.order import Order, OrdersByStatus, ORDER_STATUSES
+
+
+class AsyncOrder(Order):
+    """
+    Non-blocking variant of Order's read APIs for use with an AsyncOAuth1Session.
+    Request building and response parsing are shared with Order.
+    """
+
+    def __init__(self, session, base_url, account=None):
+        super().__init__(session, account, base_url)
+
+    async def fetch_orders(self, account_id_key, status=None):
+        """
+        Fetches every order for an account, following page markers.
+        :param account_id_key: The unique key for the account.
+        :param status: Optional status filter (one of ORDER_STATUSES).
+        :return: List of order dictionaries; empty when there are no orders.
+        """
+        return [order async for order in self.iter_orders(account_id_key, status)]
+
+    async def fetch_orders_page(self, account_id_key, status=None, marker=None, count=None, from_date=None,
+                                to_date=None):
+        """
+        Fetches one page of orders for an account.
+        :return: (list of order dictionaries, marker of the next page or None)
+        """
+        url, params, headers = self._orders_request(account_id_key, status, marker, count, from_date, to_date)
+        return await self.session.get_parsed(url, self._handle_orders_response,
+                                             header_auth=True, params=params, headers=headers)
+
+    async def iter_orders(self, account_id_key, status=None, from_date=None, to_date=None, count=100):
+        """
+        Yields every order for an account one at a time, following page markers.
+        The next page is fetched while the caller processes the current one,
+        so at most two pages are held in memory at a time.
+        """
+        task = asyncio.ensure_future(
+            self.fetch_orders_page(account_id_key, status, None, count, from_date, to_date))
+        try:
+            while task is not None:
+                orders, marker = await task
+                task = None
+                if marker:
+                    task = asyncio.ensure_future(
+                        self.fetch_orders_page(account_id_key, status, marker, count, from_date, to_date))
+                for order in orders:
+                    yield order
+        finally:
+            if task is not None:
+                task.cancel()
+
+    async def fetch_orders_by_status(self, account_id_key, statuses=None):
+        """
+        Fetches every page of orders for several statuses, fetching the statuses
+        concurrently over the session's connection pool.
+        :param account_id_key: The unique key for the account.
+        :param statuses: Statuses to fetch; defaults to all of ORDER_STATUSES.
+        :return: OrdersByStatus with the orders (or error message) for each status.
+        """
+        statuses = statuses or ORDER_STATUSES
+        responses = await asyncio.gather(*[self.fetch_orders(account_id_key, status) for status in statuses],
+                                         return_exceptions=True)
+        result = OrdersByStatus()
+        for status, orders in zip(statuses, responses):
+            if isinstance(orders, Exception):
+                result.errors[status] = str(orders)
+            else:
+                result.orders[status] = orders
+        return result
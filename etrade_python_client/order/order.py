@@ -1,13 +1,35 @@
-import json
 import logging
-import configparser
 import random
 import re
-from client_logger import logger
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from app_config import load_config
+from client_logger import logger, log_response_body
+from response_parser import parse_json
 
 # loading configuration file
-config = configparser.ConfigParser()
-config.read('config.ini')
+config = load_config()
+
+# Order statuses accepted by the orders API, in display order
+ORDER_STATUSES = ["OPEN", "EXECUTED", "INDIVIDUAL_FILLS", "CANCELLED", "REJECTED", "EXPIRED"]
+
+
+@dataclass
+class OrdersByStatus:
+    """Orders fetched for several statuses at once"""
+    orders: dict = field(default_factory=dict)
+    errors: dict = field(default_factory=dict)
+
+    def all_orders(self):
+        """Returns every fetched order, merged across statuses in ORDER_STATUSES order"""
+        merged = []
+        for status in ORDER_STATUSES:
+            merged.extend(self.orders.get(status, []))
+        return merged
+
+    def to_dict(self):
+        return {"orders": self.orders, "errors": self.errors}
+
 
 class Order:
 
@@ -16,6 +38,122 @@ class Order:
         self.account = account
         self.base_url = base_url
 
+    def fetch_orders(self, account_id_key, status=None):
+        """
+        Fetches every order for an account, following page markers.
+        :param account_id_key: The unique key for the account.
+        :param status: Optional status filter (one of ORDER_STATUSES).
+        :return: List of order dictionaries; empty when there are no orders.
+        """
+        return list(self.iter_orders(account_id_key, status))
+
+    def fetch_orders_page(self, account_id_key, status=None, marker=None, count=None, from_date=None, to_date=None):
+        """
+        Fetches one page of orders for an account.
+        :param account_id_key: The unique key for the account.
+        :param status: Optional status filter (one of ORDER_STATUSES).
+        :param marker: Marker of the page to fetch, as returned with the previous page.
+        :param count: Number of orders per page (the API allows up to 100).
+        :param from_date: Optional start date, a date or an MMDDYYYY string.
+        :param to_date: Optional end date, a date or an MMDDYYYY string.
+        :return: (list of order dictionaries, marker of the next page or None)
+        """
+        url, params, headers = self._orders_request(account_id_key, status, marker, count, from_date, to_date)
+        response = self.session.get(url, header_auth=True, params=params, headers=headers)
+        return self._handle_orders_response(response)
+
+    def _orders_request(self, account_id_key, status=None, marker=None, count=None, from_date=None, to_date=None):
+        """Builds the URL, query parameters and headers for the orders API"""
+        url = self.base_url + "/v1/accounts/" + account_id_key + "/orders.json"
+        params = {}
+        if status:
+            params["status"] = status
+        if marker:
+            params["marker"] = marker
+        if count:
+            params["count"] = count
+        if from_date:
+            params["fromDate"] = self._format_date(from_date)
+        if to_date:
+            params["toDate"] = self._format_date(to_date)
+        headers = {"consumerkey": config["DEFAULT"]["CONSUMER_KEY"]}
+        return url, params, headers
+
+    @staticmethod
+    def _format_date(value):
+        """Formats a date as MMDDYYYY; strings are passed through"""
+        if hasattr(value, "strftime"):
+            return value.strftime("%m%d%Y")
+        return value
+
+    @staticmethod
+    def _handle_orders_response(response):
+        """
+        Parses an orders API response.
+        :return: (list of order dictionaries, marker of the next page or None)
+        """
+        logger.debug("Request Header: %s", response.request.headers)
+
+        if response is not None and response.status_code == 200:
+            data = parse_json(response)
+            log_response_body(response)
+            if data is not None and "OrdersResponse" in data:
+                orders_response = data["OrdersResponse"]
+                return orders_response.get("Order", []), orders_response.get("marker") or None
+            raise Exception("Orders API service error")
+        elif response is not None and response.status_code == 204:
+            return [], None
+        else:
+            log_response_body(response)
+            if response is not None and response.headers.get('Content-Type') == 'application/json':
+                error_data = parse_json(response)
+                if "Error" in error_data and "message" in error_data["Error"]:
+                    raise Exception(error_data["Error"]["message"])
+            raise Exception("Orders API service error")
+
+    def iter_orders(self, account_id_key, status=None, from_date=None, to_date=None, count=100):
+        """
+        Yields every order for an account one at a time, following page markers.
+        The next page is fetched in the background while the caller processes
+        the current one, so at most two pages are held in memory at a time.
+        :param account_id_key: The unique key for the account.
+        :param status: Optional status filter (one of ORDER_STATUSES).
+        :param from_date: Optional start date, a date or an MMDDYYYY string.
+        :param to_date: Optional end date, a date or an MMDDYYYY string.
+        :param count: Number of orders per page (the API allows up to 100).
+        """
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            future = executor.submit(self.fetch_orders_page, account_id_key, status, None, count, from_date, to_date)
+            while future is not None:
+                orders, marker = future.result()
+                future = None
+                if marker:
+                    future = executor.submit(self.fetch_orders_page, account_id_key, status, marker, count,
+                                             from_date, to_date)
+                yield from orders
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def fetch_orders_by_status(self, account_id_key, statuses=None):
+        """
+        Fetches every page of orders for several statuses, fetching the statuses
+        concurrently over the session's connection pool.
+        :param account_id_key: The unique key for the account.
+        :param statuses: Statuses to fetch; defaults to all of ORDER_STATUSES.
+        :return: OrdersByStatus with the orders (or error message) for each status.
+        """
+        statuses = statuses or ORDER_STATUSES
+        result = OrdersByStatus()
+        with ThreadPoolExecutor(max_workers=len(statuses)) as executor:
+            futures = {status: executor.submit(self.fetch_orders, account_id_key, status) for status in statuses}
+        for status, future in futures.items():
+            try:
+                result.orders[status] = future.result()
+            except Exception as e:
+                result.errors[status] = str(e)
+        return result
+
     def preview_order(self):
         """
         Call preview order API based on selecting from different given options
@@ -65,9 +203,8 @@ class Order:
 
         # Handle and parse response
         if response is not None and response.status_code == 200:
-            parsed = json.loads(response.text)
-            logger.debug("Response Body: %s", json.dumps(parsed, indent=4, sort_keys=True))
-            data = response.json()
+            log_response_body(response)
+            data = parse_json(response)
             print("\nPreview Order:")
 
             if data is not None and "PreviewOrderResponse" in data and "PreviewIds" in data["PreviewOrderResponse"]:
@@ -75,7 +212,7 @@ class Order:
                     print("Preview ID: " + str(previewids["previewId"]))
             else:
                 # Handle errors
-                data = response.json()
+                data = parse_json(response)
                 if 'Error' in data and 'message' in data["Error"] and data["Error"]["message"] is not None:
                     print("Error: " + data["Error"]["message"])
                 else:
@@ -111,14 +248,14 @@ class Order:
                     print("Estimated Total Cost: " + str(orders["estimatedTotalAmount"]))
             else:
                 # Handle errors
-                data = response.json()
+                data = parse_json(response)
                 if 'Error' in data and 'message' in data["Error"] and data["Error"]["message"] is not None:
                     print("Error: " + data["Error"]["message"])
                 else:
                     print("Error: Preview Order API service error")
         else:
             # Handle errors
-            data = response.json()
+            data = parse_json(response)
             if 'Error' in data and 'message' in data["Error"] and data["Error"]["message"] is not None:
                 print("Error: " + data["Error"]["message"])
             else:
@@ -200,16 +337,15 @@ class Order:
 
                     # Handle and parse response
                     if response is not None and response.status_code == 200:
-                        parsed = json.loads(response.text)
-                        logger.debug("Response Body: %s", json.dumps(parsed, indent=4, sort_keys=True))
-                        data = response.json()
+                        log_response_body(response)
+                        data = parse_json(response)
                         print("\nPreview Order: ")
                         if data is not None and "PreviewOrderResponse" in data and "PreviewIds" in data["PreviewOrderResponse"]:
                             for previewids in data["PreviewOrderResponse"]["PreviewIds"]:
                                 print("Preview ID: " + str(previewids["previewId"]))
                         else:
                             # Handle errors
-                            data = response.json()
+                            data = parse_json(response)
                             if 'Error' in data and 'message' in data["Error"] and data["Error"]["message"] is not None:
                                 print("Error: " + data["Error"]["message"])
                             else:
@@ -246,14 +382,14 @@ class Order:
                                 print("Estimated Total Cost: " + str(orders["estimatedTotalAmount"]))
                         else:
                             # Handle errors
-                            data = response.json()
+                            data = parse_json(response)
                             if 'Error' in data and 'message' in data["Error"] and data["Error"]["message"] is not None:
                                 print("Error: " + data["Error"]["message"])
                             else:
                                 print("Error: Preview Order API service error")
                     else:
                         # Handle errors
-                        data = response.json()
+                        data = parse_json(response)
                         if 'Error' in data and 'message' in data["Error"] and data["Error"]["message"] is not None:
                             print("Error: " + data["Error"]["message"])
                         else:
@@ -463,7 +599,7 @@ class Order:
             response_open = self.session.get(url, header_auth=True, params=params_open, headers=headers)
 
             logger.debug("Request Header: %s", response_open.request.headers)
-            logger.debug("Response Body: %s", response_open.text)
+            log_response_body(response_open)
 
             print("\nOpen Orders: ")
             # Handle and parse response
@@ -484,9 +620,7 @@ class Order:
                         print("Unknown Option Selected!")
                 break
             elif response_open.status_code == 200:
-                parsed = json.loads(response_open.text)
-                logger.debug(json.dumps(parsed, indent=4, sort_keys=True))
-                data = response_open.json()
+                data = parse_json(response_open)
 
                 order_list = []
                 count = 1
@@ -581,9 +715,8 @@ class Order:
 
                         # Handle and parse response
                         if response is not None and response.status_code == 200:
-                            parsed = json.loads(response.text)
-                            logger.debug("Response Body: %s", json.dumps(parsed, indent=4, sort_keys=True))
-                            data = response.json()
+                            log_response_body(response)
+                            data = parse_json(response)
                             if data is not None and "CancelOrderResponse" in data \
                                     and "orderId" in data["CancelOrderResponse"]:
                                 print("\nOrder number #" + str(
@@ -591,8 +724,8 @@ class Order:
                             else:
                                 # Handle errors
                                 logger.debug("Response Headers: %s", response.headers)
-                                logger.debug("Response Body: %s", response.text)
-                                data = response.json()
+                                log_response_body(response)
+                                data = parse_json(response)
                                 if 'Error' in data and 'message' in data["Error"] \
                                         and data["Error"]["message"] is not None:
                                     print("Error: " + data["Error"]["message"])
@@ -601,8 +734,8 @@ class Order:
                         else:
                             # Handle errors
                             logger.debug("Response Headers: %s", response.headers)
-                            logger.debug("Response Body: %s", response.text)
-                            data = response.json()
+                            log_response_body(response)
+                            data = parse_json(response)
                             if 'Error' in data and 'message' in data["Error"] and data["Error"]["message"] is not None:
                                 print("Error: " + data["Error"]["message"])
                             else:
@@ -615,21 +748,21 @@ class Order:
                         print("Unknown Option Selected!")
                 else:
                     # Handle errors
-                    logger.debug("Response Body: %s", response_open.text)
+                    log_response_body(response_open)
                     if response_open is not None and response_open.headers['Content-Type'] == 'application/json' \
-                            and "Error" in response_open.json() and "message" in response_open.json()["Error"] \
-                            and response_open.json()["Error"]["message"] is not None:
-                        print("Error: " + response_open.json()["Error"]["message"])
+                            and "Error" in parse_json(response_open) and "message" in parse_json(response_open)["Error"] \
+                            and parse_json(response_open)["Error"]["message"] is not None:
+                        print("Error: " + parse_json(response_open)["Error"]["message"])
                     else:
                         print("Error: Balance API service error")
                     break
             else:
                 # Handle errors
-                logger.debug("Response Body: %s", response_open.text)
+                log_response_body(response_open)
                 if response_open is not None and response_open.headers['Content-Type'] == 'application/json' \
-                        and "Error" in response_open.json() and "message" in response_open.json()["Error"] \
-                        and response_open.json()["Error"]["message"] is not None:
-                    print("Error: " + response_open.json()["Error"]["message"])
+                        and "Error" in parse_json(response_open) and "message" in parse_json(response_open)["Error"] \
+                        and parse_json(response_open)["Error"]["message"] is not None:
+                    print("Error: " + parse_json(response_open)["Error"]["message"])
                 else:
                     print("Error: Balance API service error")
                 break
@@ -640,128 +773,29 @@ class Order:
 
         :param self: Pass in authenticated session and information on selected account
         """
-        while True:
-            # URL for the API endpoint
-            url = self.base_url + "/v1/accounts/" + self.account["accountIdKey"] + "/orders.json"
-
-            # Add parameters and header information
-            headers = {"consumerkey": config["DEFAULT"]["CONSUMER_KEY"]}
-            params_open = {"status": "OPEN"}
-            params_executed = {"status": "EXECUTED"}
-            params_indiv_fills = {"status": "INDIVIDUAL_FILLS"}
-            params_cancelled = {"status": "CANCELLED"}
-            params_rejected = {"status": "REJECTED"}
-            params_expired = {"status": "EXPIRED"}
+        # Section title and print_orders label for each status
+        status_display = {"OPEN": ("Open Orders", "open"),
+                          "EXECUTED": ("Executed Orders", "executed"),
+                          "INDIVIDUAL_FILLS": ("Individual Fills Orders", "indiv_fills"),
+                          "CANCELLED": ("Cancelled Orders", "cancelled"),
+                          "REJECTED": ("Rejected Orders", "rejected"),
+                          "EXPIRED": ("Expired Orders", "expired")}
 
-            # Make API call for GET request
-            response_open = self.session.get(url, header_auth=True, params=params_open, headers=headers)
-            response_executed = self.session.get(url, header_auth=True, params=params_executed, headers=headers)
-            response_indiv_fills = self.session.get(url, header_auth=True, params=params_indiv_fills, headers=headers)
-            response_cancelled = self.session.get(url, header_auth=True, params=params_cancelled, headers=headers)
-            response_rejected = self.session.get(url, header_auth=True, params=params_rejected, headers=headers)
-            response_expired = self.session.get(url, header_auth=True, params=params_expired, headers=headers)
+        while True:
+            # Fetch every status concurrently
+            result = self.fetch_orders_by_status(self.account["accountIdKey"], ORDER_STATUSES)
 
             prev_orders = []
-
-            # Open orders
-            logger.debug("Request Header: %s", response_open.request.headers)
-            logger.debug("Response Body: %s", response_open.text)
-
-            print("\nOpen Orders:")
-            # Handle and parse response
-            if response_open.status_code == 204:
-                logger.debug(response_open)
-                print("None")
-            elif response_open.status_code == 200:
-                parsed = json.loads(response_open.text)
-                logger.debug(json.dumps(parsed, indent=4, sort_keys=True))
-                data = response_open.json()
-
-                # Display list of open orders
-                prev_orders.extend(self.print_orders(data, "open"))
-
-            # Executed orders
-            logger.debug("Request Header: %s", response_executed.request.headers)
-            logger.debug("Response Body: %s", response_executed.text)
-            logger.debug(response_executed.text)
-
-            print("\nExecuted Orders:")
-            # Handle and parse response
-            if response_executed.status_code == 204:
-                logger.debug(response_executed)
-                print("None")
-            elif response_executed.status_code == 200:
-                parsed = json.loads(response_executed.text)
-                logger.debug(json.dumps(parsed, indent=4, sort_keys=True))
-                data = response_executed.json()
-
-                # Display list of executed orders
-                prev_orders.extend(self.print_orders(data, "executed"))
-
-            # Individual fills orders
-            logger.debug("Request Header: %s", response_indiv_fills.request.headers)
-            logger.debug("Response Body: %s", response_indiv_fills.text)
-
-            print("\nIndividual Fills Orders:")
-            # Handle and parse response
-            if response_indiv_fills.status_code == 204:
-                logger.debug("Response Body: %s", response_indiv_fills)
-                print("None")
-            elif response_indiv_fills.status_code == 200:
-                parsed = json.loads(response_indiv_fills.text)
-                logger.debug("Response Body: %s", json.dumps(parsed, indent=4, sort_keys=True))
-                data = response_indiv_fills.json()
-
-                # Display list of individual fills orders
-                prev_orders.extend(self.print_orders(data, "indiv_fills"))
-
-            # Cancelled orders
-            logger.debug("Request Header: %s", response_cancelled.request.headers)
-            logger.debug("Response Body: %s", response_cancelled.text)
-
-            print("\nCancelled Orders:")
-            # Handle and parse response
-            if response_cancelled.status_code == 204:
-                logger.debug(response_cancelled)
-                print("None")
-            elif response_cancelled.status_code == 200:
-                parsed = json.loads(response_cancelled.text)
-                logger.debug(json.dumps(parsed, indent=4, sort_keys=True))
-                data = response_cancelled.json()
-
-                # Display list of open orders
-                prev_orders.extend(self.print_orders(data, "cancelled"))
-
-            # Rejected orders
-            logger.debug("Request Header: %s", response_rejected.request.headers)
-            logger.debug("Response Body: %s", response_rejected.text)
-
-            print("\nRejected Orders:")
-            # Handle and parse response
-            if response_rejected.status_code == 204:
-                logger.debug(response_rejected)
-                print("None")
-            elif response_rejected.status_code == 200:
-                parsed = json.loads(response_rejected.text)
-                logger.debug(json.dumps(parsed, indent=4, sort_keys=True))
-                data = response_rejected.json()
-
-                # Display list of open orders
-                prev_orders.extend(self.print_orders(data, "rejected"))
-
-            # Expired orders
-            print("\nExpired Orders:")
-            # Handle and parse response
-            if response_expired.status_code == 204:
-                logger.debug(response_executed)
-                print("None")
-            elif response_expired.status_code == 200:
-                parsed = json.loads(response_expired.text)
-                logger.debug(json.dumps(parsed, indent=4, sort_keys=True))
-                data = response_expired.json()
-
-                # Display list of open orders
-                prev_orders.extend(self.print_orders(data, "expired"))
+            for status in ORDER_STATUSES:
+                title, label = status_display[status]
+                print("\n" + title + ":")
+                if status in result.errors:
+                    print("Error: " + result.errors[status])
+                elif not result.orders.get(status):
+                    print("None")
+                else:
+                    data = {"OrdersResponse": {"Order": result.orders[status]}}
+                    prev_orders.extend(self.print_orders(data, label))
 
             menu_list = {"1": "Preview Order",
                          "2": "Cancel Order",
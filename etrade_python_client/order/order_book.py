@@ -0,0 +1,122 @@
+import threading
+from bisect import bisect_left, bisect_right, insort
+
+
+class OrderBook:
+    """
+    In-memory index of one account's orders.
+
+    Orders are indexed by orderId, symbol, status and placed time and the
+    indexes are updated incrementally as orders are added, so lookups like
+    "open orders for AAPL" never rescan the raw API responses:
+    id lookups are O(1), symbol/status lookups are O(1) plus the size of the
+    result, and placed-time ranges are O(log n) plus the size of the result.
+    All methods are thread-safe, since sync MCP tools query the book from
+    worker threads while async tools update it.
+    """
+
+    def __init__(self, orders=None):
+        self.orders = {}
+        self._by_symbol = {}
+        self._by_status = {}
+        self._by_placed_time = []
+        self._lock = threading.RLock()
+        for order in orders or []:
+            self.upsert(order)
+
+    def __len__(self):
+        return len(self.orders)
+
+    @staticmethod
+    def _keys(order):
+        """Extracts (symbols, status, placed time) from an order"""
+        symbols = set()
+        status = None
+        placed_time = None
+        for details in order.get("OrderDetail") or []:
+            if status is None and details.get("status"):
+                status = details["status"].upper()
+            if placed_time is None and details.get("placedTime") is not None:
+                placed_time = details["placedTime"]
+            for instrument in details.get("Instrument") or []:
+                symbol = (instrument.get("Product") or {}).get("symbol")
+                if symbol:
+                    symbols.add(symbol.upper())
+        return symbols, status, placed_time
+
+    def upsert(self, order):
+        """Adds an order or replaces the indexed version of it"""
+        order_id = order.get("orderId")
+        if order_id is None:
+            return
+        symbols, status, placed_time = self._keys(order)
+        with self._lock:
+            self.remove(order_id)
+            self.orders[order_id] = (order, symbols, status, placed_time)
+            for symbol in symbols:
+                self._by_symbol.setdefault(symbol, set()).add(order_id)
+            if status:
+                self._by_status.setdefault(status, set()).add(order_id)
+            if placed_time is not None:
+                insort(self._by_placed_time, (placed_time, order_id))
+
+    def remove(self, order_id):
+        """Removes an order from every index"""
+        with self._lock:
+            entry = self.orders.pop(order_id, None)
+            if entry is None:
+                return
+            _, symbols, status, placed_time = entry
+            for symbol in symbols:
+                self._by_symbol[symbol].discard(order_id)
+            if status:
+                self._by_status[status].discard(order_id)
+            if placed_time is not None:
+                i = bisect_left(self._by_placed_time, (placed_time, order_id))
+                if i < len(self._by_placed_time) and self._by_placed_time[i] == (placed_time, order_id):
+                    del self._by_placed_time[i]
+
+    def get(self, order_id):
+        """Returns the order with the given id, or None"""
+        entry = self.orders.get(order_id)
+        return entry[0] if entry else None
+
+    def find(self, symbol=None, status=None, placed_from=None, placed_to=None):
+        """
+        Returns orders matching every given filter, most recently placed first.
+        :param symbol: Symbol traded by the order
+        :param status: Order status (e.g. OPEN, EXECUTED)
+        :param placed_from: Earliest placed time, epoch milliseconds (inclusive)
+        :param placed_to: Latest placed time, epoch milliseconds (inclusive)
+        """
+        with self._lock:
+            candidates = []
+            if symbol:
+                candidates.append(self._by_symbol.get(symbol.upper(), set()))
+            if status:
+                candidates.append(self._by_status.get(status.upper(), set()))
+            if placed_from is not None or placed_to is not None:
+                lo = 0 if placed_from is None else bisect_left(self._by_placed_time, (placed_from,))
+                hi = len(self._by_placed_time) if placed_to is None \
+                    else bisect_right(self._by_placed_time, (placed_to, float("inf")))
+                candidates.append({order_id for _, order_id in self._by_placed_time[lo:hi]})
+
+            if candidates:
+                candidates.sort(key=len)
+                order_ids = set(candidates[0]).intersection(*candidates[1:])
+            else:
+                order_ids = self.orders.keys()
+
+            entries = [self.orders[order_id] for order_id in order_ids]
+        entries.sort(key=lambda entry: entry[3] or 0, reverse=True)
+        return [entry[0] for entry in entries]
+
+    def symbols(self):
+        """Returns the symbols with at least one indexed order"""
+        with self._lock:
+            return sorted(symbol for symbol, order_ids in self._by_symbol.items() if order_ids)
+
+    def status_counts(self):
+        """Returns the number of indexed orders per status"""
+        with self._lock:
+            return {status: len(order_ids) for status, order_ids in self._by_status.items() if order_ids}
@@ -0,0 +1,270 @@
+import asyncio
+import json
+import os
+import tempfile
+from contextlib import aclosing, closing
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from client_logger import logger
+
+EASTERN = ZoneInfo("America/New_York")
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "order_store")
+
+# Statuses an order can still move on from; such orders are tracked until they leave them
+PENDING_STATUSES = {"OPEN", "PARTIAL", "CANCEL_REQUESTED"}
+
+
+def order_status(order):
+    """Returns the upper-case status of an order from its OrderDetail, or None"""
+    for details in order.get("OrderDetail", []):
+        if details.get("status"):
+            return details["status"].upper()
+    return None
+
+
+def placed_date(order):
+    """Returns the US Eastern date an order was placed (placedTime is epoch milliseconds), or None"""
+    for details in order.get("OrderDetail", []):
+        if details.get("placedTime") is not None:
+            return datetime.fromtimestamp(details["placedTime"] / 1000, EASTERN).date()
+    return None
+
+
+@dataclass
+class SyncResult:
+    """Outcome of one order history sync"""
+    account_id_key: str
+    new: list = field(default_factory=list)
+    changed: list = field(default_factory=list)
+    fetched: int = 0
+    total: int = 0
+    # Stored pending orders the API no longer listed, so their status is unknown
+    unlisted: list = field(default_factory=list)
+
+    def to_dict(self):
+        return {"account_id_key": self.account_id_key,
+                "new_order_ids": self.new,
+                "changed_order_ids": self.changed,
+                "fetched": self.fetched,
+                "total": self.total,
+                "unlisted_order_ids": self.unlisted}
+
+
+class OrderStore:
+    """
+    Local order history for one account, persisted as JSON together with
+    the sync watermark (last sync date and highest order id seen).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.orders = {}
+        self.last_sync_date = None
+        self.last_order_id = 0
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+                self.orders = data.get("orders", {})
+                watermark = data.get("watermark", {})
+                if watermark.get("last_sync_date"):
+                    self.last_sync_date = datetime.strptime(watermark["last_sync_date"], "%Y-%m-%d").date()
+                self.last_order_id = watermark.get("last_order_id", 0)
+            except Exception as e:
+                logger.error("Error loading order store %s: %s", path, e)
+
+    def merge(self, order, result):
+        """
+        Adds or updates an order, recording it in result if it is new or changed.
+        :return: True if the store was modified
+        """
+        order_id = order.get("orderId")
+        if order_id is None:
+            return False
+        key = str(order_id)
+        existing = self.orders.get(key)
+        if existing is None:
+            result.new.append(order_id)
+        elif existing != order:
+            result.changed.append(order_id)
+        else:
+            return False
+        self.orders[key] = order
+        self.last_order_id = max(self.last_order_id, order_id)
+        return True
+
+    def pending_ids(self):
+        """Returns the ids of stored orders whose last known status was not final"""
+        return {order_id for order_id, order in self.orders.items() if order_status(order) in PENDING_STATUSES}
+
+    def snapshot(self):
+        """Returns the data save() writes; the orders dict is copied so merges may continue while it is written"""
+        return {"watermark": {"last_sync_date": self.last_sync_date.isoformat() if self.last_sync_date else None,
+                              "last_order_id": self.last_order_id},
+                "orders": dict(self.orders)}
+
+    def save(self, data=None):
+        """
+        Writes the store atomically so a crash never leaves a truncated file.
+        :param data: Snapshot to write; defaults to the current state
+        """
+        data = self.snapshot() if data is None else data
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+
+class OrderSync:
+    """
+    Incremental order history sync.
+
+    The first sync downloads the history returned by the orders API. Later
+    syncs first fetch all currently open orders, whose status can change long
+    after they were placed, then page through orders placed since the last
+    sync date (minus an overlap to catch late updates). Stored orders that
+    were pending at the last sync but are no longer open have filled, been
+    cancelled or expired; the window is widened back to the earliest placed
+    date among them so they are fetched again with their final status. The
+    API lists orders newest first, so paging stops at the order-id watermark
+    (the highest id already stored) once every such order has been seen.
+    Orders are merged into an OrderStore, so steady-state cost follows new
+    activity, not history size.
+    """
+
+    def __init__(self, order_client, store_dir=DEFAULT_STORE_DIR, overlap_days=1, on_order=None):
+        """
+        :param order_client: Order or AsyncOrder used to fetch orders
+        :param store_dir: Directory holding one JSON store per account
+        :param overlap_days: Days before the last sync date to re-fetch
+        :param on_order: Optional callback(account_id_key, order) for every new or changed order
+        """
+        self.order_client = order_client
+        self.store_dir = store_dir
+        self.overlap_days = overlap_days
+        self.on_order = on_order
+        self._stores = {}
+
+    def store(self, account_id_key):
+        """Returns the (cached) local store for an account"""
+        store = self._stores.get(account_id_key)
+        if store is None:
+            path = os.path.join(self.store_dir, account_id_key + ".json")
+            # setdefault keeps a single store per account when threads race to create it
+            store = self._stores.setdefault(account_id_key, OrderStore(path))
+        return store
+
+    def _window(self, store):
+        """Returns (from_date, to_date) for the next sync; from_date is None on the first sync"""
+        today = datetime.now(EASTERN).date()
+        if store.last_sync_date is None:
+            return None, today
+        return min(store.last_sync_date, today) - timedelta(days=self.overlap_days), today
+
+    def sync(self, account_id_key):
+        """
+        Fetches new and changed orders for an account and merges them into its store.
+        :return: SyncResult
+        """
+        store = self.store(account_id_key)
+        from_date, to_date = self._window(store)
+        result = SyncResult(account_id_key)
+        # Read before the open orders are merged, which may raise it
+        watermark = store.last_order_id if from_date is not None else None
+        pending = set()
+
+        if from_date is not None:
+            pending = store.pending_ids()
+            for order in self.order_client.iter_orders(account_id_key, status="OPEN"):
+                self._merge(store, order, result, pending)
+            from_date = self._widen(store, from_date, pending)
+        with closing(self.order_client.iter_orders(account_id_key, from_date=from_date,
+                                                   to_date=to_date if from_date else None)) as orders:
+            for order in orders:
+                if self._past_watermark(order, watermark, pending):
+                    break
+                self._merge(store, order, result, pending)
+
+        self._check_pending(store, result, pending)
+        store.last_sync_date = to_date
+        store.save()
+        return self._finish(store, result)
+
+    async def sync_async(self, account_id_key):
+        """
+        Async variant of sync() for use with AsyncOrder. The store is written on a worker thread.
+        :return: SyncResult
+        """
+        store = self.store(account_id_key)
+        from_date, to_date = self._window(store)
+        result = SyncResult(account_id_key)
+        # Read before the open orders are merged, which may raise it
+        watermark = store.last_order_id if from_date is not None else None
+        pending = set()
+
+        if from_date is not None:
+            pending = store.pending_ids()
+            async for order in self.order_client.iter_orders(account_id_key, status="OPEN"):
+                self._merge(store, order, result, pending)
+            from_date = self._widen(store, from_date, pending)
+        async with aclosing(self.order_client.iter_orders(account_id_key, from_date=from_date,
+                                                          to_date=to_date if from_date else None)) as orders:
+            async for order in orders:
+                if self._past_watermark(order, watermark, pending):
+                    break
+                self._merge(store, order, result, pending)
+
+        self._check_pending(store, result, pending)
+        store.last_sync_date = to_date
+        await asyncio.to_thread(store.save, store.snapshot())
+        return self._finish(store, result)
+
+    @staticmethod
+    def _widen(store, from_date, pending):
+        """
+        Moves from_date back to the earliest placed date of the pending orders
+        that were not in the open orders; None (the whole history) if any of
+        them has no placed time.
+        """
+        for order_id in pending:
+            placed = placed_date(store.orders[order_id])
+            if placed is None:
+                return None
+            from_date = min(from_date, placed)
+        return from_date
+
+    @staticmethod
+    def _check_pending(store, result, pending):
+        if pending:
+            result.unlisted = sorted(store.orders[order_id]["orderId"] for order_id in pending)
+            logger.warning("Order sync %s: %d pending order(s) no longer listed by the API: %s",
+                           result.account_id_key, len(pending), ", ".join(sorted(pending)))
+
+    @staticmethod
+    def _past_watermark(order, watermark, pending):
+        """True once paging reaches already-stored orders and no pending order is still unaccounted for"""
+        if watermark is None or pending:
+            return False
+        order_id = order.get("orderId")
+        return order_id is not None and order_id <= watermark
+
+    def _merge(self, store, order, result, pending=None):
+        result.fetched += 1
+        if pending:
+            pending.discard(str(order.get("orderId")))
+        if store.merge(order, result) and self.on_order is not None:
+            self.on_order(result.account_id_key, order)
+
+    @staticmethod
+    def _finish(store, result):
+        result.total = len(store.orders)
+        logger.debug("Order sync %s: %d fetched, %d new, %d changed",
+                     result.account_id_key, result.fetched, len(result.new), len(result.changed))
+        return result
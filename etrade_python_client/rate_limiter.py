@@ -0,0 +1,369 @@
+"""Client-side token-bucket rate limiting per E*TRADE API class"""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from app_config import BASE_DIR
+
+# Default sustained requests per second and burst size per API class
+DEFAULT_LIMITS = {
+    "market": (4.0, 4),
+    "accounts": (2.0, 2),
+    "orders": (2.0, 2),
+}
+DEFAULT_SHARED_FILE = os.path.join(BASE_DIR, "rate_budget.json")
+
+
+def endpoint_class(url):
+    """Maps a request URL to its E*TRADE throttling class, or None if it is not throttled"""
+    path = urlsplit(url).path
+    if path.startswith("/v1/market/"):
+        return "market"
+    if path.startswith("/v1/accounts/"):
+        if "/orders" in path:
+            return "orders"
+        return "accounts"
+    return None
+
+
+def limits_from_config(config):
+    """Reads (requests per second, burst) per API class from RATE_LIMIT_* settings in config.ini"""
+    limits = {}
+    for name, (rate, burst) in DEFAULT_LIMITS.items():
+        rate = config.getfloat("DEFAULT", "RATE_LIMIT_" + name.upper(), fallback=rate)
+        burst = config.getint("DEFAULT", "RATE_LIMIT_" + name.upper() + "_BURST", fallback=burst)
+        limits[name] = (rate, burst)
+    return limits
+
+
+class RateLimitExceeded(Exception):
+    """Raised when the wait queue of an API class is full"""
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations in FIFO order.
+
+    Tokens may go negative: each caller reserves the next token and is told
+    how long to wait for it, so waiters queue up fairly without polling.
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = float(capacity)
+        self.updated = clock()
+
+        self.waiting = 0
+        self.max_waiting = 0
+        self.acquired = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def reserve(self, max_queue):
+        """
+        Takes one token.
+        :return: Seconds to wait before the token may be used
+        """
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1 and self.waiting >= max_queue:
+            self.rejected += 1
+            raise RateLimitExceeded("Rate limit queue full")
+        self.tokens -= 1
+        wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+        self.acquired += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        return wait
+
+    def refund(self):
+        """Returns a reserved token that was never used"""
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+    def stats(self):
+        return {"rate": self.rate,
+                "burst": self.capacity,
+                "queue_depth": self.waiting,
+                "max_queue_depth": self.max_waiting,
+                "acquired": self.acquired,
+                "rejected": self.rejected,
+                "avg_wait": self.total_wait / self.acquired if self.acquired else 0.0,
+                "max_wait": self.max_wait}
+
+
+class RateLimiter:
+    """
+    Separate token buckets per API class (market, accounts, orders) with a
+    bounded wait queue, shared by the sync and async sessions.
+
+    Requests wait for a token instead of being sent and throttled by the
+    server; once `max_queue` callers are already waiting on a class,
+    further requests fail fast with RateLimitExceeded.
+    """
+
+    def __init__(self, limits=None, max_queue=100, clock=time.monotonic):
+        """
+        :param limits: Dict of API class to (requests per second, burst); defaults to DEFAULT_LIMITS
+        :param max_queue: Maximum number of callers waiting per API class
+        :param clock: Monotonic time source
+        """
+        self.max_queue = max_queue
+        self.buckets = {name: TokenBucket(rate, burst, clock)
+                        for name, (rate, burst) in dict(DEFAULT_LIMITS, **(limits or {})).items()}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Builds a limiter from RATE_LIMIT_* settings in the DEFAULT section of config.ini.
+        With RATE_LIMIT_SHARED, the budget is shared with other processes (SharedRateLimiter).
+        """
+        if config.getboolean("DEFAULT", "RATE_LIMIT_SHARED", fallback=False):
+            return SharedRateLimiter.from_config(config)
+        return cls(limits_from_config(config), config.getint("DEFAULT", "RATE_LIMIT_QUEUE", fallback=100))
+
+    def _reserve(self, url):
+        bucket = self.buckets.get(endpoint_class(url))
+        if bucket is None:
+            return None, 0.0
+        with self._lock:
+            wait = bucket.reserve(self.max_queue)
+            if wait > 0:
+                bucket.waiting += 1
+                bucket.max_waiting = max(bucket.max_waiting, bucket.waiting)
+        return bucket, wait
+
+    def _done_waiting(self, bucket, refund=False):
+        with self._lock:
+            bucket.waiting -= 1
+            if refund:
+                bucket.refund()
+
+    def acquire_sync(self, url):
+        """Blocks until a request to `url` may be sent"""
+        bucket, wait = self._reserve(url)
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            finally:
+                self._done_waiting(bucket)
+
+    async def acquire(self, url):
+        """Waits without blocking the event loop until a request to `url` may be sent"""
+        bucket, wait = self._reserve(url)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self._done_waiting(bucket, refund=True)
+                raise
+            self._done_waiting(bucket)
+
+    def stats(self):
+        """Returns queue depth and wait time metrics per API class"""
+        with self._lock:
+            return {name: bucket.stats() for name, bucket in self.buckets.items()}
+
+
+class SharedRateLimiter:
+    """
+    RateLimiter whose token buckets live in a file shared by every process
+    on the host, so several MCP servers (and the CLI) using one consumer key
+    stay under E*TRADE's limits together.
+
+    Each reservation locks the file (fcntl.flock), refills the class's
+    bucket and reserves the next token, so reservations are served in
+    arrival order across processes. Once the bucket is empty a process may
+    hold at most its share of the wait queue (max_queue divided by the
+    processes that reserved a token in the last `active_window` seconds),
+    so a busy process cannot push the others to the back of a long queue;
+    beyond that it fails fast with RateLimitExceeded. Per-process counters
+    in the file show who consumed the budget.
+
+    Uses time.monotonic, which is system-wide on Linux and macOS; flock is
+    Unix-only.
+    """
+
+    def __init__(self, path=DEFAULT_SHARED_FILE, limits=None, max_queue=100, name=None, active_window=60.0,
+                 clock=time.monotonic):
+        """
+        :param path: State file shared by the processes
+        :param limits: Dict of API class to (requests per second, burst); defaults to DEFAULT_LIMITS
+        :param max_queue: Maximum number of callers waiting per API class, across all processes
+        :param name: Label for this process in the stats; defaults to the script name and pid
+        :param active_window: Seconds since its last request during which a process counts towards fair shares
+        :param clock: Monotonic time source, the same in every process
+        """
+        self.path = path
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.max_queue = max_queue
+        self.name = name or "%s[%d]" % (os.path.basename(sys.argv[0]) or "python", os.getpid())
+        self.active_window = active_window
+        self.clock = clock
+        # flock only excludes other processes; threads of this one take this lock first
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        """Builds a shared limiter from RATE_LIMIT_* settings in the DEFAULT section of config.ini"""
+        return cls(config.get("DEFAULT", "RATE_LIMIT_SHARED_FILE", fallback="") or DEFAULT_SHARED_FILE,
+                   limits_from_config(config), config.getint("DEFAULT", "RATE_LIMIT_QUEUE", fallback=100))
+
+    @contextmanager
+    def _shared_state(self):
+        """Locks the state file and yields its contents; changes are written back on exit"""
+        import fcntl
+
+        with self._lock, open(self.path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or "{}")
+                except ValueError:
+                    state = {}
+                state.setdefault("buckets", {})
+                state.setdefault("processes", {})
+                yield state
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _refill(state, name, rate, burst, now):
+        """Returns the class's bucket with tokens added for the time since its last update"""
+        bucket = state["buckets"].get(name)
+        if bucket is None or bucket["updated"] > now:
+            # New class, or state left from before a reboot reset the monotonic clock
+            bucket = state["buckets"][name] = {"tokens": float(burst), "updated": now}
+        bucket["tokens"] = min(burst, bucket["tokens"] + (now - bucket["updated"]) * rate)
+        bucket["updated"] = now
+        return bucket
+
+    def _counters(self, state, name, now):
+        """Returns this process's counters for an API class, dropping expired queue entries of every process"""
+        processes = state["processes"]
+        for pid, process in list(processes.items()):
+            if process["last_seen"] > now or now - process["last_seen"] > 24 * 60 * 60:
+                del processes[pid]
+                continue
+            counters = process["classes"].get(name)
+            if counters is not None:
+                counters["queued"] = [due for due in counters["queued"] if due > now]
+        process = processes.setdefault(str(os.getpid()), {"name": self.name, "classes": {}})
+        process["last_seen"] = now
+        return process["classes"].setdefault(name, {"acquired": 0, "rejected": 0, "total_wait": 0.0,
+                                                    "max_wait": 0.0, "queued": []})
+
+    def _reserve(self, url):
+        name = endpoint_class(url)
+        if name not in self.limits:
+            return None, 0.0
+        rate, burst = self.limits[name]
+        with self._shared_state() as state:
+            now = self.clock()
+            bucket = self._refill(state, name, rate, burst, now)
+            counters = self._counters(state, name, now)
+            rejected = False
+            if bucket["tokens"] < 1:
+                processes = state["processes"].values()
+                queued = sum(len(p["classes"].get(name, {}).get("queued", ())) for p in processes)
+                active = sum(1 for p in processes if now - p["last_seen"] < self.active_window)
+                rejected = queued >= self.max_queue or len(counters["queued"]) >= max(1, self.max_queue // active)
+            if rejected:
+                counters["rejected"] += 1
+            else:
+                bucket["tokens"] -= 1
+                wait = 0.0 if bucket["tokens"] >= 0 else -bucket["tokens"] / rate
+                counters["acquired"] += 1
+                counters["total_wait"] += wait
+                counters["max_wait"] = max(counters["max_wait"], wait)
+                if wait > 0:
+                    counters["queued"].append(now + wait)
+        if rejected:
+            raise RateLimitExceeded("Rate limit queue full")
+        return (name, now + wait), wait
+
+    def _refund(self, reservation):
+        """Returns a reserved token that was never used"""
+        name, due = reservation
+        rate, burst = self.limits[name]
+        with self._shared_state() as state:
+            now = self.clock()
+            bucket = self._refill(state, name, rate, burst, now)
+            bucket["tokens"] = min(burst, bucket["tokens"] + 1)
+            counters = self._counters(state, name, now)
+            if due in counters["queued"]:
+                counters["queued"].remove(due)
+
+    def acquire_sync(self, url):
+        """Blocks until a request to `url` may be sent"""
+        _, wait = self._reserve(url)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire(self, url):
+        """
+        Waits without blocking the event loop until a request to `url` may be sent.
+        The state file is locked, read and written on a worker thread, so
+        contention with other processes never stalls the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        reserving = loop.run_in_executor(None, self._reserve, url)
+        try:
+            reservation, wait = await asyncio.shield(reserving)
+        except asyncio.CancelledError:
+            # The reservation still completes on the worker thread; give its token back
+            reserving.add_done_callback(lambda f: self._refund_later(loop, f))
+            raise
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                loop.run_in_executor(None, self._refund, reservation)
+                raise
+
+    def _refund_later(self, loop, reserving):
+        """Refunds the reservation made by a cancelled acquire, off the event loop"""
+        if reserving.cancelled() or reserving.exception() is not None:
+            return
+        reservation, _ = reserving.result()
+        if reservation is not None:
+            loop.run_in_executor(None, self._refund, reservation)
+
+    def stats(self):
+        """Returns the shared budget per API class and what each process consumed"""
+        with self._shared_state() as state:
+            now = self.clock()
+            classes = {}
+            for name, (rate, burst) in self.limits.items():
+                bucket = self._refill(state, name, rate, burst, now)
+                classes[name] = {"rate": rate,
+                                 "burst": burst,
+                                 "tokens": round(bucket["tokens"], 2),
+                                 "queue_depth": sum(len([due for due in p["classes"].get(name, {}).get("queued", ())
+                                                         if due > now]) for p in state["processes"].values())}
+            processes = {}
+            for pid, process in state["processes"].items():
+                processes[process["name"]] = {
+                    "pid": int(pid),
+                    "active": now - process["last_seen"] < self.active_window,
+                    "idle_seconds": round(now - process["last_seen"], 1),
+                    "classes": {name: {"acquired": c["acquired"],
+                                       "rejected": c["rejected"],
+                                       "avg_wait": c["total_wait"] / c["acquired"] if c["acquired"] else 0.0,
+                                       "max_wait": c["max_wait"]}
+                                for name, c in process["classes"].items()}}
+        return {"shared_file": self.path, "process": self.name, "classes": classes, "processes": processes}
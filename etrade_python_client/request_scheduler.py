@@ -0,0 +1,167 @@
+"""Priority scheduling of outgoing E*TRADE requests"""
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+# Priority classes, most important first
+PRIORITY_CLASSES = ["order_actions", "accounts", "quotes", "chains"]
+TOP_CLASS = PRIORITY_CLASSES[0]
+
+# Maximum concurrent requests per class
+DEFAULT_CAPS = {"order_actions": 10, "accounts": 6, "quotes": 4, "chains": 2}
+
+# Slots of the global limit that only order actions may use, so an order
+# preview or cancel never waits behind account reads and market data
+DEFAULT_RESERVED_SLOTS = 2
+
+
+def priority_class(method, url):
+    """Maps a request to its priority class, or None if it bypasses the scheduler"""
+    path = urlsplit(url).path
+    if path.startswith("/v1/accounts/"):
+        if "/orders" in path and method.upper() != "GET":
+            return "order_actions"
+        return "accounts"
+    if path.startswith("/v1/market/quote/"):
+        return "quotes"
+    if path.startswith("/v1/market/"):
+        return "chains"
+    return None
+
+
+class RequestScheduler:
+    """
+    Admits requests by priority class (order actions > account/balance >
+    quotes > chains/scans) under a global concurrency limit and per-class
+    caps. The classes below order actions share at most `max_concurrency -
+    reserved_slots` slots, so order actions always find a free one. When a
+    slot frees up, the highest-priority class with waiters and spare capacity
+    goes next; within a class, waiting flows (e.g. MCP sessions) are served
+    round-robin so one busy agent cannot starve another.
+    """
+
+    def __init__(self, max_concurrency=10, caps=None, flow_key=None, reserved_slots=DEFAULT_RESERVED_SLOTS):
+        """
+        :param max_concurrency: Maximum requests in flight across all classes
+        :param caps: Optional overrides of DEFAULT_CAPS
+        :param flow_key: Optional callable returning the current caller's flow id
+        :param reserved_slots: Slots kept free for order actions (at least one lower-class slot remains)
+        """
+        self.max_concurrency = max_concurrency
+        self.lower_class_limit = max(1, max_concurrency - reserved_slots)
+        self.caps = dict(DEFAULT_CAPS, **(caps or {}))
+        self.flow_key = flow_key
+        self._queues = {name: OrderedDict() for name in PRIORITY_CLASSES}
+        self._running = {name: 0 for name in PRIORITY_CLASSES}
+        self._total = 0
+        # Requests in flight below order actions, limited to lower_class_limit
+        self._lower_running = 0
+
+        self._queued = {name: 0 for name in PRIORITY_CLASSES}
+        self._max_queued = {name: 0 for name in PRIORITY_CLASSES}
+        self._dispatched = {name: 0 for name in PRIORITY_CLASSES}
+        self._total_wait = {name: 0.0 for name in PRIORITY_CLASSES}
+
+    def _flow(self):
+        if self.flow_key is None:
+            return None
+        try:
+            return self.flow_key()
+        except Exception:
+            return None
+
+    @asynccontextmanager
+    async def slot(self, method, url):
+        """Holds a scheduling slot for the duration of one request attempt"""
+        name = priority_class(method, url)
+        if name is None:
+            yield
+            return
+        await self._acquire(name)
+        try:
+            yield
+        finally:
+            self._release(name)
+
+    async def _acquire(self, name):
+        future = asyncio.get_running_loop().create_future()
+        flow = self._flow()
+        self._queues[name].setdefault(flow, deque()).append((future, time.monotonic()))
+        self._queued[name] += 1
+        self._max_queued[name] = max(self._max_queued[name], self._queued[name])
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just as we were cancelled
+                self._release(name)
+            else:
+                self._discard(name, flow, future)
+            raise
+
+    def _discard(self, name, flow, future):
+        waiters = self._queues[name].get(flow)
+        if waiters is None:
+            return
+        for entry in waiters:
+            if entry[0] is future:
+                waiters.remove(entry)
+                self._queued[name] -= 1
+                break
+        if not waiters:
+            del self._queues[name][flow]
+
+    def _release(self, name):
+        self._running[name] -= 1
+        self._total -= 1
+        if name != TOP_CLASS:
+            self._lower_running -= 1
+        self._dispatch()
+
+    def _has_capacity(self, name):
+        if self._running[name] >= self.caps[name]:
+            return False
+        return name == TOP_CLASS or self._lower_running < self.lower_class_limit
+
+    def _dispatch(self):
+        """Grants free slots to the highest-priority eligible waiters"""
+        while self._total < self.max_concurrency:
+            for name in PRIORITY_CLASSES:
+                flows = self._queues[name]
+                if flows and self._has_capacity(name):
+                    break
+            else:
+                return
+
+            # Round-robin: serve the first flow, then move it to the back
+            flow, waiters = next(iter(flows.items()))
+            future, queued_at = waiters.popleft()
+            if waiters:
+                flows.move_to_end(flow)
+            else:
+                del flows[flow]
+            self._queued[name] -= 1
+            if future.done():
+                # Cancelled while queued; its task cleans up on its own
+                continue
+
+            self._running[name] += 1
+            self._total += 1
+            if name != TOP_CLASS:
+                self._lower_running += 1
+            self._dispatched[name] += 1
+            self._total_wait[name] += time.monotonic() - queued_at
+            future.set_result(None)
+
+    def stats(self):
+        """Returns running, queued and wait metrics per priority class"""
+        return {name: {"cap": self.caps[name],
+                       "running": self._running[name],
+                       "queued": self._queued[name],
+                       "max_queued": self._max_queued[name],
+                       "dispatched": self._dispatched[name],
+                       "avg_wait": self._total_wait[name] / self._dispatched[name] if self._dispatched[name] else 0.0}
+                for name in PRIORITY_CLASSES}
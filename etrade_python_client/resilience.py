@@ -0,0 +1,288 @@
+"""Retries, deadlines and per-endpoint circuit breaking for E*TRADE requests"""
+import asyncio
+import random
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+# Statuses that indicate a temporary upstream problem rather than a bad request
+RETRYABLE_STATUSES = frozenset([429, 500, 502, 503, 504])
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS"])
+
+
+class APIError(Exception):
+    """Base class for classified E*TRADE request failures"""
+
+    def __init__(self, message, status_code=None, endpoint=None):
+        super(APIError, self).__init__(message)
+        self.status_code = status_code
+        self.endpoint = endpoint
+
+
+class TransientAPIError(APIError):
+    """The upstream is temporarily unavailable (5xx, 429, timeout or connection error)"""
+
+
+class DeadlineExceeded(TransientAPIError):
+    """The request did not complete within its deadline"""
+
+
+class CircuitOpenError(TransientAPIError):
+    """The endpoint's circuit breaker is open; the request was not sent"""
+
+
+def _transport_errors():
+    errors = [requests.exceptions.ConnectionError, requests.exceptions.Timeout]
+    try:
+        import httpx
+        errors.append(httpx.TransportError)
+    except ImportError:
+        pass
+    return tuple(errors)
+
+
+TRANSPORT_ERRORS = _transport_errors()
+
+
+def endpoint_key(url):
+    """
+    Maps a request URL to the endpoint it calls, dropping symbols, account
+    keys and order ids, e.g. "/v1/accounts/abc/orders/12/cancel.json" -> "accounts/orders/cancel".
+    """
+    parts = [p for p in urlsplit(url).path.split("/") if p][1:]
+    parts = [re.sub(r"\.json$", "", p) for p in parts]
+    if parts[:2] == ["market", "quote"]:
+        return "market/quote"
+    if parts[:1] == ["accounts"] and len(parts) > 2:
+        parts = [parts[0]] + [p for p in parts[2:] if not p.isdigit()]
+    return "/".join(parts)
+
+
+class CircuitBreaker:
+    """
+    Tracks consecutive failures of one endpoint.
+
+    After `failure_threshold` consecutive failures the breaker opens and
+    requests fail fast for `reset_timeout` seconds. It then lets a single
+    probe through (half-open): success closes it, failure opens it again.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+        self.times_opened = 0
+        self.rejected = 0
+
+    def allow(self):
+        """Returns True if a request may be sent now"""
+        with self._lock:
+            now = self.clock()
+            if self.state == self.OPEN and now - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and (not self._probing or now - self.probe_started >= self.reset_timeout):
+                # A probe that never reported back (e.g. cancelled) does not block the endpoint forever
+                self._probing = True
+                self.probe_started = now
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+    def stats(self):
+        with self._lock:
+            return {"state": self.state,
+                    "consecutive_failures": self.failures,
+                    "times_opened": self.times_opened,
+                    "rejected": self.rejected}
+
+
+class Resilience:
+    """
+    Shared retry policy and circuit breakers for the sync and async sessions.
+
+    Idempotent requests (GET) that fail with a retryable status, timeout or
+    connection error are retried up to `max_attempts` times with full-jitter
+    exponential backoff, as long as the request's `deadline` allows. Other
+    methods are never retried. Every endpoint has its own CircuitBreaker, so
+    an unhealthy endpoint fails fast with CircuitOpenError instead of
+    piling more load onto it.
+    """
+
+    def __init__(self, max_attempts=3, base_delay=0.25, max_delay=4.0, deadline=60.0,
+                 failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        """
+        :param max_attempts: Maximum attempts per idempotent request, including the first
+        :param base_delay: Backoff ceiling in seconds before the first retry, doubled per retry
+        :param max_delay: Upper bound of the backoff ceiling in seconds
+        :param deadline: Seconds a request may take across all attempts and backoff
+        :param failure_threshold: Consecutive failures that open an endpoint's breaker
+        :param reset_timeout: Seconds an open breaker waits before letting a probe through
+        :param clock: Monotonic time source
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.breakers = {}
+        self._lock = threading.Lock()
+
+        self.retries = 0
+        self.failures = 0
+
+    @classmethod
+    def from_config(cls, config):
+        """Builds the policy from RETRY_* and CIRCUIT_* settings in the DEFAULT section of config.ini"""
+        return cls(max_attempts=config.getint("DEFAULT", "RETRY_MAX_ATTEMPTS", fallback=3),
+                   base_delay=config.getfloat("DEFAULT", "RETRY_BASE_DELAY", fallback=0.25),
+                   max_delay=config.getfloat("DEFAULT", "RETRY_MAX_DELAY", fallback=4.0),
+                   deadline=config.getfloat("DEFAULT", "REQUEST_DEADLINE", fallback=60.0),
+                   failure_threshold=config.getint("DEFAULT", "CIRCUIT_FAILURE_THRESHOLD", fallback=5),
+                   reset_timeout=config.getfloat("DEFAULT", "CIRCUIT_RESET_TIMEOUT", fallback=30.0))
+
+    def breaker(self, endpoint):
+        with self._lock:
+            breaker = self.breakers.get(endpoint)
+            if breaker is None:
+                breaker = self.breakers[endpoint] = CircuitBreaker(
+                    self.failure_threshold, self.reset_timeout, self.clock)
+            return breaker
+
+    def backoff(self, attempt):
+        """Full-jitter delay before retry number `attempt` (1-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def _start(self, url):
+        endpoint = endpoint_key(url)
+        breaker = self.breaker(endpoint)
+        if not breaker.allow():
+            raise CircuitOpenError("E*TRADE endpoint " + endpoint + " is unavailable, retry later",
+                                   endpoint=endpoint)
+        return endpoint, breaker, self.clock() + self.deadline
+
+    def _outcome(self, endpoint, breaker, response=None, error=None):
+        """
+        Classifies one attempt and updates the breaker.
+        :return: TransientAPIError describing a retryable failure, or None on success
+        """
+        if error is None and response.status_code not in RETRYABLE_STATUSES:
+            # Any definitive answer, including a 4xx, means the endpoint is healthy
+            breaker.record_success()
+            return None
+        breaker.record_failure()
+        with self._lock:
+            self.failures += 1
+        if error is not None:
+            return TransientAPIError("E*TRADE " + endpoint + " request failed: " + str(error), endpoint=endpoint)
+        return TransientAPIError("E*TRADE " + endpoint + " returned HTTP " + str(response.status_code),
+                                 status_code=response.status_code, endpoint=endpoint)
+
+    def _next_delay(self, method, attempt, deadline, breaker):
+        """Returns the backoff before the next attempt, or None if the request must not be retried"""
+        if method.upper() not in IDEMPOTENT_METHODS or attempt >= self.max_attempts:
+            return None
+        delay = self.backoff(attempt)
+        if self.clock() + delay >= deadline or breaker.state == CircuitBreaker.OPEN:
+            return None
+        with self._lock:
+            self.retries += 1
+        return delay
+
+    @staticmethod
+    def _give_up(method, failure, response, error, deadline_passed):
+        """
+        Surfaces the last failure as a classified error. Error responses to
+        non-idempotent requests are returned for the caller to inspect.
+        """
+        if error is None and method.upper() not in IDEMPOTENT_METHODS:
+            return response
+        if deadline_passed:
+            raise DeadlineExceeded("E*TRADE " + failure.endpoint + " request exceeded its deadline",
+                                   endpoint=failure.endpoint) from error
+        raise failure from error
+
+    def call_sync(self, method, url, send):
+        """
+        Sends a request with retries, blocking between attempts.
+        :param send: Callable taking the remaining seconds before the deadline and returning a response
+        """
+        endpoint, breaker, deadline = self._start(url)
+        attempt = 0
+        while True:
+            attempt += 1
+            response, error = None, None
+            try:
+                response = send(max(deadline - self.clock(), 0.001))
+            except TRANSPORT_ERRORS as e:
+                error = e
+            failure = self._outcome(endpoint, breaker, response, error)
+            if failure is None:
+                return response
+            delay = self._next_delay(method, attempt, deadline, breaker)
+            if delay is None:
+                return self._give_up(method, failure, response, error, self.clock() >= deadline)
+            time.sleep(delay)
+
+    async def call(self, method, url, send):
+        """
+        Sends a request with retries, waiting between attempts without blocking the event loop.
+        :param send: Coroutine function taking the remaining seconds before the deadline and returning a response
+        """
+        endpoint, breaker, deadline = self._start(url)
+        attempt = 0
+        while True:
+            attempt += 1
+            response, error = None, None
+            try:
+                response = await send(max(deadline - self.clock(), 0.001))
+            except TRANSPORT_ERRORS as e:
+                error = e
+            failure = self._outcome(endpoint, breaker, response, error)
+            if failure is None:
+                return response
+            delay = self._next_delay(method, attempt, deadline, breaker)
+            if delay is None:
+                return self._give_up(method, failure, response, error, self.clock() >= deadline)
+            await asyncio.sleep(delay)
+
+    def stats(self):
+        """Returns retry counters and the state of every endpoint's breaker"""
+        with self._lock:
+            breakers = dict(self.breakers)
+            stats = {"retries": self.retries, "failures": self.failures}
+        stats["endpoints"] = {name: breaker.stats() for name, breaker in breakers.items()}
+        return stats
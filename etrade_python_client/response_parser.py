@@ -0,0 +1,75 @@
+"""Decodes API response bodies once, with a configurable JSON backend"""
+import json
+
+from app_config import load_config
+from client_logger import logger
+
+# Tried in this order when JSON_DECODER is "auto"
+AUTO_ORDER = ("orjson", "msgspec", "stdlib")
+
+
+def _stdlib():
+    return json.loads
+
+
+def _orjson():
+    import orjson
+    return orjson.loads
+
+
+def _msgspec():
+    import msgspec
+
+    decode = msgspec.json.decode
+
+    def loads(body):
+        try:
+            return decode(body)
+        except msgspec.DecodeError as e:
+            # Callers handle malformed bodies as ValueError, like the other backends raise
+            raise ValueError(str(e)) from e
+    return loads
+
+
+BACKENDS = {"stdlib": _stdlib, "orjson": _orjson, "msgspec": _msgspec}
+
+
+def get_decoder(name="auto"):
+    """
+    Returns (backend name, function decoding bytes or str to Python objects).
+    Unknown or uninstalled backends fall back to the standard library.
+    :param name: stdlib, orjson, msgspec, or auto for the fastest installed one
+    """
+    name = (name or "auto").lower()
+    for candidate in (AUTO_ORDER if name == "auto" else (name,)):
+        backend = BACKENDS.get(candidate)
+        if backend is None:
+            logger.warning("Unknown JSON_DECODER %r; using the standard library", name)
+            break
+        try:
+            return candidate, backend()
+        except ImportError:
+            if name != "auto":
+                logger.warning("JSON_DECODER is %s but the package is not installed; using the standard library",
+                               name)
+                break
+    return "stdlib", json.loads
+
+
+_MISSING = object()
+
+decoder_name, decode = get_decoder(load_config().get("DEFAULT", "JSON_DECODER", fallback="auto"))
+
+
+def parse_json(response):
+    """
+    Returns the decoded JSON body of a requests or httpx response.
+    The body is decoded from bytes on the first call and the result is kept
+    on the response, so handlers and error paths never decode it twice.
+    Raises ValueError if the body is not valid JSON.
+    """
+    parsed = response.__dict__.get("_parsed_json", _MISSING)
+    if parsed is _MISSING:
+        parsed = response._parsed_json = decode(response.content)
+    return parsed
+
@@ -0,0 +1,67 @@
+"""Pool of rauth sessions sharing one connection pool, safe to use from many threads"""
+import threading
+
+
+class SessionPool:
+    """
+    Drop-in wrapper around an authenticated EtradeOAuth1Session that never
+    lets two threads use the same session object at once.
+
+    requests.Session is not documented as thread-safe (cookies, headers
+    and adapters are mutated per request), so each request checks out an
+    idle session, creating a clone with the same credentials only when all
+    are busy; the pool therefore grows to the peak number of concurrent
+    requests, not the number of threads. Clones share the original's HTTP
+    adapters, whose urllib3 connection pools are thread-safe, as well as its
+    signer, rate limiter and retry policy, so warm connections and
+    throttling stay process-wide.
+    """
+
+    def __init__(self, session):
+        """
+        :param session: authenticated EtradeOAuth1Session, the first pooled session
+        """
+        self._base = session
+        self._idle = [session]
+        self._lock = threading.Lock()
+        self.sessions_created = 1
+
+    def _clone(self):
+        base = self._base
+        session = type(base)(base.consumer_key, base.consumer_secret,
+                             base.access_token, base.access_token_secret, service=base.service)
+        for name in ("signature", "rate_limiter", "resilience", "timeout"):
+            if name in base.__dict__:
+                setattr(session, name, base.__dict__[name])
+        for prefix, adapter in base.adapters.items():
+            session.mount(prefix, adapter)
+        with self._lock:
+            self.sessions_created += 1
+        return session
+
+    def request(self, method, url, **kwargs):
+        with self._lock:
+            session = self._idle.pop() if self._idle else None
+        if session is None:
+            session = self._clone()
+        try:
+            return session.request(method, url, **kwargs)
+        finally:
+            with self._lock:
+                self._idle.append(session)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    def __getattr__(self, name):
+        # Credentials and shared settings (access_token, rate_limiter, ...) come from the original session
+        return getattr(self._base, name)
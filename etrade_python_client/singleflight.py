@@ -0,0 +1,43 @@
+"""Deduplication of identical in-flight requests"""
+import asyncio
+
+
+def request_key(method, url, params=None):
+    """Builds a dedup key from the method, URL and order-independent query parameters"""
+    normalized = tuple(sorted((str(k), str(v)) for k, v in (params or {}).items() if v is not None))
+    return method.upper(), url, normalized
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time.
+
+    Callers arriving while a call for the same key is in flight wait for it
+    and receive the same result (or exception) instead of issuing their own.
+    The shared call keeps running if the caller that started it is cancelled.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self.calls = 0
+        self.deduplicated = 0
+
+    async def do(self, key, fn):
+        """
+        :param key: Hashable identity of the call
+        :param fn: Zero-argument coroutine function performing the call
+        """
+        self.calls += 1
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._flights[key] = task
+            task.add_done_callback(lambda _: self._flights.pop(key, None))
+        else:
+            self.deduplicated += 1
+        return await asyncio.shield(task)
+
+    def stats(self):
+        return {"calls": self.calls,
+                "deduplicated": self.deduplicated,
+                "in_flight": len(self._flights)}
@@ -0,0 +1,217 @@
+"""
+Concurrency stress test for the MCP server and the pooled rauth sessions.
+
+Runs hundreds of concurrent MCP tool calls, async ones on the event loop
+and sync ones on worker threads the way FastMCP dispatches them, against
+an in-process fake of the E*TRADE API, and checks that clients are
+initialized exactly once and that no call fails. It then checks that
+incremental order syncs pick up pending orders that left OPEN, however
+long ago they were placed. No credentials, network
+access or config.ini are needed: fake credentials are set on the shared
+configuration before the server is imported. Run from this directory:
+
+    python stress_test.py [number of calls]
+"""
+import asyncio
+import json
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import httpx
+import requests
+
+from app_config import load_config
+
+# Every module shares this ConfigParser, so the fake credentials reach the
+# headers built by the order and account clients
+load_config().read_dict({"DEFAULT": {
+    "CONSUMER_KEY": "key",
+    "CONSUMER_SECRET": "secret",
+    "SANDBOX_BASE_URL": "https://fake",
+    "PROD_BASE_URL": "https://fake",
+    "ORDER_STORE_DIR": tempfile.mkdtemp(),
+}})
+
+import etrade_mcp_server as server
+from async_session import AsyncOAuth1Session
+from etrade_session import EtradeOAuth1Session
+from order.order import Order
+from order.order_sync import EASTERN, OrderSync, order_status, placed_date
+from session_pool import SessionPool
+
+ACCOUNT_ID_KEY = "stressAccountKey"
+
+
+def fake_etrade(path):
+    """Returns (status, body) for a request path, shaped like the E*TRADE API responses"""
+    if path.endswith("/accounts/list.json"):
+        return 200, {"AccountListResponse": {"Accounts": {"Account": [{"accountIdKey": ACCOUNT_ID_KEY}]}}}
+    if path.endswith("/balance.json"):
+        return 200, {"BalanceResponse": {"accountId": "1"}}
+    if path.endswith("/portfolio.json"):
+        return 200, {"PortfolioResponse": {"AccountPortfolio": []}}
+    if path.endswith("/orders.json"):
+        return 200, {"OrdersResponse": {"Order": [{"orderId": 1, "OrderDetail": [
+            {"status": "OPEN", "placedTime": 1, "Instrument": [{"Product": {"symbol": "AAPL"}}]}]}]}}
+    if "/market/quote/" in path:
+        symbols = path.rsplit("/", 1)[1][:-len(".json")].split(",")
+        return 200, {"QuoteResponse": {"QuoteData": [{"Product": {"symbol": s}, "All": {"lastTrade": 1.0}}
+                                                     for s in symbols]}}
+    if path.endswith("/optionexpiredate.json"):
+        return 200, {"OptionExpireDateResponse": {"ExpirationDate": [{"year": 2030, "month": 1, "day": 18}]}}
+    if path.endswith("/optionchains.json"):
+        return 200, {"OptionChainResponse": {"OptionPair": []}}
+    return 404, {"Error": {"message": "Unknown path " + path}}
+
+
+async def handle_async(request):
+    await asyncio.sleep(0.005)
+    status, body = fake_etrade(request.url.path)
+    return httpx.Response(status, json=body)
+
+
+class FakeAdapter(requests.adapters.BaseAdapter):
+    """requests transport adapter answering from fake_etrade"""
+
+    def send(self, request, **kwargs):
+        time.sleep(0.005)
+        status, body = fake_etrade(requests.utils.urlparse(request.url).path)
+        response = requests.Response()
+        response.status_code = status
+        response._content = json.dumps(body).encode()
+        response.headers["Content-Type"] = "application/json"
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+def stress_mcp_tools(calls):
+    print(f"\n1. {calls} concurrent MCP tool calls (async on the loop, sync on worker threads)...")
+    logins = []
+
+    def get_async_session(**kwargs):
+        logins.append(threading.current_thread().name)
+        time.sleep(0.05)  # widen the window for duplicate initialization
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handle_async))
+        return AsyncOAuth1Session("key", "secret", "token", "token_secret", client=client, **kwargs), "https://fake"
+
+    server.get_async_session = get_async_session
+
+    async def main():
+        tools = [
+            lambda i: server.list_accounts(),
+            lambda i: server.get_balance(ACCOUNT_ID_KEY),
+            lambda i: server.get_portfolio(ACCOUNT_ID_KEY),
+            lambda i: server.get_orders(ACCOUNT_ID_KEY, ["OPEN"]),
+            lambda i: server.get_quote(["AAPL", "MSFT", "SYM%d" % (i % 40)]),
+            lambda i: server.get_option_expire_dates("AAPL"),
+            lambda i: server.get_option_chains("AAPL", no_of_strikes=i % 5 + 1),
+            lambda i: asyncio.to_thread(server.find_orders, ACCOUNT_ID_KEY, symbol="AAPL"),
+            lambda i: asyncio.to_thread(server.get_order_book_summary, ACCOUNT_ID_KEY),
+            lambda i: asyncio.to_thread(server.get_token_status),
+            lambda i: asyncio.to_thread(server.get_cache_stats),
+        ]
+        return await asyncio.gather(*[tools[i % len(tools)](i) for i in range(calls)], return_exceptions=True)
+
+    started = time.perf_counter()
+    results = asyncio.run(main())
+    elapsed = time.perf_counter() - started
+    errors = [r for r in results if isinstance(r, BaseException)]
+    print(f"   {calls} calls in {elapsed:.2f}s, {len(errors)} errors, {len(logins)} client initialization(s)")
+    for error in errors[:5]:
+        print("   Error:", repr(error))
+    return not errors and len(logins) == 1
+
+
+def stress_thread_sessions(workers, calls):
+    print(f"\n2. {calls} order fetches from {workers} threads through SessionPool...")
+    base = EtradeOAuth1Session("key", "secret", "token", "token_secret")
+    base.mount("https://", FakeAdapter())
+    session = SessionPool(base)
+    order = Order(session, {}, "https://fake")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(workers) as executor:
+        results = list(executor.map(lambda _: order.fetch_orders_by_status(ACCOUNT_ID_KEY, ["OPEN", "EXECUTED"]),
+                                    range(calls)))
+    elapsed = time.perf_counter() - started
+    errors = sum(len(r.errors) for r in results)
+    print(f"   {calls} fan-outs in {elapsed:.2f}s, {errors} errors, {session.sessions_created} sessions created")
+    return errors == 0
+
+
+class FakeOrderHistory:
+    """AsyncOrder stand-in serving an order history newest first, filtered like the orders API"""
+
+    def __init__(self, orders):
+        self.orders = {order["orderId"]: order for order in orders}
+        self.pages = 0
+
+    async def iter_orders(self, account_id_key, status=None, from_date=None, to_date=None, count=100):
+        matches = [order for _, order in sorted(self.orders.items(), reverse=True)
+                   if (status is None or order_status(order) == status)
+                   and (from_date is None or from_date <= placed_date(order) <= to_date)]
+        for start in range(0, len(matches), count):
+            self.pages += 1
+            for order in matches[start:start + count]:
+                # A fresh copy per response, as decoded from JSON
+                yield json.loads(json.dumps(order))
+
+    def set_status(self, order_id, status):
+        self.orders[order_id]["OrderDetail"][0]["status"] = status
+
+
+def stress_order_sync(count):
+    print(f"\n3. Incremental sync of {count} orders as pending orders fill or are cancelled...")
+    now = datetime.now(EASTERN)
+
+    def order(order_id, days_ago, status):
+        placed = int((now - timedelta(days=days_ago)).timestamp() * 1000)
+        return {"orderId": order_id, "OrderDetail": [{"status": status, "placedTime": placed}]}
+
+    # Order ids grow with the placed time, as they do at E*TRADE
+    history = FakeOrderHistory([order(i, (count - i) // 10, "EXECUTED") for i in range(1, count + 1)])
+    # Pending orders placed long before the overlap window
+    history.set_status(1, "OPEN")
+    history.set_status(2, "PARTIAL")
+    history.set_status(count // 2, "OPEN")
+    sync = OrderSync(history, tempfile.mkdtemp())
+
+    async def main():
+        await sync.sync_async(ACCOUNT_ID_KEY)
+        history.set_status(1, "EXECUTED")
+        history.set_status(2, "CANCELLED")
+        history.orders[count + 1] = order(count + 1, 0, "OPEN")
+        changed = await sync.sync_async(ACCOUNT_ID_KEY)
+        history.pages = 0
+        steady = await sync.sync_async(ACCOUNT_ID_KEY)
+        return changed, steady
+
+    changed, steady = asyncio.run(main())
+    statuses = {i: order_status(sync.store(ACCOUNT_ID_KEY).orders[str(i)]) for i in (1, 2, count // 2, count + 1)}
+    print(f"   changed {sorted(changed.changed)}, new {changed.new}, statuses {statuses}, "
+          f"then {history.pages} page(s) per sync")
+    return (sorted(changed.changed) == [1, 2] and changed.new == [count + 1]
+            and statuses == {1: "EXECUTED", 2: "CANCELLED", count // 2: "OPEN", count + 1: "OPEN"}
+            and not steady.changed and history.pages <= 2)
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    print("--- E*TRADE MCP Server Stress Test ---")
+    ok = stress_mcp_tools(calls)
+    ok = stress_thread_sessions(16, calls // 5) and ok
+    ok = stress_order_sync(calls * 10) and ok
+    print("\nPASSED" if ok else "\nFAILED")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
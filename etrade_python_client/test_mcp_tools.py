@@ -65,7 +65,7 @@ def main():
         quotes = market_client.fetch_quote(["AAPL"])
         if quotes:
             q = quotes[0]
-            price = q.get('All', {}).get('lastTrade')
+            price = q.last_trade
             print(f"   AAPL Last Price: ${price}")
         else:
             print("   No quote data returned.")
@@ -104,15 +104,10 @@ def main():
                 chain_type="CALL",
                 no_of_strikes=2
             )
-            if chain:
-                pairs = chain.get("OptionPair", [])
-                print(f"   Retrieved {len(pairs)} option pairs.")
-                if pairs:
-                    first_call = pairs[0].get("Call")
-                    if first_call:
-                        print(f"   Sample Call: Strike=${first_call.get('strikePrice')} Last=${first_call.get('lastPrice')}")
-            else:
-                print("   No option chain data returned.")
+            print(f"   Retrieved {len(chain)} option pairs.")
+            calls = chain.calls()
+            if calls:
+                print(f"   Sample Call: Strike=${calls[0].strike_price} Last=${calls[0].last_price}")
         except Exception as e:
             print(f"   Failed: {e}")
     else:
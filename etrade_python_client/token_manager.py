@@ -0,0 +1,237 @@
+"""Keeps the MCP server's E*TRADE access token active and tracks its expiry"""
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+
+from client_logger import logger
+from market.market_calendar import EASTERN
+
+RENEW_URL = "https://api.etrade.com/oauth/renew_access_token"
+# E*TRADE deactivates an access token after two hours without requests
+IDLE_TIMEOUT = 2 * 60 * 60.0
+
+
+class TokenExpiredError(Exception):
+    """The access token expired (midnight ET) or was revoked; the CLI must re-authenticate"""
+
+
+def next_expiry(now=None):
+    """Returns the next midnight US Eastern time, when E*TRADE access tokens expire"""
+    now = (now or datetime.now(EASTERN)).astimezone(EASTERN)
+    return datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), EASTERN)
+
+
+def issued_at(tokens):
+    """Returns when saved tokens were obtained, or None for token files written before this was recorded"""
+    value = tokens.get("issued_at")
+    return datetime.fromisoformat(value) if value else None
+
+
+class TokenManager:
+    """
+    Background keeper of an AsyncOAuth1Session's access token.
+
+    E*TRADE access tokens go inactive after two idle hours and expire at
+    midnight ET. The manager renews the token through the renew endpoint
+    before the idle timeout is reached, so the next tool call does not fail,
+    and reports the token as expired after midnight instead of letting the
+    call fail with a generic authentication error. When the token has
+    expired or been revoked, it asks `token_loader` for newer credentials
+    (e.g. saved by the CLI) and swaps them into the live session without
+    rebuilding clients or dropping caches.
+
+    With a `token_file`, its modification time is polled every
+    `watch_interval` seconds and new tokens written there (e.g. after the
+    CLI re-authenticates) are swapped in right away. Requests already
+    signed finish with the old credentials; later ones use the new ones.
+    Polling, renewals and swaps all happen in the background task, on the
+    session's event loop; other threads should only read the state
+    (is_expired, status).
+    """
+
+    def __init__(self, session, issued_at=None, token_loader=None, token_file=None, on_swap=None,
+                 renew_url=RENEW_URL, idle_timeout=IDLE_TIMEOUT, renew_margin=600.0, check_interval=60.0,
+                 watch_interval=2.0, clock=time.monotonic, now=None):
+        """
+        :param session: AsyncOAuth1Session whose token is managed
+        :param issued_at: Aware datetime the token was obtained; defaults to now
+        :param token_loader: Optional callable returning saved tokens (as written by save_tokens) or None
+        :param token_file: Optional path of the saved tokens, watched for changes
+        :param on_swap: Optional callable invoked with the saved tokens after they were swapped in
+        :param renew_url: E*TRADE renew access token endpoint
+        :param idle_timeout: Seconds without requests after which E*TRADE deactivates the token
+        :param renew_margin: Seconds before the idle timeout at which the token is renewed
+        :param check_interval: Seconds between background checks
+        :param watch_interval: Seconds between polls of token_file
+        :param clock: Monotonic time source, the same one the session uses for last_request_at
+        :param now: Callable returning the current aware datetime; defaults to the time in US Eastern
+        """
+        self.session = session
+        self.token_loader = token_loader
+        self.token_file = token_file
+        self.on_swap = on_swap
+        self.renew_url = renew_url
+        self.idle_timeout = idle_timeout
+        self.renew_margin = renew_margin
+        self.check_interval = check_interval
+        self.watch_interval = watch_interval
+        self.clock = clock
+        self.now = now or (lambda: datetime.now(EASTERN))
+        self.expires_at = next_expiry(issued_at or self.now())
+        self.revoked = False
+        self._task = None
+        self._file_version = self._token_file_version()
+        self._lock = asyncio.Lock()
+
+        self.renewals = 0
+        self.renew_failures = 0
+        self.swaps = 0
+        self.last_renewed = None
+
+    def idle_seconds(self):
+        return self.clock() - self.session.last_request_at
+
+    def is_expired(self):
+        return self.revoked or self.now() >= self.expires_at
+
+    def swap(self, access_token, access_token_secret, issued_at=None):
+        """Installs new credentials in the live session and restarts expiry tracking"""
+        self.session.update_tokens(access_token, access_token_secret)
+        self.expires_at = next_expiry(issued_at or self.now())
+        self.revoked = False
+        self.swaps += 1
+        logger.info("Access token swapped; expires at %s", self.expires_at.isoformat())
+
+    def reload(self):
+        """
+        Swaps in saved tokens if they differ from the ones in use.
+        :return: True if new tokens were installed
+        """
+        tokens = self.token_loader() if self.token_loader is not None else None
+        if not tokens or (tokens["access_token"], tokens["access_token_secret"]) == \
+                (self.session.access_token, self.session.access_token_secret):
+            return False
+        self.swap(tokens["access_token"], tokens["access_token_secret"], issued_at(tokens))
+        if self.on_swap is not None:
+            self.on_swap(tokens)
+        return True
+
+    def _token_file_version(self):
+        if self.token_file is None:
+            return None
+        try:
+            stat = os.stat(self.token_file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def poll_token_file(self):
+        """
+        Reloads the tokens if token_file changed since the last poll.
+        :return: True if new tokens were installed
+        """
+        version = self._token_file_version()
+        if version is None or version == self._file_version:
+            return False
+        self._file_version = version
+        logger.info("%s changed, reloading tokens", self.token_file)
+        return self.reload()
+
+    def check(self):
+        """
+        Raises TokenExpiredError when the token can no longer be used and no
+        newer saved tokens are available.
+        """
+        if not self.is_expired() or self.reload():
+            return
+        raise self.expired_error()
+
+    def expired_error(self):
+        """Returns the TokenExpiredError describing why the token can no longer be used"""
+        if self.revoked:
+            reason = "E*TRADE access token is no longer valid"
+        else:
+            reason = "E*TRADE access token expired at " + self.expires_at.isoformat()
+        return TokenExpiredError(reason + ". Run 'python etrade_python_client.py' to re-authenticate.")
+
+    async def renew(self):
+        """
+        Renews (and reactivates, if idle) the access token.
+        :return: True on success
+        """
+        async with self._lock:
+            try:
+                response = await self.session.get(self.renew_url, header_auth=True)
+            except Exception as e:
+                self.renew_failures += 1
+                logger.warning("Access token renewal failed: %s", e)
+                return False
+            if response.status_code == 200:
+                self.renewals += 1
+                self.last_renewed = self.now()
+                logger.debug("Access token renewed")
+                return True
+            self.renew_failures += 1
+            if response.status_code == 401:
+                # Expired or revoked: only a new OAuth login helps
+                self.revoked = True
+            logger.warning("Access token renewal failed with HTTP %s: %s", response.status_code, response.text)
+            return False
+
+    async def ensure_active(self):
+        """Renews the token if it is close to its idle timeout; raises TokenExpiredError if it has expired"""
+        self.check()
+        if self.idle_seconds() >= self.idle_timeout - self.renew_margin:
+            if not await self.renew():
+                self.check()
+
+    async def _run(self):
+        interval = min(self.check_interval, self.watch_interval) if self.token_file else self.check_interval
+        last_check = self.clock()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.poll_token_file()
+                if self.clock() - last_check >= self.check_interval:
+                    last_check = self.clock()
+                    await self.ensure_active()
+            except TokenExpiredError as e:
+                logger.debug("%s", e)
+            except Exception as e:
+                logger.error("Token manager check failed: %s", e)
+
+    def start(self, loop=None):
+        """
+        Starts the background renewal loop on the running event loop. From a
+        thread without one (e.g. a sync MCP tool's worker thread), the start
+        is handed to `loop`, so the task and every token swap it makes run on
+        the loop that owns the session.
+        :param loop: Event loop to start on when called off the loop thread
+        """
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            if loop is not None and not loop.is_closed():
+                loop.call_soon_threadsafe(self.start)
+            return
+        self._task = running.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._file_version = self._token_file_version()
+
+    def status(self):
+        """Returns the token state, expiry and renewal counters"""
+        return {"state": "revoked" if self.revoked else "expired" if self.is_expired() else "active",
+                "expires_at": self.expires_at.isoformat(),
+                "idle_seconds": round(self.idle_seconds(), 1),
+                "renews_in": round(max(self.idle_timeout - self.renew_margin - self.idle_seconds(), 0.0), 1),
+                "last_renewed": self.last_renewed.isoformat() if self.last_renewed else None,
+                "renewals": self.renewals,
+                "renew_failures": self.renew_failures,
+                "swaps": self.swaps}
@@ -0,0 +1,81 @@
+"""Bounded in-memory cache with per-entry TTL, LRU eviction and a stale window"""
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Least-recently-used cache whose entries expire after a per-entry TTL.
+
+    Expired entries younger than `stale_ttl` are still returned, flagged as
+    not fresh, so callers can serve them while refreshing in the background.
+    Older entries are kept until evicted and are only available through
+    peek(), e.g. as a fallback while the upstream is failing.
+    """
+
+    def __init__(self, max_entries=10000, stale_ttl=0.0, clock=time.monotonic):
+        """
+        :param max_entries: Maximum number of cached entries
+        :param stale_ttl: Seconds past expiry during which an entry may still be served
+        :param clock: Monotonic time source
+        """
+        self.max_entries = max_entries
+        self.stale_ttl = stale_ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Looks up an entry and updates the hit/miss counters.
+        :return: (value, is_fresh) or None when absent or too old to serve.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at = entry
+        now = self.clock()
+        if now >= expires_at + self.stale_ttl:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        if now < expires_at:
+            self.hits += 1
+            return value, True
+        self.stale_hits += 1
+        return value, False
+
+    def peek(self, key):
+        """Returns an entry's value regardless of its age, or None, without touching the counters"""
+        entry = self._entries.get(key)
+        return entry[0] if entry is not None else None
+
+    def put(self, key, value, ttl):
+        """Stores an entry for `ttl` seconds, evicting the least recently used entries if needed"""
+        self._entries[key] = (value, self.clock() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        """Returns hit/miss counters and the current size"""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {"size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0}